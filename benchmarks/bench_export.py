@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+"""
+Export benchmark: one month of a decade of N tasks, and all of them.
+
+Usage: python benchmarks/bench_export.py [N]
+"""
+
+import io
+import sys
+import time
+from datetime import datetime, timedelta
+
+from termtasks.exporter import EXPORT_FORMATS, export_tasks, select_tasks
+from termtasks.models import Task, TaskList
+
+TITLES = ["Standup", "Code review", "Lunch", "Planning", "1:1", "Write report"]
+
+
+def make_tasks(count):
+    """Create count tasks spread evenly over ten years."""
+    start = datetime(2015, 1, 1, 9, 0)
+    step = timedelta(days=3652) / count
+    return [Task(f"{TITLES[i % len(TITLES)]} {i}", start + step * i,
+                 start + step * i + timedelta(minutes=30), id=f"task-{i}", completed=i % 3 == 0)
+            for i in range(count)]
+
+
+def main():
+    """Time selecting and writing a month, then the whole list."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    task_list = TaskList(make_tasks(count))
+    month = (datetime(2020, 6, 1), datetime(2020, 7, 1))
+
+    began = time.perf_counter()
+    selected = sum(1 for _ in select_tasks(task_list, *month, completed=False))
+    print(f"{'select month':14s} {selected:9,} tasks {(time.perf_counter() - began) * 1e3:9.2f} ms")
+    began = time.perf_counter()
+    scanned = sum(1 for task in task_list.tasks
+                  if month[0] <= task.start_time < month[1] and not task.completed)
+    print(f"{'full scan':14s} {scanned:9,} tasks {(time.perf_counter() - began) * 1e3:9.2f} ms")
+
+    for fmt in EXPORT_FORMATS:
+        out = io.StringIO(newline="")
+        began = time.perf_counter()
+        written = export_tasks(select_tasks(task_list), out, fmt)
+        seconds = time.perf_counter() - began
+        print(f"{'export ' + fmt:14s} {written:9,} tasks {seconds * 1e3:9.1f} ms  "
+              f"{written / seconds:10,.0f} records/s  {len(out.getvalue()) / 2 ** 20:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+"""
+Import benchmark: streaming iCalendar and CSV import of N events.
+
+Usage: python benchmarks/bench_import.py [N]
+"""
+
+import csv
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from termtasks.importer import import_tasks
+from termtasks.models import TaskList
+from termtasks.utils.storage import TaskStorage
+
+TITLES = ["Standup", "Code review", "Lunch", "Planning", "1:1", "Write report"]
+
+
+def write_ics(path, count):
+    """Write a calendar of count events."""
+    start = datetime(2015, 1, 1, 9, 0)
+    with open(path, "w", newline="") as f:
+        f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\n")
+        for i in range(count):
+            when = start + timedelta(minutes=37 * i)
+            f.write("BEGIN:VEVENT\r\n"
+                    f"UID:event-{i}@example.com\r\n"
+                    f"DTSTART:{when:%Y%m%dT%H%M%S}\r\n"
+                    f"DTEND:{when + timedelta(minutes=30):%Y%m%dT%H%M%S}\r\n"
+                    f"SUMMARY:{TITLES[i % len(TITLES)]} {i}\r\n"
+                    "END:VEVENT\r\n")
+        f.write("END:VCALENDAR\r\n")
+
+
+def write_csv(path, count):
+    """Write a spreadsheet of count events, with separate date and time columns."""
+    start = datetime(2015, 1, 1, 9, 0)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Subject", "Start Date", "Start Time", "End Date", "End Time"])
+        for i in range(count):
+            when = start + timedelta(minutes=37 * i)
+            end = when + timedelta(minutes=30)
+            writer.writerow([f"{TITLES[i % len(TITLES)]} {i}", f"{when:%Y-%m-%d}", f"{when:%H:%M}",
+                             f"{end:%Y-%m-%d}", f"{end:%H:%M}"])
+
+
+def main():
+    """Import N events from each format into an empty list, then save them."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, write in (("events.ics", write_ics), ("events.csv", write_csv)):
+            path = os.path.join(tmpdir, name)
+            write(path, count)
+            size = os.path.getsize(path) / 2 ** 20
+            task_list = TaskList()
+            stats = import_tasks(task_list, path)
+            print(f"{name:12s} {size:7.1f} MiB  {stats.seconds * 1e3:9.1f} ms  "
+                  f"{stats.rate:10,.0f} records/s")
+
+            storage = TaskStorage(os.path.join(tmpdir, "tasks.json"))
+            began = time.perf_counter()
+            storage.save_tasks(task_list)
+            print(f"{'save':12s} {(time.perf_counter() - began) * 1e3:22.1f} ms")
+            # Importing again only finds duplicates
+            print(f"{'re-import':12s} {import_tasks(task_list, path).duplicates:,} duplicates")
+
+
+if __name__ == "__main__":
+    main()
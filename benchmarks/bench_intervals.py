@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+"""
+Overlap benchmark: interval index vs. a linear scan.
+
+Usage: python benchmarks/bench_intervals.py [N]
+"""
+
+import gc
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from termtasks.intervals import IntervalIndex
+from termtasks.models import Task, TaskList
+
+
+def timed(name, func, repeat=1):
+    """Run ``func`` repeat times and print the mean time per run."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    print(f"{name:28s} {(time.perf_counter() - start) / repeat * 1e3:10.3f} ms")
+
+
+def main():
+    """Index N tasks, then time conflict checks, edits and a month of conflict days."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    rng = random.Random(1)
+    start = datetime(2020, 1, 1, 9, 0)
+    task_list = TaskList(
+        Task(f"Task {i}", start + timedelta(minutes=37 * i),
+             start + timedelta(minutes=37 * i + rng.choice((15, 30, 60, 90))))
+        for i in range(count)
+    )
+    middle = task_list.tasks[count // 2]
+    probe = Task("Probe", middle.start_time, middle.start_time + timedelta(hours=2))
+
+    def scan():
+        return [task for task in task_list.tasks
+                if task.end_time > probe.start_time and task.start_time < probe.end_time]
+
+    def edit():
+        task = task_list.tasks[rng.randrange(count)]
+        task_list.update_task(task, end_time=task.end_time + timedelta(minutes=1))
+
+    def build_without_gc():
+        # How much of the build time goes to the cyclic collector, which
+        # runs repeatedly while the nodes are created
+        gc.disable()
+        try:
+            IntervalIndex(task_list.tasks)
+        finally:
+            gc.enable()
+
+    print(f"{count} tasks")
+    timed("build index", lambda: task_list.interval_index)
+    timed("build index, gc disabled", build_without_gc)
+    timed("linear scan", scan, 5)
+    timed("conflicts", lambda: task_list.conflicts(probe), 1000)
+    timed("edit", edit, 1000)
+    timed("conflict days, one month", lambda: task_list.conflict_days(middle.start_time.date(), 31), 100)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+"""
+Load-time benchmark: tasks.json vs. the binary snapshot format.
+
+Usage: python benchmarks/bench_load.py [N]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from termtasks.models import Task, TaskList
+from termtasks.utils.snapshot import read_snapshot, read_snapshot_store, write_snapshot
+from termtasks.utils.storage import TaskStorage
+
+TITLES = ["Standup", "Code review", "Lunch", "Planning", "1:1", "Write report"]
+
+
+def timed(name, func):
+    """Run ``func`` once and print how long it took."""
+    start = time.perf_counter()
+    func()
+    print(f"{name:28s} {time.perf_counter() - start:8.3f} s")
+
+
+def main():
+    """Write N tasks in both formats and time loading them."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    start = datetime(2020, 1, 1, 9, 0)
+    task_list = TaskList(
+        Task(TITLES[i % len(TITLES)], start + timedelta(minutes=37 * i), completed=i % 4 == 0)
+        for i in range(count)
+    )
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        json_path = os.path.join(tmpdir, "tasks.json")
+        snapshot_path = os.path.join(tmpdir, "tasks.ttb")
+        TaskStorage(json_path).save_tasks(task_list)
+        write_snapshot(snapshot_path, task_list.tasks)
+
+        print(f"{count} tasks, json {os.path.getsize(json_path) / 2**20:.1f} MiB, "
+              f"snapshot {os.path.getsize(snapshot_path) / 2**20:.1f} MiB")
+        timed("json -> TaskList", lambda: TaskStorage(json_path).load_tasks())
+        timed("snapshot -> TaskList", lambda: read_snapshot(snapshot_path))
+        timed("snapshot -> TaskList (4 proc)", lambda: read_snapshot(snapshot_path, workers=4))
+        timed("snapshot -> TaskStore", lambda: read_snapshot_store(snapshot_path))
+
+
+if __name__ == "__main__":
+    main()
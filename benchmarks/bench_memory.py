@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+"""
+Memory benchmark: TaskList of Task objects vs. the columnar TaskStore.
+
+Usage: python benchmarks/bench_memory.py [N]
+"""
+
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+from termtasks.models import Task, TaskList
+from termtasks.store import CompactTask, TaskStore
+
+TITLES = ["Standup", "Code review", "Lunch", "Planning", "1:1", "Write report"]
+
+
+def make_tasks(cls, count):
+    """Create ``count`` tasks spread over several years."""
+    start = datetime(2020, 1, 1, 9, 0)
+    return [
+        cls(TITLES[i % len(TITLES)], start + timedelta(minutes=37 * i),
+            start + timedelta(minutes=37 * i + 30) if i % 3 else None, i % 4 == 0)
+        for i in range(count)
+    ]
+
+
+def measure(build):
+    """Return the bytes still allocated by the object ``build`` returns."""
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def main():
+    """Run the benchmark and print bytes per task."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    cases = [
+        ("TaskList[Task]", lambda: TaskList(make_tasks(Task, count))),
+        ("list[CompactTask]", lambda: make_tasks(CompactTask, count)),
+        ("TaskStore", lambda: TaskStore(make_tasks(CompactTask, count))),
+    ]
+    print(f"{count} tasks")
+    for name, build in cases:
+        used = measure(build)
+        print(f"{name:20s} {used / 2**20:8.1f} MiB {used / count:8.1f} bytes/task")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+"""
+Rendering benchmark: per-frame cost of the windows on the headless screen.
+
+Usage: python benchmarks/bench_render.py [N ...]
+"""
+
+import sys
+import time
+from datetime import datetime, timedelta
+
+from termtasks.models import Task, TaskList
+from termtasks.ui.backend import HeadlessBackend, set_backend
+from termtasks.ui.calendar import CalendarWindow
+from termtasks.ui.task_entry import TaskEntryWindow
+from termtasks.ui.task_list import TaskListWindow
+
+TITLES = ["Standup", "Code review", "Lunch", "Planning", "1:1", "Write report"]
+FRAMES = 200
+
+
+def frame_time(name, backend, draw):
+    """Draw FRAMES frames and print the mean time per frame."""
+    calls = sum(backend.calls.values())
+    start = time.perf_counter()
+    for i in range(FRAMES):
+        draw(i)
+        backend.doupdate()
+    elapsed = (time.perf_counter() - start) / FRAMES
+    calls = (sum(backend.calls.values()) - calls) / FRAMES
+    print(f"  {name:24s} {elapsed * 1e3:8.3f} ms/frame {calls:8.1f} calls/frame")
+
+
+def bench(count):
+    """Time frames of the three windows over a list of count tasks."""
+    start = datetime(2020, 1, 1, 9, 0)
+    task_list = TaskList(
+        Task(TITLES[i % len(TITLES)], start + timedelta(minutes=37 * i), completed=i % 4 == 0)
+        for i in range(count)
+    )
+    middle = task_list.tasks[count // 2].start_time
+
+    backend = HeadlessBackend(50, 160)
+    set_backend(backend)
+    task_list_win = TaskListWindow(40, 80, 0, 0)
+    entry_win = TaskEntryWindow(10, 80, 40, 0)
+    calendar_win = CalendarWindow(50, 80, 0, 80)
+    windows = (task_list_win, entry_win, calendar_win)
+
+    def draw(selected, date=middle, full=False):
+        if full:
+            for window in windows:
+                window.invalidate()
+        task_list_win.update(task_list, selected, True)
+        calendar_win.update(date, task_list)
+        entry_win.update()
+        for window in windows:
+            window.noutrefresh()
+
+    print(f"{count} tasks")
+    frame_time("full redraw", backend, lambda i: draw(count // 2, full=True))
+    frame_time("move selection", backend, lambda i: draw(count // 2 + i % 2))
+    frame_time("scroll", backend, lambda i: draw((count // 2 + 40 * i) % count))
+    frame_time("toggle completed", backend, lambda i: (
+        task_list.set_completed(task_list.tasks[count // 2], bool(i % 2)),
+        draw(count // 2)))
+    frame_time("page months", backend, lambda i: draw(
+        count // 2, middle + timedelta(days=31 * (i % 12))))
+    calendar_win.toggle_view()
+    frame_time("year view, toggle", backend, lambda i: (
+        task_list.set_completed(task_list.tasks[count // 2], bool(i % 2)),
+        draw(count // 2)))
+
+
+def main():
+    """Run the benchmark for each list size."""
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 100000, 1000000]
+    for count in counts:
+        bench(count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+"""
+Search benchmark: title index vs. a substring scan, per keystroke.
+
+Usage: python benchmarks/bench_search.py [N]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from termtasks.models import Task, TaskList
+from termtasks.utils.storage import TaskStorage
+
+TITLES = ["Standup", "Code review", "Lunch", "Planning", "1:1", "Write report"]
+QUERY = "review"
+
+
+def timed(name, func, repeat=1):
+    """Run ``func`` repeat times and print the mean time per run."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    print(f"{name:28s} {(time.perf_counter() - start) / repeat * 1e3:10.3f} ms")
+
+
+def main():
+    """Index N tasks, then time search-as-you-type and the on-disk cache."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    start = datetime(2020, 1, 1, 9, 0)
+    task_list = TaskList(
+        Task(f"{TITLES[i % len(TITLES)]} {i % 5000}", start + timedelta(minutes=37 * i))
+        for i in range(count)
+    )
+
+    def scan(query):
+        query = query.lower()
+        return [task for task in task_list.tasks if query in task.title.lower()][:50]
+
+    def typed(search):
+        for end in range(1, len(QUERY) + 1):
+            search(QUERY[:end])
+
+    print(f"{count} tasks, typing {QUERY!r}")
+    timed("build index", lambda: task_list.search_index)
+    timed("substring scan", lambda: typed(scan), 5)
+    timed("index, first 50", lambda: typed(lambda q: task_list.search(q, limit=50)), 5)
+    timed("index, count", lambda: typed(task_list.search_index.count), 5)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        storage = TaskStorage(os.path.join(tmpdir, "tasks.json"))
+        storage.save_tasks(task_list)
+        loaded = storage.load_tasks()
+        timed("save cache", lambda: storage.save_search_index(storage.load_search_index(loaded)))
+        timed("load cache", lambda: storage.load_search_index(TaskList()))
+
+
+if __name__ == "__main__":
+    main()
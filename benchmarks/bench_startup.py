@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+"""
+Startup benchmark: `termtasks today` on N tasks, per storage backend.
+
+Each command runs in a fresh interpreter, as it would from a shell prompt
+or status bar. Bytecode is compiled first so that the timings match an
+installed package.
+
+Usage: python benchmarks/bench_startup.py [N]
+"""
+
+import compileall
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import termtasks
+from termtasks.models import Task, TaskList
+from termtasks.recurrence import WEEKLY, Recurrence
+from termtasks.utils.storage import open_storage
+
+TITLES = ["Standup", "Code review", "Lunch", "Planning", "1:1", "Write report"]
+RUNS = 15
+
+
+def make_tasks(count):
+    """Create count tasks over the ten years around today, and a few series."""
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    start = now - timedelta(days=3652 // 2)
+    step = timedelta(days=3652) / count
+    tasks = [Task(f"{TITLES[i % len(TITLES)]} {i}", start + step * i, id=f"task-{i}")
+             for i in range(count)]
+    tasks.extend(Task(f"Series {day}", now - timedelta(days=365), id=f"series-{day}",
+                      recurrence=Recurrence(WEEKLY, by_weekday=(day,)))
+                 for day in range(7))
+    return tasks
+
+
+def timed(argv, env):
+    """Run a command RUNS times and return the median wall time in ms."""
+    times = []
+    for _ in range(RUNS):
+        began = time.perf_counter()
+        subprocess.run(argv, env=env, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - began)
+    return statistics.median(times) * 1e3
+
+
+def main():
+    """Write N tasks to each backend and time a few commands on them."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(termtasks.__file__)))
+    compileall.compile_dir(os.path.join(package_dir, "termtasks"), quiet=1)
+    env = dict(os.environ, PYTHONPATH=package_dir)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+
+    python = [sys.executable]
+    print(f"{'python -c pass':32s} {timed(python + ['-c', 'pass'], env):8.1f} ms")
+    print(f"{'import termtasks.cli':32s} "
+          f"{timed(python + ['-c', 'import termtasks.cli'], env):8.1f} ms")
+    print(f"{'import termtasks.app (UI)':32s} "
+          f"{timed(python + ['-c', 'import termtasks.app'], env):8.1f} ms")
+
+    task_list = TaskList(make_tasks(count))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for backend, name in (("json", "tasks.json"), ("sqlite", "tasks.db"),
+                              ("lazy", "tasks.jsonl"), ("binary", "tasks.ttb")):
+            path = os.path.join(tmpdir, name)
+            storage = open_storage(path, backend)
+            storage.save_tasks(task_list)
+            storage.close()
+            backend_env = dict(env, TERMTASKS_FILE=path, TERMTASKS_BACKEND=backend)
+            for command in (["today"], ["range", f"{datetime.now():%Y-%m-01}", f"{datetime.now():%Y-%m-28}"]):
+                label = f"{backend} {' '.join(command[:1])} ({count:,})"
+                print(f"{label:32s} {timed(python + ['-m', 'termtasks'] + command, backend_env):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
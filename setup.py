@@ -7,6 +7,10 @@ setup(
     install_requires=[
         "windows-curses;platform_system=='Windows'",
     ],
+    extras_require={
+        # Vectorized per-day counting for TaskStore
+        "fast": ["numpy"],
+    },
     entry_points={
         "console_scripts": [
             "termtasks=termtasks.__main__:main",
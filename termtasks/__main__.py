@@ -4,12 +4,9 @@
 Main entry point for the TermTasks application.
 """
 
-from termtasks.app import TaskSchedulerApp
+import sys
 
-def main():
-    """Run the TermTasks application."""
-    app = TaskSchedulerApp()
-    app.run()
+from termtasks.cli import main
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
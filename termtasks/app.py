@@ -4,115 +4,542 @@ Main application controller for TermTasks.
 
 import curses
 import locale
+import os
+import signal
 import sys
-from datetime import datetime
+import time
+from datetime import datetime, time as day_time, timedelta
 
 from termtasks.models import Task, TaskList
+from termtasks.ui.backend import get_backend, set_backend
 from termtasks.ui.window import Window
 from termtasks.ui.task_list import TaskListWindow
-from termtasks.ui.calendar import CalendarWindow
+from termtasks.ui.calendar import YEAR_VIEW, CalendarWindow
+from termtasks.ui.event_loop import EventLoop
+from termtasks.ui.perf_overlay import PerfOverlay
 from termtasks.ui.task_entry import TaskEntryWindow
-from termtasks.utils.storage import TaskStorage
+from termtasks.utils.date_utils import from_epoch_us, shift_month, to_epoch_us
+from termtasks.utils.perf import Profiler
+from termtasks.utils.prefetch import MonthPrefetcher
+from termtasks.utils.saver import BackgroundSaver
+from termtasks.utils.storage import open_storage
+
+# Keys that open a prompt reading further input
+PROMPT_KEYS = (ord('a'), ord('f'), ord('g'))
+
+# Where the free-slot finder looks: working hours on weekdays, starting
+# at the next quarter of an hour
+WORK_START = day_time(9, 0)
+WORK_END = day_time(17, 0)
+WORK_DAYS = range(5)
+SLOT_STEP = timedelta(minutes=15)
+
+# Keys ending a search query
+ENTER_KEYS = (10, 13, curses.KEY_ENTER)
+BACKSPACE_KEYS = (8, 127, curses.KEY_BACKSPACE)
+ESCAPE = 27
+
+# Color pairs: (number, foreground, background)
+COLOR_PAIRS = (
+    (1, curses.COLOR_WHITE, curses.COLOR_BLUE),  # Header
+    (2, curses.COLOR_BLACK, curses.COLOR_WHITE),  # Selected
+    (3, curses.COLOR_GREEN, -1),  # Completed tasks
+    (4, curses.COLOR_YELLOW, -1),  # Today
+    (5, curses.COLOR_CYAN, -1),  # Highlight
+)
+
 
 class TaskSchedulerApp:
     """Main application controller for the task scheduler."""
 
-    def __init__(self):
-        """Initialize the application."""
-        self.task_storage = TaskStorage()
-        self.task_list = self.task_storage.load_tasks()
+    def __init__(self, margin_months: int = None, poll_interval: float = 1.0,
+                 max_fps: float = None, backend=None):
+        """Initialize the application.
+
+        Args:
+            margin_months: Months loaded on either side of the displayed one
+                when the storage backend loads lazily. Defaults to the
+                ``TERMTASKS_MARGIN_MONTHS`` environment variable, or 1.
+            poll_interval: Seconds between checks for changes made to the
+                storage by other processes
+            max_fps: Maximum screen updates per second. Defaults to the
+                ``TERMTASKS_MAX_FPS`` environment variable, or 30.
+            backend: Screen backend to run on, such as a
+                ``HeadlessBackend``. Defaults to the active one, normally
+                the terminal.
+
+        Timings of each frame are appended as JSON lines to the file named
+        by the ``TERMTASKS_PERF_LOG`` environment variable, if set.
+        """
+        if margin_months is None:
+            margin_months = int(os.environ.get("TERMTASKS_MARGIN_MONTHS", "1"))
+        if max_fps is None:
+            max_fps = float(os.environ.get("TERMTASKS_MAX_FPS", "30"))
+        self.max_fps = max_fps
+        self.backend = backend or get_backend()
+        self.perf = Profiler(os.environ.get("TERMTASKS_PERF_LOG") or None)
+        self.show_perf = False
+        self.margin_months = margin_months
+        self.poll_interval = poll_interval
+        self.task_storage = open_storage()
         self.current_date = datetime.now()
+        with self.perf.timer("load"):
+            if self.task_storage.lazy:
+                self.task_list = self.task_storage.load_tasks_around(self.current_date,
+                                                                     margin_months)
+            else:
+                self.task_list = self.task_storage.load_tasks()
+        self.saver = BackgroundSaver(self.task_storage, self.task_list, profiler=self.perf)
+        self.prefetcher = None
+        if self.task_storage.lazy:
+            self.prefetcher = MonthPrefetcher(self.task_storage, self.saver.storage_lock, self.perf)
         self.selected_task_index = 0
         self.active_panel = 0  # 0: task list, 1: calendar
+        self._status = ""
+        # Title search: the query (None when not searching), whether it is
+        # being typed, and the index, loaded on first use
+        self.search_query = None
+        self.searching = False
+        self.search_matches = 0
+        self.search_index = None
+
+    def _selected_task(self):
+        """Get the selected task, if any."""
+        if 0 <= self.selected_task_index < len(self.task_list.tasks):
+            return self.task_list.tasks[self.selected_task_index]
+        return None
+
+    def _reselect(self, selected):
+        """Move the selection to where a task ended up, or keep it in bounds."""
+        if selected is not None and self.task_list.get_task(selected.id) is selected:
+            self.selected_task_index = self.task_list.index_of(selected)
+        else:
+            self.selected_task_index = max(0, min(self.selected_task_index,
+                                                  len(self.task_list.tasks) - 1))
+
+    def _load_current_month(self):
+        """Page in the displayed month, keeping the selection.
+
+        The margin around it is prefetched in the background.
+        """
+        if self.prefetcher is None:
+            return
+        selected = self._selected_task()
+        with self.saver.storage_lock, self.saver.lock, self.perf.timer("load"):
+            loaded = self.task_storage.load_month(self.task_list, self.current_date, 0)
+        if loaded:
+            self._reselect(selected)
+        self.prefetcher.request(shift_month(self.current_date, -self.margin_months),
+                                shift_month(self.current_date, self.margin_months + 1))
+
+    def _load_current_year(self):
+        """Prefetch the whole displayed year for the year view."""
+        if self.prefetcher is None:
+            return
+        year = self.current_date.year
+        self.prefetcher.request(datetime(year, 1, 1), datetime(year + 1, 1, 1))
+
+    def _apply_prefetched(self):
+        """Add prefetched months to the task list, keeping the selection.
+
+        Returns:
+            Whether any tasks were added
+        """
+        if self.prefetcher is None:
+            return False
+        selected = self._selected_task()
+        with self.saver.storage_lock, self.saver.lock:
+            added = self.prefetcher.apply(self.task_list)
+        if added:
+            self._reselect(selected)
+            return True
+        return False
+
+    def _warm_calendar(self):
+        """Build the calendar models of the months next to the displayed one.
+
+        Runs from a timer between frames, so paging to the next or previous
+        month finds its model ready.
+        """
+        self.calendar_win.warm(self.current_date, self.task_list)
+
+    def _reload_if_changed(self):
+        """Merge in changes made to storage by other processes, keeping the selection.
+
+        Also merges for the background saver when its write conflicted,
+        then lets it retry.
+
+        Returns:
+            Whether anything changed
+        """
+        if not self.saver.conflict and not self.task_storage.has_changed():
+            return False
+        selected = self._selected_task()
+        with self.saver.storage_lock, self.saver.lock, self.perf.timer("reload"):
+            changed = self.task_storage.reload(self.task_list)
+            if self.saver.conflict:
+                self.saver.mark_dirty()
+        if changed:
+            self._reselect(selected)
+        return bool(changed)
+
+    def _toggle_next_occurrence(self, task: Task) -> None:
+        """Toggle the completion of a recurring task's first occurrence from today."""
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        when = self.task_list.next_occurrence(task, today)
+        if when is not None:
+            completed = when in task.recurrence.completed
+            self.task_list.set_occurrence_completed(task, when, not completed)
+
+    def _add_task(self, start=None, end=None):
+        """Prompt for a task and add it.
+
+        Args:
+            start: Default start time, instead of now
+            end: Default end time
+        """
+        new_task = self.task_entry_win.prompt_for_task(self.stdscr, self.task_list, start, end)
+        if new_task:
+            with self.saver.lock:
+                self.task_list.add_task(new_task)
+                self.saver.mark_dirty()
+
+    def _add_task_in_free_slot(self):
+        """Prompt for a length, then for a task in the next free slot that long."""
+        duration = self.task_entry_win.prompt_for_duration(self.stdscr)
+        if duration is None:
+            return
+        now = datetime.now()
+        after = now + (datetime.min - now) % SLOT_STEP
+        # Search a month at a time, paging in each month first when the
+        # storage loads lazily, along with the month before for tasks
+        # running into it
+        month = after.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        for i in range(12):
+            next_month = shift_month(month, 1)
+            if self.prefetcher is not None:
+                selected = self._selected_task()
+                with self.saver.storage_lock, self.saver.lock, self.perf.timer("load"):
+                    loaded = self.task_storage.load_window(
+                        self.task_list, shift_month(month, -1) if i == 0 else month, next_month)
+                if loaded:
+                    self._reselect(selected)
+            start = max(after, month)
+            slots = self.task_list.free_slots(start, duration, day_start=WORK_START,
+                                              day_end=WORK_END, weekdays=WORK_DAYS,
+                                              days=(next_month.date() - start.date()).days)
+            if slots:
+                start = slots[0][0]
+                self._add_task(start, start + duration)
+                return
+            month = next_month
+        self.task_entry_win.show_message(self.stdscr, "No free slot in the next year!")
+
+    def _get_search_index(self):
+        """Get the title index of every stored task, loading it on first use."""
+        if self.search_index is None:
+            with self.saver.storage_lock, self.saver.lock, self.perf.timer("search_index"):
+                self.search_index = self.task_storage.load_search_index(self.task_list)
+        return self.search_index
+
+    def _select_match(self, after=None, reverse=False):
+        """Select the next (or previous) task matching the search query.
+
+        The search wraps around. Matches in months that are not loaded yet
+        are loaded first; cached matches that turn out to be gone are
+        dropped from the index.
+
+        Args:
+            after: (start, ID) entry to search from, exclusive
+            reverse: Search backwards
+
+        Returns:
+            Whether a match was selected
+        """
+        index = self._get_search_index()
+        wrapped = False
+        while True:
+            entry = index.next_match(self.search_query, after, reverse=reverse)
+            if entry is None:
+                if wrapped or after is None:
+                    return False
+                after, wrapped = None, True
+                continue
+            start, task_id = entry
+            self._go_to_date(from_epoch_us(start))
+            task = self.task_list.get_task(task_id)
+            if task is not None:
+                self.selected_task_index = self.task_list.index_of(task)
+                return True
+            index.remove(task_id)
+
+    def _update_search(self):
+        """Count the matches of a changed query and select the first from the selection on."""
+        index = self._get_search_index()
+        with self.perf.timer("search"):
+            self.search_matches = index.count(self.search_query)
+            selected = self._selected_task()
+            after = (to_epoch_us(selected.start_time), "") if selected is not None else None
+            self._select_match(after)
+
+    def _step_search(self, reverse):
+        """Select the match after (or before) the selected task."""
+        selected = self._selected_task()
+        after = (to_epoch_us(selected.start_time), selected.id) if selected is not None else None
+        with self.perf.timer("search"):
+            self._select_match(after, reverse)
+
+    def _handle_search_key(self, key):
+        """Edit the search query being typed.
+
+        Returns:
+            Whether the query changed
+        """
+        if key == ESCAPE:
+            self.search_query = None
+            self.searching = False
+        elif key in ENTER_KEYS:
+            self.searching = False
+            if not self.search_query:
+                self.search_query = None
+        elif key in BACKSPACE_KEYS:
+            if self.search_query:
+                self.search_query = self.search_query[:-1]
+                return True
+        elif 32 <= key < 127:
+            self.search_query += chr(key)
+            return True
+        return False
+
+    def _page(self, key, page_size):
+        """Move the selection by a page, or to the first or last task."""
+        last = len(self.task_list.tasks) - 1
+        if key == curses.KEY_NPAGE:
+            self.selected_task_index = min(last, self.selected_task_index + page_size)
+        elif key == curses.KEY_PPAGE:
+            self.selected_task_index = max(0, self.selected_task_index - page_size)
+        elif key == curses.KEY_HOME:
+            self.selected_task_index = 0
+        else:
+            self.selected_task_index = last
+
+    def _go_to_date(self, date):
+        """Show the month of a date and select its first task (or the next one)."""
+        self.current_date = date
+        self._load_current_month()
+        index = self.task_list.index_at(date)
+        self.selected_task_index = min(index, max(0, len(self.task_list.tasks) - 1))
+
+    def flush(self):
+        """Write any pending changes to storage synchronously."""
+        self.saver.flush()
+
+    def _exit_on_signal(self, signum, frame):
+        """Turn termination signals into a normal exit so changes are flushed."""
+        raise SystemExit(128 + signum)
 
     def run(self):
         """Run the application main loop."""
         # Set up locale for proper display of dates and times
         locale.setlocale(locale.LC_ALL, '')
 
-        # Initialize curses
-        curses.wrapper(self._main_loop)
+        # Flush pending saves when terminated or when the terminal goes away
+        for signum in (signal.SIGTERM, getattr(signal, "SIGHUP", None)):
+            if signum is not None:
+                signal.signal(signum, self._exit_on_signal)
+
+        # Initialize the screen; the windows draw through the same backend
+        previous = set_backend(self.backend)
+        try:
+            self.backend.run(self._main_loop)
+        finally:
+            set_backend(previous)
+            try:
+                if self.prefetcher is not None:
+                    self.prefetcher.close()
+                self.saver.close()
+                if self.search_index is not None:
+                    self.task_storage.save_search_index(self.search_index)
+            finally:
+                self.task_storage.close()
+                self.perf.close()
 
     def _main_loop(self, stdscr):
         """Main application loop with curses screen."""
-        # Hide cursor
-        curses.curs_set(0)
-        curses.start_color()
-        curses.use_default_colors()
-        
-        # Initialize color pairs
-        curses.init_pair(1, curses.COLOR_WHITE, curses.COLOR_BLUE)  # Header
-        curses.init_pair(2, curses.COLOR_BLACK, curses.COLOR_WHITE)  # Selected
-        curses.init_pair(3, curses.COLOR_GREEN, -1)  # Completed tasks
-        curses.init_pair(4, curses.COLOR_YELLOW, -1)  # Today
-        curses.init_pair(5, curses.COLOR_CYAN, -1)  # Highlight
-        
+        # Hide cursor and initialize color pairs
+        self.backend.init_colors(COLOR_PAIRS)
+
         # Get screen dimensions
         height, width = stdscr.getmaxyx()
         half_width = width // 2
 
         # Create windows
-        task_list_win = TaskListWindow(height - 10, half_width, 0, 0)
-        task_entry_win = TaskEntryWindow(10, half_width, height - 10, 0)
-        calendar_win = CalendarWindow(height, width - half_width, 0, half_width)
-        
-        # Main loop
-        while True:
-            # Clear screen
-            stdscr.clear()
-            
-            # Update task list and calendar windows
-            task_list_win.update(self.task_list, self.selected_task_index, self.active_panel == 0)
-            calendar_win.update(self.current_date, self.task_list, self.active_panel == 1)
-            task_entry_win.update()
-            
-            # Refresh all windows
-            stdscr.refresh()
-            task_list_win.refresh()
-            calendar_win.refresh()
-            task_entry_win.refresh()
-            
-            # Get key press
-            key = stdscr.getch()
-            
-            # Handle key press
-            if key == ord('q'):  # Quit
-                break
-            elif key == ord('a'):  # Add task
-                new_task = task_entry_win.prompt_for_task(stdscr)
-                if new_task:
-                    self.task_list.add_task(new_task)
-                    self.task_storage.save_tasks(self.task_list)
-            elif key == ord('c'):  # Complete task
-                if self.task_list.tasks and 0 <= self.selected_task_index < len(self.task_list.tasks):
-                    task = self.task_list.tasks[self.selected_task_index]
-                    task.completed = not task.completed
-                    self.task_storage.save_tasks(self.task_list)
-            elif key == ord('j'):  # Down
-                if self.active_panel == 0 and self.task_list.tasks:
-                    self.selected_task_index = (self.selected_task_index + 1) % len(self.task_list.tasks)
-            elif key == ord('k'):  # Up
-                if self.active_panel == 0 and self.task_list.tasks:
-                    self.selected_task_index = (self.selected_task_index - 1) % len(self.task_list.tasks)
-            elif key == ord('n'):  # Next month
-                if self.active_panel == 1:
-                    month = self.current_date.month
-                    year = self.current_date.year
-                    if month == 12:
-                        month = 1
-                        year += 1
-                    else:
-                        month += 1
-                    self.current_date = self.current_date.replace(year=year, month=month, day=1)
-            elif key == ord('p'):  # Previous month
-                if self.active_panel == 1:
-                    month = self.current_date.month
-                    year = self.current_date.year
-                    if month == 1:
-                        month = 12
-                        year -= 1
+        self.stdscr = stdscr
+        self.task_list_win = TaskListWindow(height - 10, half_width, 0, 0)
+        self.task_entry_win = TaskEntryWindow(10, half_width, height - 10, 0)
+        self.calendar_win = CalendarWindow(height, width - half_width, 0, half_width)
+        # Over the top right corner of the calendar; None on a tiny screen
+        self.perf_win = PerfOverlay.fit(height, width)
+
+        # Paint the blank screen once; afterwards stdscr is never touched, so
+        # getch doesn't repaint it over the windows
+        stdscr.noutrefresh()
+
+        loop = self.event_loop = EventLoop(stdscr, self.max_fps, self.backend.clock)
+        # Background work: refresh the save status, pick up prefetched months,
+        # prepare the neighbouring months' calendars and poll for external changes
+        loop.call_every(0.2, self._check_status)
+        loop.call_every(0.1, self._apply_prefetched)
+        loop.call_every(0.1, self._warm_calendar)
+        loop.call_every(self.poll_interval, self._reload_if_changed)
+        loop.run(self._handle_keys, self._render)
+
+    def _render(self):
+        """Draw a frame."""
+        perf = self.perf
+        start = time.perf_counter()
+
+        # Update task list and calendar windows; each one redraws only
+        # what changed since the last frame
+        with perf.timer("task_list"):
+            self.task_list_win.update(self.task_list, self.selected_task_index,
+                                      self.active_panel == 0, self.search_query,
+                                      self.search_matches)
+        with perf.timer("calendar"):
+            self.calendar_win.update(self.current_date, self.task_list, self.active_panel == 1)
+        with perf.timer("task_entry"):
+            self.task_entry_win.update(self.saver.status)
+        show_perf = self.show_perf and self.perf_win is not None
+        if show_perf:
+            self.perf_win.update(perf, len(self.task_list.tasks))
+
+        # Output the frame in one go
+        with perf.timer("output"):
+            self.task_list_win.noutrefresh()
+            self.calendar_win.noutrefresh()
+            self.task_entry_win.noutrefresh()
+            if show_perf:
+                # Stay on top of whatever the calendar redrew
+                self.perf_win.win.touchwin()
+                self.perf_win.noutrefresh()
+            self.backend.doupdate()
+        perf.end_frame(time.perf_counter() - start, tasks=len(self.task_list.tasks))
+
+    def _check_status(self):
+        """Ask for a frame when the save status changed."""
+        status = self.saver.status
+        if status != self._status:
+            self._status = status
+            return True
+        return False
+
+    def _handle_keys(self, keys):
+        """Apply a batch of key presses.
+
+        Keys typed after one that opens a prompt are pushed back, so the
+        prompt reads them as its input. While a search query is typed, the
+        matches are looked up once for the whole batch.
+        """
+        self.perf.count("keys", len(keys))
+        query_changed = False
+        for i, key in enumerate(keys):
+            if self.searching:
+                query_changed |= self._handle_search_key(key)
+                continue
+            if key in PROMPT_KEYS:
+                for later in reversed(keys[i + 1:]):
+                    self.backend.ungetch(later)
+                self._handle_key(key)
+                return
+            # Prompts aren't timed, as they wait for the user
+            with self.perf.timer("keys"):
+                self._handle_key(key)
+        if query_changed and self.search_query is not None:
+            self._update_search()
+
+    def _handle_key(self, key):
+        """Apply a single key press."""
+        stdscr = self.stdscr
+        task_list_win = self.task_list_win
+        task_entry_win = self.task_entry_win
+        calendar_win = self.calendar_win
+
+        # Handle key press
+        if key == ord('q'):  # Quit
+            self.event_loop.stop()
+        elif key == ord('a'):  # Add task
+            self._add_task()
+        elif key == ord('f'):  # Add task in the next free slot
+            self._add_task_in_free_slot()
+        elif key == ord('c'):  # Complete task
+            if self.task_list.tasks and 0 <= self.selected_task_index < len(self.task_list.tasks):
+                task = self.task_list.tasks[self.selected_task_index]
+                with self.saver.lock:
+                    if task.recurrence is not None:
+                        self._toggle_next_occurrence(task)
                     else:
-                        month -= 1
-                    self.current_date = self.current_date.replace(year=year, month=month, day=1)
-            elif key == 9:  # Tab key - switch panels
-                self.active_panel = (self.active_panel + 1) % 2
+                        self.task_list.set_completed(task, not task.completed)
+                    self.saver.mark_dirty()
+        elif key == ord('j'):  # Down
+            if self.active_panel == 0 and self.task_list.tasks:
+                self.selected_task_index = (self.selected_task_index + 1) % len(self.task_list.tasks)
+        elif key == ord('k'):  # Up
+            if self.active_panel == 0 and self.task_list.tasks:
+                self.selected_task_index = (self.selected_task_index - 1) % len(self.task_list.tasks)
+        elif key in (curses.KEY_NPAGE, curses.KEY_PPAGE, curses.KEY_HOME, curses.KEY_END):
+            if self.active_panel == 0 and self.task_list.tasks:
+                self._page(key, task_list_win.page_size)
+        elif key == ord('g'):  # Go to date
+            date = task_entry_win.prompt_for_date(stdscr)
+            if date:
+                self._go_to_date(date)
+        elif key == ord('/'):  # Search task titles
+            self.search_query = ""
+            self.search_matches = 0
+            self.searching = True
+            self.active_panel = 0
+        elif key == ESCAPE:  # Clear the search
+            self.search_query = None
+        elif key in (ord('n'), ord('N')) and self.active_panel == 0 \
+                and self.search_query:  # Next/previous match
+            self._step_search(reverse=key == ord('N'))
+        elif key in (ord('n'), ord('p')) and self.active_panel == 1 \
+                and calendar_win.view == YEAR_VIEW:  # Next/previous year
+            self.current_date = shift_month(self.current_date, 12 if key == ord('n') else -12)
+            self._load_current_year()
+        elif key == ord('v'):  # Switch between month and year views
+            calendar_win.toggle_view()
+            if calendar_win.view == YEAR_VIEW:
+                self._load_current_year()
+        elif key == ord('n'):  # Next month
+            if self.active_panel == 1:
+                month = self.current_date.month
+                year = self.current_date.year
+                if month == 12:
+                    month = 1
+                    year += 1
+                else:
+                    month += 1
+                self.current_date = self.current_date.replace(year=year, month=month, day=1)
+                self._load_current_month()
+        elif key == ord('p'):  # Previous month
+            if self.active_panel == 1:
+                month = self.current_date.month
+                year = self.current_date.year
+                if month == 1:
+                    month = 12
+                    year -= 1
+                else:
+                    month -= 1
+                self.current_date = self.current_date.replace(year=year, month=month, day=1)
+                self._load_current_month()
+        elif key == 9:  # Tab key - switch panels
+            self.active_panel = (self.active_panel + 1) % 2
+        elif key == ord('P'):  # Toggle the performance overlay
+            self.show_perf = not self.show_perf
+            if self.show_perf and self.perf_win is not None:
+                self.perf_win.invalidate()
+            else:
+                # Uncover the windows below
+                calendar_win.invalidate()
+                task_list_win.invalidate()
@@ -0,0 +1,369 @@
+"""
+Command-line interface for TermTasks.
+
+Without a command, the interactive application starts. Commands work on
+the same storage as the application, chosen by the ``TERMTASKS_FILE``
+and ``TERMTASKS_BACKEND`` environment variables.
+
+Commands are meant to be called from scripts, shell prompts and status
+bars, so this module only imports the models and storage. The UI, and
+the importer and exporter, are imported when a command needs them.
+"""
+
+import argparse
+import heapq
+import os
+import sys
+from datetime import datetime, time as day_time, timedelta
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from termtasks.models import Task, TaskList
+from termtasks.recurrence import Recurrence
+from termtasks.utils.storage import TaskStorage, open_storage
+
+# The importer's and exporter's formats, so building the parser imports neither
+IMPORT_FORMATS = ("ics", "csv")
+EXPORT_FORMATS = ("ics", "csv", "jsonl")
+
+
+def _date(text: str) -> datetime:
+    """Parse a YYYY-MM-DD argument."""
+    try:
+        return datetime.strptime(text, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date {text!r}, expected YYYY-MM-DD") from None
+
+
+def _time(text: str) -> day_time:
+    """Parse an HH:MM argument."""
+    try:
+        return datetime.strptime(text, "%H:%M").time()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid time {text!r}, expected HH:MM") from None
+
+
+def _start_of_today() -> datetime:
+    """Get midnight today."""
+    return datetime.combine(datetime.now().date(), day_time.min)
+
+
+def format_task(task: Task) -> str:
+    """Format a task as one line of plain text.
+
+    Args:
+        task: A task or an occurrence
+
+    Returns:
+        The line, such as "[ ] 2025-04-22 12:00-13:00 Lunch (ID)"
+    """
+    if task.recurrence is not None:
+        mark = "R"
+    else:
+        mark = "x" if task.completed else " "
+    when = task.start_str
+    if task.end_time:
+        when += "-" + task.end_str
+    line = f"[{mark}] {when} {task.title} ({task.id})"
+    if task.recurrence is not None:
+        line += f" {task.recurrence.summary}"
+    return line
+
+
+def _print_tasks(tasks: Iterable[Task], completed: Optional[bool]) -> None:
+    """Print tasks one per line, optionally only those in a completion state."""
+    for task in tasks:
+        if completed is None or task.completed == completed:
+            print(format_task(task))
+
+
+def _agenda(task_list: TaskList, start: datetime, end: datetime) -> Iterator[Task]:
+    """Iterate over the tasks and occurrences starting in [start, end), in order."""
+    tasks = (task for task in task_list.get_tasks_between(start, end) if task.recurrence is None)
+    return heapq.merge(tasks, task_list.occurrences_between(start, end),
+                       key=lambda task: task.start_time)
+
+
+def _load_range(storage: TaskStorage, start: Optional[datetime],
+                end: Optional[datetime]) -> TaskList:
+    """Load the tasks starting in [start, end) and every recurring task.
+
+    Only backends with range reads read less than everything.
+    """
+    if not storage.range_reads or (start is None and end is None):
+        return storage.load_tasks()
+    tasks = {task.id: task for task in storage.load_recurring()}
+    for task in storage.load_tasks_between(start or datetime.min, end or datetime.max):
+        tasks[task.id] = task
+    return TaskList(tasks.values())
+
+
+def _list(args: argparse.Namespace) -> int:
+    """Print every stored task, with recurring tasks listed once."""
+    storage = open_storage()
+    task_list = storage.load_tasks()
+    storage.close()
+    _print_tasks(task_list.tasks, args.completed)
+    return 0
+
+
+def _today(args: argparse.Namespace) -> int:
+    """Print today's tasks and occurrences."""
+    start = _start_of_today()
+    return _print_range(start, start + timedelta(days=1), args.completed)
+
+
+def _range(args: argparse.Namespace) -> int:
+    """Print the tasks and occurrences of a range of days."""
+    end = (args.end or args.start) + timedelta(days=1)
+    if end <= args.start:
+        print("termtasks: the range ends before it starts", file=sys.stderr)
+        return 1
+    return _print_range(args.start, end, args.completed)
+
+
+def _print_range(start: datetime, end: datetime, completed: Optional[bool]) -> int:
+    """Print the tasks and occurrences starting in [start, end)."""
+    storage = open_storage()
+    task_list = _load_range(storage, start, end)
+    storage.close()
+    _print_tasks(_agenda(task_list, start, end), completed)
+    return 0
+
+
+def _add(args: argparse.Namespace) -> int:
+    """Add a task, warning about tasks it overlaps."""
+    start = datetime.combine(args.date.date(), args.start or day_time.min)
+    end = datetime.combine(args.date.date(), args.end) if args.end else None
+    if end is not None and end <= start:
+        print("termtasks: the task ends before it starts", file=sys.stderr)
+        return 1
+    recurrence = None
+    if args.repeat:
+        try:
+            recurrence = Recurrence.parse(args.repeat)
+        except ValueError as e:
+            print(f"termtasks: {e}", file=sys.stderr)
+            return 1
+
+    storage = open_storage()
+    # The task's month holds any task it could take the ID of
+    if storage.lazy:
+        task_list = storage.load_tasks_around(start, 0)
+    else:
+        task_list = storage.load_tasks()
+    task = Task(args.title, start, end, recurrence=recurrence)
+    for other in task_list.conflicts(task):
+        print(f"termtasks: overlaps {format_task(other)}", file=sys.stderr)
+    task_list.add_task(task)
+    storage.save_changes(task_list, task_list.take_changes())
+    storage.close()
+    print(task.id)
+    return 0
+
+
+def _find_done_change(task_list: TaskList, task_id: str) -> Tuple[Task, Optional[datetime]]:
+    """Find what ``done`` changes: a task, or a recurring task and an occurrence.
+
+    Returns:
+        (task, start time of the occurrence or None)
+
+    Raises:
+        ValueError: If there is no such task or occurrence
+    """
+    task = task_list.get_task(task_id)
+    if task is not None:
+        if task.recurrence is None:
+            return task, None
+        # A recurring task stands for its first occurrence from today
+        when = task_list.next_occurrence(task, _start_of_today())
+        if when is None:
+            raise ValueError(f"{task.title} does not occur again")
+        return task, when
+
+    # An occurrence, by the ID it is listed with
+    series_id, _, stamp = task_id.rpartition("@")
+    series = task_list.get_task(series_id) if series_id else None
+    if series is None or series.recurrence is None:
+        raise ValueError(f"no task with ID {task_id!r}")
+    try:
+        when = datetime.strptime(stamp, "%Y%m%d%H%M%S")
+    except ValueError:
+        when = None
+    if when is None or task_list.next_occurrence(series, when) != when:
+        raise ValueError(f"{series.title} does not occur at {stamp}")
+    return series, when
+
+
+def _done(args: argparse.Namespace) -> int:
+    """Mark a task, or an occurrence of a recurring task, as completed."""
+    storage = open_storage()
+    try:
+        task_list = storage.load_tasks()
+        try:
+            task, when = _find_done_change(task_list, args.id)
+        except ValueError as e:
+            print(f"termtasks: {e}", file=sys.stderr)
+            return 1
+        if when is None:
+            task_list.set_completed(task, not args.undo)
+        else:
+            task_list.set_occurrence_completed(task, when, not args.undo)
+        storage.save_changes(task_list, task_list.take_changes())
+    finally:
+        storage.close()
+    return 0
+
+
+def _import(args: argparse.Namespace) -> int:
+    """Import an iCalendar or CSV file, saving the storage once."""
+    import time
+
+    from termtasks.importer import ImportStats, import_tasks
+
+    show_progress = sys.stderr.isatty()
+
+    def progress(stats: ImportStats) -> None:
+        if show_progress:
+            print(f"\r{stats.read:,} records, {stats.rate:,.0f}/s", end="",
+                  file=sys.stderr, flush=True)
+
+    def warn(message: str) -> None:
+        print(f"\r{args.file}: {message}", file=sys.stderr)
+
+    storage = open_storage()
+    try:
+        task_list = storage.load_tasks()
+        try:
+            stats = import_tasks(task_list, args.file, args.format, warn, progress)
+        except (OSError, ValueError) as e:
+            print(f"termtasks: {e}", file=sys.stderr)
+            return 1
+        if show_progress:
+            print(file=sys.stderr)
+
+        save_seconds = 0.0
+        if stats.added:
+            began = time.perf_counter()
+            storage.save_tasks(task_list)
+            save_seconds = time.perf_counter() - began
+    finally:
+        storage.close()
+    print(f"Imported {stats.added:,} tasks from {args.file} "
+          f"({stats.duplicates:,} duplicates, {stats.warnings:,} warnings) "
+          f"in {stats.seconds:.2f} s, {stats.rate:,.0f} records/s; saved in {save_seconds:.2f} s")
+    return 0
+
+
+def _export(args: argparse.Namespace) -> int:
+    """Export the tasks in a range to a file or stdout."""
+    from termtasks.exporter import FORMAT_EXTENSIONS, export_tasks, select_tasks
+
+    fmt = args.format
+    if fmt is None and args.output:
+        fmt = FORMAT_EXTENSIONS.get(os.path.splitext(args.output)[1].lower())
+    fmt = fmt or "jsonl"
+    start = args.start
+    end = args.end + timedelta(days=1) if args.end else None
+
+    storage = open_storage()
+    task_list = _load_range(storage, start, end)
+    storage.close()
+    tasks = select_tasks(task_list, start, end, args.completed)
+    if args.output is None:
+        export_tasks(tasks, sys.stdout, fmt)
+        return 0
+    try:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            count = export_tasks(tasks, f, fmt)
+    except OSError as e:
+        print(f"termtasks: {e}", file=sys.stderr)
+        return 1
+    print(f"Exported {count:,} tasks to {args.output}", file=sys.stderr)
+    return 0
+
+
+def _add_completion_filter(parser: argparse.ArgumentParser) -> None:
+    """Add the --completed and --pending options, stored as ``completed``."""
+    state = parser.add_mutually_exclusive_group()
+    state.add_argument("--completed", dest="completed", action="store_const", const=True,
+                       help="only completed tasks")
+    state.add_argument("--pending", dest="completed", action="store_const", const=False,
+                       help="only tasks that are not completed")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Create the parser for the command line."""
+    parser = argparse.ArgumentParser(
+        prog="termtasks", description="A terminal-based task scheduler and calendar.")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    parser_add = commands.add_parser("add", help="add a task and print its ID")
+    parser_add.add_argument("title", help="title of the task")
+    parser_add.add_argument("date", type=_date, help="day of the task, YYYY-MM-DD")
+    parser_add.add_argument("start", type=_time, nargs="?",
+                            help="start time, HH:MM (default: an all-day task)")
+    parser_add.add_argument("end", type=_time, nargs="?", help="end time, HH:MM")
+    parser_add.add_argument("--repeat", metavar="RULE",
+                            help='repeat the task, such as "weekly mon,thu" or "daily 2"')
+    parser_add.set_defaults(handler=_add)
+
+    parser_list = commands.add_parser("list", help="list every task")
+    _add_completion_filter(parser_list)
+    parser_list.set_defaults(handler=_list)
+
+    parser_done = commands.add_parser(
+        "done", help="mark a task as completed; for a recurring task, its next occurrence")
+    parser_done.add_argument("id", help="ID of the task or occurrence, as listed")
+    parser_done.add_argument("--undo", action="store_true", help="mark it as not completed")
+    parser_done.set_defaults(handler=_done)
+
+    parser_today = commands.add_parser("today", help="list today's tasks")
+    _add_completion_filter(parser_today)
+    parser_today.set_defaults(handler=_today)
+
+    parser_range = commands.add_parser("range", help="list the tasks of a range of days")
+    parser_range.add_argument("start", type=_date, metavar="FROM",
+                              help="first day, YYYY-MM-DD")
+    parser_range.add_argument("end", type=_date, metavar="TO", nargs="?",
+                              help="last day, YYYY-MM-DD (default: FROM)")
+    _add_completion_filter(parser_range)
+    parser_range.set_defaults(handler=_range)
+
+    parser_import = commands.add_parser(
+        "import", help="import tasks from an iCalendar or CSV file")
+    parser_import.add_argument("file", help="file to import")
+    parser_import.add_argument("--format", choices=IMPORT_FORMATS,
+                               help="file format (default: from the extension)")
+    parser_import.set_defaults(handler=_import)
+
+    parser_export = commands.add_parser(
+        "export", help="export tasks as iCalendar, CSV or JSON Lines")
+    parser_export.add_argument("-o", "--output", help="file to write (default: stdout)")
+    parser_export.add_argument("--format", choices=EXPORT_FORMATS,
+                               help="file format (default: from the extension, or jsonl)")
+    parser_export.add_argument("--from", dest="start", type=_date, metavar="DATE",
+                               help="first day to export, YYYY-MM-DD")
+    parser_export.add_argument("--to", dest="end", type=_date, metavar="DATE",
+                               help="last day to export, YYYY-MM-DD")
+    _add_completion_filter(parser_export)
+    parser_export.set_defaults(handler=_export)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run a command, or the interactive application if none is given.
+
+    Args:
+        argv: Command-line arguments, without the program name; defaults
+            to ``sys.argv[1:]``
+
+    Returns:
+        Exit status
+    """
+    args = build_parser().parse_args(argv)
+    if args.command is None:
+        # Only the interactive application needs curses
+        from termtasks.app import TaskSchedulerApp
+        TaskSchedulerApp().run()
+        return 0
+    return args.handler(args)
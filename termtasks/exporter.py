@@ -0,0 +1,210 @@
+"""
+Exporting tasks to iCalendar, CSV and JSON Lines.
+
+Exporters write one record at a time from an iterator of tasks, so an
+export never holds a second copy of the tasks, and they stream to any
+text file, including stdout. ``select_tasks`` picks the tasks to export
+by bisecting the TaskList's start-time order, so a short range costs
+the same however much history precedes it.
+"""
+
+import csv
+import heapq
+import json
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, Optional, TextIO
+
+from termtasks.importer import CSV_FIELDS, ICS_COMPLETED, ICS_COMPLETED_OCCURRENCE
+from termtasks.models import Task, TaskList
+
+EXPORT_FORMATS = ("ics", "csv", "jsonl")
+
+# File extensions that select a format when none is given
+FORMAT_EXTENSIONS = {".ics": "ics", ".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+_ICS_WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+
+def select_tasks(task_list: TaskList, start: Optional[datetime] = None,
+                 end: Optional[datetime] = None,
+                 completed: Optional[bool] = None) -> Iterator[Task]:
+    """Iterate over the tasks in a range, in start-time order.
+
+    Recurring tasks are selected if they occur in the range, whenever
+    their first occurrence is.
+
+    Args:
+        task_list: The tasks to select from
+        start: Inclusive lower bound on the start time, or None
+        end: Exclusive upper bound on the start time, or None
+        completed: If given, only select tasks with this completion state
+
+    Returns:
+        Iterator of tasks
+    """
+    def in_range() -> Iterator[Task]:
+        tasks = task_list.tasks
+        # Skip straight to the first task in the range
+        for i in range(0 if start is None else task_list.index_at(start), len(tasks)):
+            task = tasks[i]
+            if end is not None and task.start_time >= end:
+                return
+            if task.recurrence is None:
+                yield task
+
+    def occurs_in_range(task: Task) -> bool:
+        when = task.start_time if start is None else task_list.next_occurrence(task, start)
+        return when is not None and (end is None or when < end)
+
+    series = sorted(filter(occurs_in_range, task_list.recurring_tasks),
+                    key=lambda task: task.start_time)
+    for task in heapq.merge(series, in_range(), key=lambda task: task.start_time):
+        if completed is None or task.completed == completed:
+            yield task
+
+
+def write_jsonl(tasks: Iterable[Task], f: TextIO) -> int:
+    """Write tasks as JSON Lines, one storage record per line.
+
+    Returns:
+        Number of tasks written
+    """
+    count = 0
+    for task in tasks:
+        f.write(json.dumps(task.to_dict()))
+        f.write("\n")
+        count += 1
+    return count
+
+
+def write_csv(tasks: Iterable[Task], f: TextIO) -> int:
+    """Write tasks as CSV with a header of ``CSV_FIELDS``.
+
+    Times are in ISO format and rules are JSON, so the importer reads the
+    file back losslessly. Open the file with ``newline=""``.
+
+    Returns:
+        Number of tasks written
+    """
+    writer = csv.writer(f)
+    writer.writerow(CSV_FIELDS)
+    count = 0
+    for task in tasks:
+        writer.writerow((
+            task.id,
+            task.title,
+            task.start_time.isoformat(),
+            task.end_time.isoformat() if task.end_time else "",
+            "true" if task.completed else "false",
+            json.dumps(task.recurrence.to_dict()) if task.recurrence else "",
+        ))
+        count += 1
+    return count
+
+
+def _ics_escape(text: str) -> str:
+    """Escape text for an iCalendar value."""
+    return (text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\n", "\\n"))
+
+
+def _ics_fold(line: str) -> str:
+    """Fold a content line into 75-octet lines, ending it with CRLF."""
+    if len(line) <= 75 and line.isascii():
+        return line + "\r\n"
+    parts = []
+    current, size = [], 0
+    for ch in line:
+        width = len(ch.encode("utf-8"))
+        # Continuation lines start with a space, which counts
+        if size + width > (75 if not parts else 74):
+            parts.append("".join(current))
+            current, size = [], 0
+        current.append(ch)
+        size += width
+    parts.append("".join(current))
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _ics_time(when: datetime) -> str:
+    """Format a floating (local) DATE-TIME value."""
+    return when.strftime("%Y%m%dT%H%M%S")
+
+
+def _ics_rrule(task: Task) -> str:
+    """Format a task's rule as an RRULE value."""
+    rule = task.recurrence
+    parts = [f"FREQ={rule.freq.upper()}"]
+    if rule.interval != 1:
+        parts.append(f"INTERVAL={rule.interval}")
+    if rule.by_weekday:
+        parts.append("BYDAY=" + ",".join(_ICS_WEEKDAYS[day] for day in rule.by_weekday))
+    if rule.until is not None:
+        parts.append(f"UNTIL={_ics_time(rule.until)}")
+    if rule.count is not None:
+        parts.append(f"COUNT={rule.count}")
+    return ";".join(parts)
+
+
+def write_ics(tasks: Iterable[Task], f: TextIO) -> int:
+    """Write tasks as an iCalendar file of events.
+
+    Times are written as floating local times. Tasks at midnight without
+    an end become all-day events. Completion, which iCalendar only has
+    for to-dos, is written as non-standard properties that ``read_ics``
+    reads back. Open the file with ``newline=""``.
+
+    Returns:
+        Number of tasks written
+    """
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//TermTasks//EN\r\n")
+    count = 0
+    for task in tasks:
+        lines = ["BEGIN:VEVENT", f"UID:{task.id}", f"DTSTAMP:{stamp}"]
+        if task.is_all_day:
+            lines.append(f"DTSTART;VALUE=DATE:{task.start_time.strftime('%Y%m%d')}")
+        else:
+            lines.append(f"DTSTART:{_ics_time(task.start_time)}")
+            if task.end_time:
+                lines.append(f"DTEND:{_ics_time(task.end_time)}")
+        lines.append(f"SUMMARY:{_ics_escape(task.title)}")
+        if task.recurrence is not None:
+            lines.append(f"RRULE:{_ics_rrule(task)}")
+            for when in sorted(task.recurrence.exceptions):
+                lines.append(f"EXDATE:{_ics_time(when)}")
+            for when in sorted(task.recurrence.completed):
+                lines.append(f"{ICS_COMPLETED_OCCURRENCE}:{_ics_time(when)}")
+        if task.completed:
+            lines.append(f"{ICS_COMPLETED}:TRUE")
+        lines.append("END:VEVENT")
+        f.write("".join(_ics_fold(line) for line in lines))
+        count += 1
+    f.write("END:VCALENDAR\r\n")
+    return count
+
+
+WRITERS: Dict[str, Callable[[Iterable[Task], TextIO], int]] = {
+    "ics": write_ics,
+    "csv": write_csv,
+    "jsonl": write_jsonl,
+}
+
+
+def export_tasks(tasks: Iterable[Task], f: TextIO, fmt: str) -> int:
+    """Write tasks to a file in one of ``EXPORT_FORMATS``.
+
+    Args:
+        tasks: Tasks to write, such as from ``select_tasks``
+        f: Text file to write to, opened with ``newline=""``
+        fmt: Format to write
+
+    Returns:
+        Number of tasks written
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format: {fmt!r}")
+    return WRITERS[fmt](tasks, f)
@@ -0,0 +1,550 @@
+"""
+Importing tasks from iCalendar and CSV files.
+
+Files are parsed a record at a time by generators, so the input is never
+held in memory whole. ``import_tasks`` feeds the parsed tasks straight
+into ``TaskList.add_tasks``, which sorts and indexes them once at the end,
+skipping tasks whose ID (an iCalendar UID, or a CSV ``id`` column) is
+already known.
+"""
+
+import csv
+import json
+import os
+import re
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, time as dt_time, timedelta, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from termtasks.models import Task, TaskList
+from termtasks.recurrence import FREQUENCIES, Recurrence
+
+IMPORT_FORMATS = ("ics", "csv")
+
+# File extensions that select a format when none is given
+FORMAT_EXTENSIONS = {".ics": "ics", ".ical": "ics", ".ifb": "ics", ".csv": "csv"}
+
+# Non-standard property the exporter uses to mark completed events,
+# which iCalendar only has for to-dos
+ICS_COMPLETED = "X-TERMTASKS-COMPLETED"
+# Likewise for the completed occurrences of a recurring event
+ICS_COMPLETED_OCCURRENCE = "X-TERMTASKS-COMPLETED-OCCURRENCE"
+
+# Columns of the CSV format, as written by the exporter
+CSV_FIELDS = ("id", "title", "start_time", "end_time", "completed", "recurrence")
+
+# Other names of CSV columns, as used by calendar applications
+CSV_ALIASES = {
+    "uid": "id",
+    "subject": "title",
+    "summary": "title",
+    "name": "title",
+    "start": "start_time",
+    "dtstart": "start_time",
+    "start date": "start_date",
+    "start time": "start_clock",
+    "end": "end_time",
+    "dtend": "end_time",
+    "end date": "end_date",
+    "end time": "end_clock",
+    "all day event": "all_day",
+    "all day": "all_day",
+    "done": "completed",
+    "status": "completed",
+}
+_TRUE = {"1", "true", "yes", "y", "x", "done", "completed"}
+
+# Date and time formats of CSV columns besides ISO 8601
+DATE_FORMATS = ("%m/%d/%Y", "%d.%m.%Y")
+TIME_FORMATS = ("%I:%M %p", "%I:%M:%S %p", "%H:%M")
+
+_WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+_DURATION = re.compile(r"([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+_ICS_ESCAPES = re.compile(r"\\([\\;,nN])")
+
+
+@dataclass
+class ImportStats:
+    """Counts and timing of an import."""
+
+    # Records parsed, tasks added, and records whose ID was already known
+    read: int = 0
+    added: int = 0
+    duplicates: int = 0
+    # Records skipped or imported in part, with a warning
+    warnings: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Return the number of records parsed per second."""
+        return self.read / self.seconds if self.seconds else 0.0
+
+
+def _derived_id(title: str, start: datetime, end: Optional[datetime]) -> str:
+    """Make a stable ID for a record without one, so re-imports dedupe."""
+    digest = zlib.crc32(f"{title}\0{start.isoformat()}\0{end}".encode("utf-8"))
+    return f"{start.strftime('%Y%m%d%H%M%S')}-{digest:08x}"
+
+
+def _warn_or_raise(warn: Optional[Callable[[str], None]], message: str) -> None:
+    """Report a problem with a record, raising if nobody is listening."""
+    if warn is None:
+        raise ValueError(message)
+    warn(message)
+
+
+# iCalendar
+
+def _unfold(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    """Join folded iCalendar lines.
+
+    Returns:
+        Iterator of (number of the first physical line, logical line)
+    """
+    current = None
+    start = 0
+    for number, line in enumerate(lines, start=1):
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current:
+            yield start, current
+        current, start = line, number
+    if current:
+        yield start, current
+
+
+def _split_property(line: str) -> Tuple[str, Dict[str, str], str]:
+    """Split a content line into its name, parameters and value."""
+    # The value starts at the first colon outside a quoted parameter
+    i = line.find(":")
+    if '"' in line[:i]:
+        quoted = False
+        for i, ch in enumerate(line):
+            if ch == '"':
+                quoted = not quoted
+            elif ch == ":" and not quoted:
+                break
+        else:
+            i = -1
+    if i < 0:
+        raise ValueError(f"no value in {line!r}")
+    name, *params = line[:i].split(";")
+    parameters = {}
+    for param in params:
+        key, _, value = param.partition("=")
+        parameters[key.upper()] = value.strip('"')
+    return name.upper(), parameters, line[i + 1:]
+
+
+def _unescape(text: str) -> str:
+    """Undo iCalendar text escapes, turning line breaks into spaces."""
+    return _ICS_ESCAPES.sub(lambda m: " " if m.group(1) in "nN" else m.group(1), text)
+
+
+def _parse_ics_time(value: str, params: Dict[str, str]) -> Tuple[datetime, bool]:
+    """Parse a DATE or DATE-TIME value.
+
+    UTC times are converted to local time; times with a TZID, and floating
+    times, are taken as local wall-clock times.
+
+    Returns:
+        The time, and whether it is a date without a time
+    """
+    # Sliced by hand: strptime would dominate the import time
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return datetime(int(value[:4]), int(value[4:6]), int(value[6:8])), True
+    if len(value) not in (15, 16) or value[8] != "T":
+        raise ValueError(f"invalid date-time {value!r}")
+    when = datetime(int(value[:4]), int(value[4:6]), int(value[6:8]),
+                    int(value[9:11]), int(value[11:13]), int(value[13:15]))
+    if value.endswith("Z"):
+        when = when.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    return when, False
+
+
+def _parse_duration(value: str) -> timedelta:
+    """Parse an iCalendar DURATION such as PT1H30M."""
+    match = _DURATION.match(value)
+    if match is None:
+        raise ValueError(f"invalid duration {value!r}")
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    duration = timedelta(weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+                         minutes=int(minutes or 0), seconds=int(seconds or 0))
+    return -duration if sign == "-" else duration
+
+
+def _parse_rrule(value: str, exceptions: List[datetime], completed: List[datetime]) -> Recurrence:
+    """Convert an RRULE to a Recurrence.
+
+    Raises:
+        ValueError: If the rule uses parts a Recurrence can't express
+    """
+    parts = dict(part.split("=", 1) for part in value.upper().split(";") if part)
+    freq = parts.pop("FREQ", "").lower()
+    if freq not in FREQUENCIES:
+        raise ValueError(f"unsupported frequency in RRULE {value!r}")
+    by_weekday: Tuple[int, ...] = ()
+    if "BYDAY" in parts:
+        try:
+            by_weekday = tuple(_WEEKDAYS.index(day) for day in parts.pop("BYDAY").split(","))
+        except ValueError:
+            raise ValueError(f"unsupported BYDAY in RRULE {value!r}") from None
+    until = None
+    if "UNTIL" in parts:
+        until, date_only = _parse_ics_time(parts.pop("UNTIL"), {})
+        if date_only:
+            # The whole day is included
+            until = until.replace(hour=23, minute=59, second=59)
+    count = int(parts.pop("COUNT")) if "COUNT" in parts else None
+    interval = int(parts.pop("INTERVAL", 1))
+    parts.pop("WKST", None)
+    if parts:
+        raise ValueError(f"unsupported {', '.join(sorted(parts))} in RRULE {value!r}")
+    return Recurrence(freq, interval, by_weekday, until, count, frozenset(exceptions),
+                      frozenset(completed))
+
+
+def _ics_task(props: List[Tuple[str, Dict[str, str], str]], todo: bool,
+              warn: Optional[Callable[[str], None]],
+              line: int) -> Tuple[Task, Optional[str], Optional[datetime]]:
+    """Build a task from the properties of a VEVENT or VTODO.
+
+    Returns:
+        The task, its UID, and the RECURRENCE-ID if it overrides one
+        occurrence
+    """
+    fields: Dict[str, Tuple[Dict[str, str], str]] = {}
+    exceptions: List[datetime] = []
+    done: List[datetime] = []
+    for name, params, value in props:
+        if name == "EXDATE":
+            exceptions.extend(_parse_ics_time(part, params)[0] for part in value.split(","))
+        elif name == ICS_COMPLETED_OCCURRENCE:
+            done.extend(_parse_ics_time(part, params)[0] for part in value.split(","))
+        else:
+            fields.setdefault(name, (params, value))
+
+    title = _unescape(fields["SUMMARY"][1]) if "SUMMARY" in fields else ""
+    # A to-do may only have a due time, which then is its start
+    start_field = fields.get("DTSTART") or (fields.get("DUE") if todo else None)
+    if start_field is None:
+        raise ValueError("no DTSTART")
+    start, all_day = _parse_ics_time(start_field[1], start_field[0])
+
+    end = None
+    if "DTEND" in fields:
+        end = _parse_ics_time(fields["DTEND"][1], fields["DTEND"][0])[0]
+    elif "DUE" in fields and "DTSTART" in fields:
+        end = _parse_ics_time(fields["DUE"][1], fields["DUE"][0])[0]
+    elif "DURATION" in fields:
+        end = start + _parse_duration(fields["DURATION"][1])
+    # All-day events are shown as such, without an end
+    if all_day or (end is not None and end <= start):
+        end = None
+
+    completed = ("COMPLETED" in fields
+                 or fields.get("STATUS", ({}, ""))[1].upper() == "COMPLETED"
+                 or fields.get(ICS_COMPLETED, ({}, ""))[1].upper() == "TRUE")
+
+    recurrence = None
+    if "RRULE" in fields:
+        try:
+            recurrence = _parse_rrule(fields["RRULE"][1], exceptions, done)
+        except ValueError as e:
+            _warn_or_raise(warn, f"line {line}: {e}; importing the first occurrence only")
+
+    recurrence_id = None
+    if "RECURRENCE-ID" in fields:
+        recurrence_id = _parse_ics_time(fields["RECURRENCE-ID"][1], fields["RECURRENCE-ID"][0])[0]
+
+    uid = fields["UID"][1] if "UID" in fields else None
+    if uid is None:
+        task_id = _derived_id(title, start, end)
+    elif recurrence_id is not None:
+        # The ID an occurrence of the recurring task would have
+        task_id = f"{uid}@{recurrence_id.strftime('%Y%m%d%H%M%S')}"
+    else:
+        task_id = uid
+    task = Task(title=title, start_time=start, end_time=end, completed=completed,
+                id=task_id, recurrence=recurrence)
+    return task, uid, recurrence_id
+
+
+def read_ics(lines: Iterable[str], warn: Optional[Callable[[str], None]] = None) -> Iterator[Task]:
+    """Parse the events and to-dos of an iCalendar stream.
+
+    Recurrence rules are converted where a ``Recurrence`` can express
+    them. An event that overrides one occurrence of a recurring event
+    (one with a RECURRENCE-ID) becomes a task of its own, and the
+    occurrence is excluded from the recurring task, which may already
+    have been yielded.
+
+    Args:
+        lines: Lines of the file, such as an open text file
+        warn: Called with a message for each record that is skipped or
+            only partly imported; if None, such records raise
+
+    Returns:
+        Iterator of tasks in file order
+
+    Raises:
+        ValueError: If a record is invalid and ``warn`` is None
+    """
+    # Recurring tasks by UID, and overridden occurrences of tasks not seen yet
+    series: Dict[str, Task] = {}
+    overridden: Dict[str, List[datetime]] = {}
+    props: Optional[List[Tuple[str, Dict[str, str], str]]] = None
+    component = None
+    start_line = 0
+    depth = 0
+    for number, line in _unfold(lines):
+        if props is None:
+            if line.upper() in ("BEGIN:VEVENT", "BEGIN:VTODO"):
+                props, component, start_line, depth = [], line.upper()[6:], number, 0
+            continue
+        upper = line.upper()
+        if upper.startswith("BEGIN:"):
+            # Nested components, such as alarms, are skipped
+            depth += 1
+            continue
+        if upper.startswith("END:"):
+            if depth:
+                depth -= 1
+                continue
+            try:
+                task, uid, recurrence_id = _ics_task(props, component == "VTODO", warn, start_line)
+            except (ValueError, KeyError) as e:
+                _warn_or_raise(warn, f"line {start_line}: skipped {component}: {e}")
+            else:
+                if uid is not None and recurrence_id is not None:
+                    master = series.get(uid)
+                    if master is not None:
+                        master.recurrence = master.recurrence.with_exception(recurrence_id)
+                    else:
+                        overridden.setdefault(uid, []).append(recurrence_id)
+                elif uid is not None and task.recurrence is not None:
+                    series[uid] = task
+                    for when in overridden.pop(uid, ()):
+                        task.recurrence = task.recurrence.with_exception(when)
+                yield task
+            props = None
+            continue
+        if depth:
+            continue
+        try:
+            props.append(_split_property(line))
+        except ValueError as e:
+            _warn_or_raise(warn, f"line {number}: {e}")
+
+
+# CSV
+
+def _parse_date(text: str) -> datetime:
+    """Parse an ISO date or a date in one of ``DATE_FORMATS``."""
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    raise ValueError(f"invalid date {text!r}")
+
+
+def _parse_clock(day: datetime, text: str) -> datetime:
+    """Combine a date with an ISO time or a time in one of ``TIME_FORMATS``."""
+    try:
+        clock = dt_time.fromisoformat(text)
+    except ValueError:
+        pass
+    else:
+        return datetime.combine(day.date(), clock)
+    for fmt in TIME_FORMATS:
+        try:
+            clock = datetime.strptime(text.upper(), fmt)
+        except ValueError:
+            continue
+        return day.replace(hour=clock.hour, minute=clock.minute, second=clock.second)
+    raise ValueError(f"invalid time {text!r}")
+
+
+def _parse_csv_time(row: Dict[str, str], prefix: str) -> Optional[datetime]:
+    """Get a time from a combined column, or from date and time columns.
+
+    Times with a UTC offset are converted to local time, like UTC times
+    in iCalendar files, since tasks store naive local times.
+    """
+    text = row.get(f"{prefix}_time", "")
+    if text:
+        try:
+            when = datetime.fromisoformat(text)
+        except ValueError:
+            day, _, clock = text.partition(" ")
+            return _parse_clock(_parse_date(day), clock) if clock else _parse_date(day)
+        if when.tzinfo is not None:
+            when = when.astimezone().replace(tzinfo=None)
+        return when
+    text = row.get(f"{prefix}_date", "")
+    if not text:
+        return None
+    day = _parse_date(text)
+    clock = row.get(f"{prefix}_clock", "")
+    return _parse_clock(day, clock) if clock else day
+
+
+def _csv_task(row: Dict[str, str]) -> Task:
+    """Build a task from a CSV row keyed by canonical column names."""
+    title = row.get("title", "")
+    start = _parse_csv_time(row, "start")
+    if start is None:
+        raise ValueError("no start time")
+    end = _parse_csv_time(row, "end")
+    if row.get("all_day", "").lower() in _TRUE or (end is not None and end <= start):
+        end = None
+
+    recurrence = None
+    rule = row.get("recurrence", "")
+    if rule:
+        # The exporter writes rules as JSON; people write them as text
+        recurrence = (Recurrence.from_dict(json.loads(rule)) if rule.startswith("{")
+                      else Recurrence.parse(rule))
+    return Task(
+        title=title,
+        start_time=start,
+        end_time=end,
+        completed=row.get("completed", "").lower() in _TRUE,
+        id=row.get("id") or _derived_id(title, start, end),
+        recurrence=recurrence,
+    )
+
+
+def read_csv(lines: Iterable[str], warn: Optional[Callable[[str], None]] = None) -> Iterator[Task]:
+    """Parse the rows of a CSV file with a header row.
+
+    Besides the exporter's ``CSV_FIELDS``, the column names of common
+    calendar exports are understood (see ``CSV_ALIASES``), such as
+    separate start date and start time columns. Dates and times are in
+    ISO format or one of ``DATE_FORMATS`` and ``TIME_FORMATS``; names are
+    matched ignoring case.
+
+    Args:
+        lines: Lines of the file, such as a text file opened with
+            ``newline=""``
+        warn: Called with a message for each row that is skipped; if None,
+            invalid rows raise
+
+    Returns:
+        Iterator of tasks in file order
+
+    Raises:
+        ValueError: If the header has no title and start columns, or a row
+            is invalid and ``warn`` is None
+    """
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = []
+    for name in header:
+        name = name.strip().lower()
+        columns.append(CSV_ALIASES.get(name, name))
+    if "start_time" not in columns and "start_date" not in columns:
+        raise ValueError("CSV file has no start time column")
+
+    for values in reader:
+        if not any(values):
+            continue
+        row = {name: value.strip() for name, value in zip(columns, values) if value}
+        try:
+            yield _csv_task(row)
+        except (ValueError, KeyError, TypeError) as e:
+            _warn_or_raise(warn, f"line {reader.line_num}: skipped row: {e}")
+
+
+READERS = {"ics": read_ics, "csv": read_csv}
+
+
+def detect_format(path: str) -> str:
+    """Guess the format of a file from its extension, or its first line.
+
+    Raises:
+        ValueError: If the format can't be told
+    """
+    fmt = FORMAT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt is not None:
+        return fmt
+    with open(path, encoding="utf-8-sig") as f:
+        first = f.readline().strip().upper()
+    if first == "BEGIN:VCALENDAR":
+        return "ics"
+    if "," in first:
+        return "csv"
+    raise ValueError(f"cannot tell the format of {path}")
+
+
+def import_tasks(task_list: TaskList, path: str, fmt: Optional[str] = None,
+                 warn: Optional[Callable[[str], None]] = None,
+                 progress: Optional[Callable[[ImportStats], None]] = None,
+                 batch_size: int = 10000) -> ImportStats:
+    """Add the tasks of a file to a TaskList.
+
+    The file is parsed as it is read and the tasks go into the list
+    through a single ``add_tasks`` call, so the list is sorted and indexed
+    once. Records whose ID is already in the list, including IDs seen
+    earlier in the file, are skipped as duplicates. Nothing is saved.
+
+    Args:
+        task_list: The tasks to add to, loaded in full
+        path: File to import
+        fmt: One of ``IMPORT_FORMATS``, or None to guess it
+        warn: Called with a message for each record that is skipped or
+            only partly imported; if None, such records raise
+        progress: Called with the running counts every ``batch_size``
+            records
+        batch_size: Records between progress reports
+
+    Returns:
+        The counts and time taken
+
+    Raises:
+        ValueError: If the format is unknown, or a record is invalid and
+            ``warn`` is None
+        OSError: If the file can't be read
+    """
+    fmt = fmt or detect_format(path)
+    if fmt not in READERS:
+        raise ValueError(f"Unknown import format: {fmt!r}")
+    stats = ImportStats()
+    began = time.perf_counter()
+
+    def count_warning(message: str) -> None:
+        stats.warnings += 1
+        if warn is not None:
+            warn(message)
+
+    def new_tasks(tasks: Iterator[Task]) -> Iterator[Task]:
+        for task in tasks:
+            stats.read += 1
+            # add_tasks registers each task before asking for the next, so
+            # this also catches IDs repeated within the file
+            if task_list.get_task(task.id) is not None:
+                stats.duplicates += 1
+            else:
+                stats.added += 1
+                yield task
+            if progress is not None and stats.read % batch_size == 0:
+                stats.seconds = time.perf_counter() - began
+                progress(stats)
+
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        tasks = READERS[fmt](f, count_warning if warn is not None else None)
+        task_list.add_tasks(new_tasks(tasks))
+    stats.seconds = time.perf_counter() - began
+    return stats
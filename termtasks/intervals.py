@@ -0,0 +1,181 @@
+"""
+Interval index over the time taken by tasks.
+
+Tasks with an end time occupy [start, end). They are kept in a treap (a
+randomized balanced search tree) ordered by start time and ID, where
+every node also records the latest end time in its subtree. A query for
+the tasks overlapping [a, b) skips any subtree ending by a and stops at
+the first start time from b on, so it takes O(log n + k) for k results.
+"""
+
+import random
+from datetime import datetime
+from operator import attrgetter
+from typing import Iterable, List, Optional, Tuple
+
+
+class _Node:
+    """A task interval in the tree."""
+
+    __slots__ = ("start", "end", "task", "priority", "left", "right", "max_end")
+
+    def __init__(self, task, priority: float):
+        self.start: datetime = task.start_time
+        self.end: datetime = task.end_time
+        self.task = task
+        self.priority = priority
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+        self.max_end = self.end
+
+    def update(self) -> None:
+        """Recompute the latest end time in the subtree."""
+        max_end = self.end
+        if self.left is not None and self.left.max_end > max_end:
+            max_end = self.left.max_end
+        if self.right is not None and self.right.max_end > max_end:
+            max_end = self.right.max_end
+        self.max_end = max_end
+
+
+def occupies_time(task) -> bool:
+    """Check whether a task takes up time, that is, ends after it starts."""
+    return task.end_time is not None and task.end_time > task.start_time
+
+
+def _split(node: Optional[_Node], key: tuple) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """Split a subtree into the nodes before a key and the nodes from it on."""
+    if node is None:
+        return None, None
+    if (node.start, node.task.id) < key:
+        node.right, right = _split(node.right, key)
+        node.update()
+        return node, right
+    left, node.left = _split(node.left, key)
+    node.update()
+    return left, node
+
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+    """Join two subtrees whose keys are all in order."""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        left.update()
+        return left
+    right.left = _merge(left, right.left)
+    right.update()
+    return right
+
+
+def _remove(node: Optional[_Node], key: tuple) -> Tuple[Optional[_Node], bool]:
+    """Remove the node with a key from a subtree.
+
+    Returns:
+        The new subtree and whether the key was found
+    """
+    if node is None:
+        return None, False
+    node_key = (node.start, node.task.id)
+    if key == node_key:
+        return _merge(node.left, node.right), True
+    if key < node_key:
+        node.left, found = _remove(node.left, key)
+    else:
+        node.right, found = _remove(node.right, key)
+    if found:
+        node.update()
+    return node, found
+
+
+class IntervalIndex:
+    """Treap of the tasks that take up time, for overlap queries.
+
+    Tasks without an end time, or ending when they start, are points in
+    time rather than bookings and are not indexed. A task must be removed
+    before its start time, end time or ID changes, and added back after.
+    """
+
+    def __init__(self, tasks: Iterable = ()):
+        """Initialize the index.
+
+        Args:
+            tasks: Tasks to index, in any order
+        """
+        self._random = random.Random(0x5EED)
+        self._size = 0
+        self._root: Optional[_Node] = self._build([task for task in tasks if occupies_time(task)])
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _build(self, tasks: List) -> Optional[_Node]:
+        """Build a balanced tree of tasks in O(n log n).
+
+        Each node's priority is its parent's scaled by a random factor, so
+        priorities decrease from each node to its children, as the treap
+        requires.
+        """
+        tasks.sort(key=attrgetter("start_time", "id"))
+        self._size = len(tasks)
+        rand = self._random.random
+
+        def link(lo: int, hi: int, priority: float) -> Optional[_Node]:
+            if lo >= hi:
+                return None
+            mid = (lo + hi) // 2
+            node = _Node(tasks[mid], priority)
+            node.left = link(lo, mid, priority * rand())
+            node.right = link(mid + 1, hi, priority * rand())
+            node.update()
+            return node
+
+        return link(0, len(tasks), 1.0)
+
+    def add(self, task) -> None:
+        """Index a task, if it takes up time."""
+        if not occupies_time(task):
+            return
+        node = _Node(task, self._random.random())
+        left, right = _split(self._root, (task.start_time, task.id))
+        self._root = _merge(_merge(left, node), right)
+        self._size += 1
+
+    def remove(self, task) -> None:
+        """Drop a task from the index, if it is there."""
+        if not occupies_time(task):
+            return
+        self._root, found = _remove(self._root, (task.start_time, task.id))
+        if found:
+            self._size -= 1
+
+    def overlapping(self, start: datetime, end: datetime) -> List:
+        """Get the tasks whose time overlaps [start, end).
+
+        Args:
+            start: Start of the range
+            end: End of the range, exclusive
+
+        Returns:
+            Tasks in start-time order
+        """
+        tasks: List = []
+        # Iterative in-order walk; subtrees that end by start are skipped
+        stack: List[_Node] = []
+        node = self._root
+        while stack or node is not None:
+            while node is not None and node.max_end > start:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                break
+            node = stack.pop()
+            if node.start >= end:
+                break
+            if node.end > start:
+                tasks.append(node.task)
+            node = node.right
+        return tasks
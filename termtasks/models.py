@@ -2,9 +2,21 @@
 Data models for TermTasks.
 """
 
+import bisect
+import heapq
+from collections.abc import Sequence
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import List, Optional
+from datetime import date, datetime, time, timedelta
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from termtasks.recurrence import OccurrenceCache, Recurrence
+from termtasks.utils.date_utils import days_in_month
+
+if TYPE_CHECKING:
+    # Imported by the methods that build the indexes, so commands that
+    # never search or check overlaps don't load them
+    from termtasks.intervals import IntervalIndex
+    from termtasks.search import SearchIndex
 
 
 @dataclass
@@ -16,6 +28,10 @@ class Task:
     end_time: Optional[datetime] = None
     completed: bool = False
     id: Optional[str] = None
+    # Set for a task that repeats; see termtasks.recurrence
+    recurrence: Optional[Recurrence] = None
+    # Bumped by TaskList whenever the task is changed
+    version: int = field(default=0, init=False, compare=False, repr=False)
 
     def __post_init__(self):
         """Initialize the task ID if not provided."""
@@ -41,55 +57,870 @@ class Task:
 
     def to_dict(self) -> dict:
         """Convert to dictionary for storage."""
-        return {
+        data = {
             "id": self.id,
             "title": self.title,
             "start_time": self.start_time.isoformat(),
             "end_time": self.end_time.isoformat() if self.end_time else None,
             "completed": self.completed,
         }
+        # Only recurring tasks carry the field, so other records are unchanged
+        if self.recurrence is not None:
+            data["recurrence"] = self.recurrence.to_dict()
+        return data
 
     @classmethod
     def from_dict(cls, data: dict) -> "Task":
         """Create a Task from dictionary data."""
+        recurrence = data.get("recurrence")
         return cls(
             id=data["id"],
             title=data["title"],
             start_time=datetime.fromisoformat(data["start_time"]),
             end_time=datetime.fromisoformat(data["end_time"]) if data["end_time"] else None,
             completed=data["completed"],
+            recurrence=Recurrence.from_dict(recurrence) if recurrence else None,
         )
 
 
 @dataclass
+class Occurrence(Task):
+    """One occurrence of a recurring task, generated for display.
+
+    Occurrences are not part of a TaskList's ``tasks``. Completing one with
+    ``TaskList.set_completed`` records it in the recurring task's rule.
+    """
+
+    # The recurring task this is an occurrence of
+    series: Optional[Task] = field(default=None, compare=False, repr=False)
+
+
+@dataclass
+class ChangeSet:
+    """Changes made to a TaskList since its changes were last taken."""
+
+    added: List[Task] = field(default_factory=list)
+    updated: List[Task] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.updated) + len(self.removed)
+
+
+# Fields that TaskList.update_task may change
+EDITABLE_FIELDS = ("title", "start_time", "end_time", "completed", "recurrence")
+
+
+def unique_id(task_id: str, taken) -> str:
+    """Make a task ID unique among the taken ones.
+
+    Generated IDs only have one-second resolution, so two tasks created
+    for the same minute would otherwise collide. A numeric suffix is
+    appended to the later one. Storage backends that key tasks by ID use
+    this too, so they name duplicates the way a TaskList does.
+
+    Args:
+        task_id: The task's ID
+        taken: Container of the IDs already in use
+
+    Returns:
+        The ID, or the first of ``<id>-2``, ``<id>-3``... that is free
+    """
+    if task_id not in taken:
+        return task_id
+    suffix = 2
+    while f"{task_id}-{suffix}" in taken:
+        suffix += 1
+    return f"{task_id}-{suffix}"
+
+
+class TaskSequence(Sequence):
+    """Read-only view over the tasks of a TaskList, in start-time order."""
+
+    __slots__ = ("_tasks",)
+
+    def __init__(self, tasks: List[Task]):
+        """Wrap the list owned by a TaskList."""
+        self._tasks = tasks
+
+    def __getitem__(self, index):
+        return self._tasks[index]
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __iter__(self) -> Iterator[Task]:
+        return iter(self._tasks)
+
+    def __repr__(self) -> str:
+        return f"TaskSequence({self._tasks!r})"
+
+
 class TaskList:
-    """A collection of tasks."""
+    """A collection of tasks.
+
+    Tasks are kept sorted by start time and are reachable by ID through a
+    hash map. Alongside the ordered list the collection maintains an index
+    of start-time keys and per-day task and completion counts, so
+    insertion, removal, day and range lookups don't scan or re-sort every
+    task.
+
+    Recurring tasks appear once in ``tasks``, at their first start time,
+    but are left out of the per-day index. The per-day queries add their
+    occurrences instead, expanded only for the window asked for and
+    cached per window.
+
+    Title search uses a ``SearchIndex``, built on first use or attached
+    from a cache, and kept current from then on. Overlap queries use an
+    ``IntervalIndex`` of the tasks' time, also built on first use and
+    kept current until the next bulk change.
+
+    ``tasks`` is a read-only view; use the methods below to modify the
+    collection and its tasks. Every modification increments ``version``,
+    which renderers can compare to skip redraws, and is recorded in a
+    change log that storage backends take with ``take_changes`` to write
+    only what changed.
+    """
+
+    def __init__(self, tasks: Optional[Iterable[Task]] = None):
+        """Initialize the collection.
+
+        Args:
+            tasks: Optional initial tasks, in any order
+        """
+        self._tasks: List[Task] = []
+        self._view = TaskSequence(self._tasks)
+        self._by_id: Dict[str, Task] = {}
+        # Task ID -> "added", "updated" or "removed"
+        self._changes: Dict[str, str] = {}
+        self.version = 0
+        # Recurring tasks by ID; the version changes with any of them
+        self._recurring: Dict[str, Task] = {}
+        self._recurring_version = 0
+        self._occurrences = OccurrenceCache()
+        self._search: Optional["SearchIndex"] = None
+        self._intervals: Optional["IntervalIndex"] = None
+        self._rebuild_index()
+        if tasks is not None:
+            self.add_tasks(tasks, record_changes=False)
 
-    tasks: List[Task] = field(default_factory=list)
+    @property
+    def tasks(self) -> TaskSequence:
+        """Return a read-only view of the tasks in start-time order."""
+        return self._view
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def _rebuild_index(self) -> None:
+        """Rebuild the start-time keys and per-day buckets from the tasks."""
+        self._keys = [task.start_time for task in self._tasks]
+        self._day_counts: Dict[date, int] = {}
+        self._done_by_day: Dict[date, int] = {}
+        self._recurring = {}
+        self._recurring_version += 1
+        # Rebuilt in one pass on the next overlap query
+        self._intervals = None
+        for task in self._tasks:
+            self._index_day(task)
+
+    def _index_day(self, task: Task) -> None:
+        """Count a task in its day bucket, or register a recurring task."""
+        if task.recurrence is not None:
+            self._recurring[task.id] = task
+            self._recurring_version += 1
+            return
+        day = task.start_time.date()
+        self._day_counts[day] = self._day_counts.get(day, 0) + 1
+        if task.completed:
+            self._done_by_day[day] = self._done_by_day.get(day, 0) + 1
+
+    def _unindex_day(self, task: Task) -> None:
+        """Remove a task from its day bucket, or unregister a recurring task."""
+        if task.recurrence is not None:
+            del self._recurring[task.id]
+            self._recurring_version += 1
+            return
+        day = task.start_time.date()
+        self._day_counts[day] -= 1
+        if not self._day_counts[day]:
+            del self._day_counts[day]
+        if task.completed:
+            self._done_by_day[day] -= 1
+
+    def _register_id(self, task: Task) -> None:
+        """Add a task to the ID map, making its ID unique if needed; see ``unique_id``."""
+        task.id = unique_id(task.id, self._by_id)
+        self._by_id[task.id] = task
+
+    def _record(self, task_id: str, kind: str) -> None:
+        """Log a change to a task, folding it into any earlier change."""
+        previous = self._changes.get(task_id)
+        if kind == "removed" and previous == "added":
+            del self._changes[task_id]
+            return
+        if kind == "added" and previous == "removed":
+            kind = "updated"
+        elif kind == "updated" and previous == "added":
+            kind = "added"
+        self._changes[task_id] = kind
+
+    def _position(self, task: Task) -> int:
+        """Find the position of a task in the ordered list."""
+        pos = bisect.bisect_left(self._keys, task.start_time)
+        while self._tasks[pos] is not task:
+            pos += 1
+        return pos
+
+    def _insert(self, task: Task) -> None:
+        """Insert a task into the ordered list and the day index."""
+        pos = bisect.bisect_right(self._keys, task.start_time)
+        self._tasks.insert(pos, task)
+        self._keys.insert(pos, task.start_time)
+        self._index_day(task)
+        if self._search is not None:
+            self._search.add(task)
+        if self._intervals is not None and task.recurrence is None:
+            self._intervals.add(task)
+
+    def _delete(self, task: Task) -> None:
+        """Delete a task from the ordered list and the day index."""
+        pos = self._position(task)
+        del self._tasks[pos]
+        del self._keys[pos]
+        self._unindex_day(task)
+        if self._search is not None:
+            self._search.remove(task.id)
+        if self._intervals is not None and task.recurrence is None:
+            self._intervals.remove(task)
 
     def add_task(self, task: Task) -> None:
         """Add a task to the list."""
-        self.tasks.append(task)
+        self._register_id(task)
+        self._insert(task)
+        self.version += 1
+        self._record(task.id, "added")
+
+    def add_tasks(self, tasks: Iterable[Task], record_changes: bool = True) -> None:
+        """Add many tasks at once, sorting and indexing only once.
+
+        Args:
+            tasks: Tasks to add, in any order
+            record_changes: Whether to log the tasks as added. Pass False
+                for tasks that were just loaded from storage.
+        """
+        start = len(self._tasks)
+        for task in tasks:
+            self._register_id(task)
+            self._tasks.append(task)
+            if record_changes:
+                self._record(task.id, "added")
+        if self._search is not None:
+            self._search.add_many(self._tasks[start:])
         self.sort_tasks()
 
-    def remove_task(self, task_id: str) -> None:
-        """Remove a task from the list."""
-        self.tasks = [t for t in self.tasks if t.id != task_id]
+    def remove_task(self, task_id: str) -> Optional[Task]:
+        """Remove a task from the list.
+
+        Returns:
+            The removed task, or None if no task has this ID
+        """
+        task = self._by_id.pop(task_id, None)
+        if task is None:
+            return None
+        self._delete(task)
+        self.version += 1
+        self._record(task_id, "removed")
+        return task
 
     def get_task(self, task_id: str) -> Optional[Task]:
         """Get a task by ID."""
-        for task in self.tasks:
-            if task.id == task_id:
-                return task
+        return self._by_id.get(task_id)
+
+    def index_of(self, task: Task) -> int:
+        """Get the position of a task in ``tasks``.
+
+        Raises:
+            ValueError: If the task is not in the list
+        """
+        if self._by_id.get(task.id) is not task:
+            raise ValueError(f"task {task.id!r} is not in the list")
+        return self._position(task)
+
+    def index_at(self, when: datetime) -> int:
+        """Get the position of the first task starting at or after a time.
+
+        Returns:
+            An index into ``tasks``, equal to its length if every task
+            starts earlier
+        """
+        return bisect.bisect_left(self._keys, when)
+
+    def update_task(self, task: Task, **changes) -> None:
+        """Change fields of a task, keeping the indexes and change log current.
+
+        Args:
+            task: A task contained in this list
+            **changes: New values for any of ``EDITABLE_FIELDS``
+
+        Raises:
+            TypeError: If a field can't be edited
+        """
+        unknown = set(changes) - set(EDITABLE_FIELDS)
+        if unknown:
+            raise TypeError(f"cannot update task fields: {', '.join(sorted(unknown))}")
+        if self._apply_update(task, changes):
+            self._record(task.id, "updated")
+
+    def _apply_update(self, task: Task, changes: Dict) -> bool:
+        """Set changed fields of a task and re-index it.
+
+        The task is only moved when its times or rule change, so it keeps
+        its place among tasks starting at the same time otherwise.
+
+        Returns:
+            Whether any field changed
+        """
+        changes = {name: value for name, value in changes.items() if getattr(task, name) != value}
+        if not changes:
+            return False
+
+        if changes.keys() & {"start_time", "end_time", "recurrence"}:
+            self._delete(task)
+            for name, value in changes.items():
+                setattr(task, name, value)
+            self._insert(task)
+        else:
+            if "completed" in changes and task.recurrence is None:
+                day = task.start_time.date()
+                self._done_by_day[day] = self._done_by_day.get(day, 0) + (1 if changes["completed"] else -1)
+            for name, value in changes.items():
+                setattr(task, name, value)
+            if "title" in changes:
+                if self._search is not None:
+                    self._search.add(task)
+                if task.recurrence is not None:
+                    # Cached occurrences copy the series' title
+                    self._recurring_version += 1
+        task.version += 1
+        self.version += 1
+        return True
+
+    def set_completed(self, task: Task, completed: bool) -> None:
+        """Set the completion state of a task.
+
+        Args:
+            task: A task contained in this list, or an occurrence of one
+            completed: The new completion state
+        """
+        if isinstance(task, Occurrence):
+            self.set_occurrence_completed(task.series, task.start_time, completed)
+        else:
+            self.update_task(task, completed=completed)
+
+    def set_occurrence_completed(self, task: Task, when: datetime, completed: bool) -> None:
+        """Set the completion state of one occurrence of a recurring task.
+
+        Only the occurrence's start time is stored, in the task's rule.
+
+        Args:
+            task: A recurring task contained in this list
+            when: Start time of the occurrence
+            completed: The new completion state
+        """
+        self.update_task(task, recurrence=task.recurrence.with_completed(when, completed))
+
+    def occurrences_between(self, start: datetime, end: datetime) -> List[Occurrence]:
+        """Get the occurrences of recurring tasks starting in [start, end).
+
+        Windows are expanded once and cached until a recurring task changes.
+
+        Args:
+            start: Inclusive lower bound on the start time
+            end: Exclusive upper bound on the start time
+
+        Returns:
+            Occurrences in start-time order
+        """
+        if not self._recurring:
+            return []
+        return self._occurrences.get(start, end, self._recurring_version, self._expand)
+
+    def _expand(self, start: datetime, end: datetime) -> List[Occurrence]:
+        """Generate the occurrences of every recurring task in a window."""
+        occurrences = []
+        for task in self._recurring.values():
+            rule = task.recurrence
+            duration = task.end_time - task.start_time if task.end_time else None
+            for when in rule.occurrences(task.start_time, start, end):
+                occurrences.append(Occurrence(
+                    title=task.title,
+                    start_time=when,
+                    end_time=when + duration if duration is not None else None,
+                    completed=when in rule.completed,
+                    id=f"{task.id}@{when.strftime('%Y%m%d%H%M%S')}",
+                    series=task,
+                ))
+        occurrences.sort(key=lambda occurrence: occurrence.start_time)
+        return occurrences
+
+    @property
+    def recurring_tasks(self) -> List[Task]:
+        """Return the recurring tasks, in no particular order."""
+        return list(self._recurring.values())
+
+    def next_occurrence(self, task: Task, after: datetime) -> Optional[datetime]:
+        """Get the start time of a recurring task's first occurrence from a time.
+
+        Args:
+            task: A recurring task
+            after: Inclusive lower bound on the start time
+
+        Returns:
+            The start time, or None if the task doesn't occur again
+        """
+        rule = task.recurrence
+        # Look `interval` years ahead at a time; rules repeat at least once
+        # in such a window unless they end or skip days that don't exist,
+        # which come back within eight windows
+        start = max(after, task.start_time)
+        span = timedelta(days=366 * rule.interval)
+        for _ in range(8):
+            try:
+                end = start + span
+            except OverflowError:
+                return None
+            times = rule.occurrences(task.start_time, start, end)
+            if times:
+                return times[0]
+            start = end
         return None
 
-    def get_tasks_for_date(self, date: datetime) -> List[Task]:
-        """Get all tasks for a specific date."""
+    @property
+    def interval_index(self) -> "IntervalIndex":
+        """Return the index of the tasks' time, building it on first use.
+
+        Recurring tasks are left out; ``overlapping`` adds their occurrences.
+        """
+        if self._intervals is None:
+            from termtasks.intervals import IntervalIndex
+            self._intervals = IntervalIndex(task for task in self._tasks
+                                            if task.recurrence is None)
+        return self._intervals
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Task]:
+        """Get the tasks and occurrences whose time overlaps [start, end).
+
+        Only tasks with an end time after their start time take up time.
+
+        Args:
+            start: Start of the range
+            end: End of the range, exclusive
+
+        Returns:
+            Tasks in start-time order
+        """
+        from termtasks.intervals import occupies_time
+        tasks = self.interval_index.overlapping(start, end)
+        durations = [task.end_time - task.start_time
+                     for task in self._recurring.values() if occupies_time(task)]
+        if not durations:
+            return tasks
+        # An occurrence starting up to one duration earlier may still run
+        occurrences = [
+            occurrence for occurrence in self.occurrences_between(start - max(durations), end)
+            if occupies_time(occurrence) and occurrence.end_time > start
+        ]
+        return list(heapq.merge(tasks, occurrences, key=lambda task: task.start_time))
+
+    def conflicts(self, task: Task) -> List[Task]:
+        """Get the tasks whose time overlaps a task's.
+
+        The task need not be in the list, so a new task can be checked
+        before it is added. Its own occurrences don't count.
+
+        Args:
+            task: The task to check
+
+        Returns:
+            Conflicting tasks in start-time order
+        """
+        from termtasks.intervals import occupies_time
+        if not occupies_time(task):
+            return []
+        series = task.series if isinstance(task, Occurrence) else task
         return [
-            task for task in self.tasks
-            if task.start_time.date() == date.date()
+            other for other in self.overlapping(task.start_time, task.end_time)
+            if other is not task
+            and not (isinstance(other, Occurrence) and other.series is series)
         ]
 
+    def conflict_days(self, start: date, days: int) -> Set[date]:
+        """Find the days on which the time of two or more tasks overlaps.
+
+        Args:
+            start: First day
+            days: Number of days
+
+        Returns:
+            The days in the range with an overlap
+        """
+        window_start = datetime.combine(start, time.min)
+        window_end = window_start + timedelta(days=days)
+        conflict_days: Set[date] = set()
+        # Sweep in start order, tracking the latest end time so far; a task
+        # starting before it overlaps an earlier one until the earlier of
+        # the two ends
+        reach: Optional[datetime] = None
+        for task in self.overlapping(window_start, window_end):
+            if reach is not None and task.start_time < reach:
+                lo = max(task.start_time, window_start)
+                hi = min(task.end_time, reach, window_end)
+                day = lo.date()
+                while datetime.combine(day, time.min) < hi:
+                    conflict_days.add(day)
+                    day += timedelta(days=1)
+            if reach is None or task.end_time > reach:
+                reach = task.end_time
+        return conflict_days
+
+    def _busy_time(self, start: datetime, end: datetime) -> List[List[datetime]]:
+        """Merge the time of the tasks overlapping [start, end) into disjoint
+        [start, end] intervals, in order."""
+        busy: List[List[datetime]] = []
+        for task in self.overlapping(start, end):
+            if busy and task.start_time <= busy[-1][1]:
+                if task.end_time > busy[-1][1]:
+                    busy[-1][1] = task.end_time
+            else:
+                busy.append([task.start_time, task.end_time])
+        return busy
+
+    def free_slots(self, after: datetime, duration: timedelta, limit: int = 1,
+                   day_start: time = time.min, day_end: Optional[time] = None,
+                   weekdays: Iterable[int] = range(7), excluded_dates: Iterable[date] = (),
+                   days: int = 366) -> List[Tuple[datetime, datetime]]:
+        """Find the first stretches of free time long enough for a task.
+
+        The time of the tasks overlapping each week searched is merged and
+        swept in start-time order, so the cost depends on the tasks in the
+        weeks searched, not on the whole list. Tasks without an end time
+        don't take up time.
+
+        Args:
+            after: Earliest start time
+            duration: Minimum length of free time
+            limit: Maximum number of slots
+            day_start: Start of the hours to search on each day
+            day_end: End of the hours to search on each day, or None for
+                midnight
+            weekdays: Days of the week to search (0 is Monday)
+            excluded_dates: Dates to skip
+            days: Number of days to search, from the day of ``after``
+
+        Returns:
+            (start, end) of each slot in order; slots lie within the hours
+            of a day and may be longer than ``duration``
+
+        Raises:
+            ValueError: If the duration isn't positive or the hours are empty
+        """
+        if duration <= timedelta(0):
+            raise ValueError("slot duration must be positive")
+        if day_end is not None and day_end <= day_start:
+            raise ValueError("day_end must be after day_start")
+        weekdays = set(weekdays)
+        excluded_dates = set(excluded_dates)
+
+        slots: List[Tuple[datetime, datetime]] = []
+        first_day = after.date()
+        for week in range(0, days, 7):
+            week_start = datetime.combine(first_day + timedelta(days=week), time.min)
+            week_days = min(7, days - week)
+            busy = self._busy_time(max(after, week_start), week_start + timedelta(days=week_days))
+            # Busy intervals before j end before the current day's hours
+            j = 0
+            for offset in range(week_days):
+                day = week_start.date() + timedelta(days=offset)
+                if day.weekday() not in weekdays or day in excluded_dates:
+                    continue
+                lo = max(after, datetime.combine(day, day_start))
+                if day_end is None:
+                    hi = datetime.combine(day + timedelta(days=1), time.min)
+                else:
+                    hi = datetime.combine(day, day_end)
+                if hi - lo < duration:
+                    continue
+                while j < len(busy) and busy[j][1] <= lo:
+                    j += 1
+                cursor = lo
+                for busy_start, busy_end in busy[j:]:
+                    if busy_start >= hi:
+                        break
+                    if busy_start - cursor >= duration:
+                        slots.append((cursor, busy_start))
+                        if len(slots) == limit:
+                            return slots
+                    cursor = max(cursor, busy_end)
+                if hi - cursor >= duration:
+                    slots.append((cursor, hi))
+                    if len(slots) == limit:
+                        return slots
+        return slots
+
+    @property
+    def search_index(self) -> "SearchIndex":
+        """Return the title index, building it from the tasks on first use."""
+        if self._search is None:
+            from termtasks.search import SearchIndex
+            self._search = SearchIndex(self._tasks)
+        return self._search
+
+    def attach_search_index(self, index: "SearchIndex") -> None:
+        """Use a title index built elsewhere, such as one read from a cache.
+
+        The index may hold tasks that are not loaded; the loaded tasks are
+        (re-)indexed, so it matches the list from now on.
+        """
+        index.add_many(self._tasks)
+        self._search = index
+
+    def search(self, query: str, prefix: bool = False, limit: Optional[int] = None) -> List[Task]:
+        """Find the loaded tasks whose titles contain a query, ignoring case.
+
+        Args:
+            query: Text to look for
+            prefix: Only match the query at the start of a word
+            limit: Maximum number of results
+
+        Returns:
+            Tasks in start-time order
+        """
+        tasks = []
+        for _, task_id in self.search_index.matches(query, prefix):
+            task = self._by_id.get(task_id)
+            if task is not None:
+                tasks.append(task)
+                if len(tasks) == limit:
+                    break
+        return tasks
+
+    @property
+    def change_count(self) -> int:
+        """Return the number of tasks with unsaved changes."""
+        return len(self._changes)
+
+    def changes(self) -> ChangeSet:
+        """Get the changes logged since they were last taken."""
+        changeset = ChangeSet()
+        for task_id, kind in self._changes.items():
+            if kind == "removed":
+                changeset.removed.append(task_id)
+            elif kind == "added":
+                changeset.added.append(self._by_id[task_id])
+            else:
+                changeset.updated.append(self._by_id[task_id])
+        return changeset
+
+    def take_changes(self) -> ChangeSet:
+        """Get the logged changes and clear the log."""
+        changeset = self.changes()
+        self._changes = {}
+        return changeset
+
+    def restore_changes(self, changeset: ChangeSet) -> None:
+        """Put back changes that could not be saved.
+
+        They are logged as happening before any change made since they
+        were taken.
+        """
+        newer = self._changes
+        self._changes = {}
+        for task in changeset.added:
+            self._changes[task.id] = "added"
+        for task in changeset.updated:
+            self._changes[task.id] = "updated"
+        for task_id in changeset.removed:
+            self._changes[task_id] = "removed"
+        for task_id, kind in newer.items():
+            self._record(task_id, kind)
+
+    def is_changed(self, task_id: str) -> bool:
+        """Return whether a task has unsaved changes."""
+        return task_id in self._changes
+
+    def apply_external(self, tasks: Iterable[Task] = (), removed: Iterable[str] = ()) -> int:
+        """Apply changes made to storage by another process.
+
+        Tasks with unsaved local changes keep their local version, which
+        will overwrite the external one when saved. Applied changes are not
+        logged, since storage already holds them.
+
+        Args:
+            tasks: Stored versions of added or changed tasks
+            removed: IDs of tasks removed from storage
+
+        Returns:
+            Number of tasks added, changed or removed
+        """
+        applied = 0
+        for task in tasks:
+            if task.id in self._changes:
+                continue
+            local = self._by_id.get(task.id)
+            if local is None:
+                self._register_id(task)
+                self._insert(task)
+                self.version += 1
+                applied += 1
+            elif self._apply_update(local, {name: getattr(task, name) for name in EDITABLE_FIELDS}):
+                applied += 1
+        for task_id in removed:
+            if task_id in self._changes:
+                continue
+            task = self._by_id.pop(task_id, None)
+            if task is not None:
+                self._delete(task)
+                self.version += 1
+                applied += 1
+        return applied
+
+    def merge(self, tasks: Iterable[Task],
+              ranges: Optional[List[Tuple[datetime, datetime]]] = None) -> int:
+        """Bring the list in line with tasks re-read from storage.
+
+        Local tasks missing from ``tasks`` are treated as removed
+        externally, unless they have unsaved changes. See
+        ``apply_external``.
+
+        Args:
+            tasks: Every stored task, or every stored task in ``ranges``
+            ranges: Start-time ranges that ``tasks`` covers, or None if it
+                covers everything
+
+        Returns:
+            Number of tasks added, changed or removed
+        """
+        # Tasks stored under one ID were renamed when loaded; rename them
+        # the same way so each matches its local copy
+        stored: Set[str] = set()
+        tasks = list(tasks)
+        for task in tasks:
+            task.id = unique_id(task.id, stored)
+            stored.add(task.id)
+        # Recurring tasks are always loaded, whatever the ranges
+        removed = [
+            task.id for task in self._tasks
+            if task.id not in stored and (
+                ranges is None or task.recurrence is not None
+                or any(lo <= task.start_time < hi for lo, hi in ranges))
+        ]
+        return self.apply_external(tasks, removed)
+
+    def get_tasks_for_date(self, date: datetime) -> List[Task]:
+        """Get all tasks for a specific date, including occurrences."""
+        day = date.date()
+        day_start = datetime.combine(day, time.min)
+        occurrences = self.occurrences_between(day_start, day_start + timedelta(days=1))
+        if day not in self._day_counts:
+            return list(occurrences)
+        lo = bisect.bisect_left(self._keys, day_start)
+        if not self._recurring:
+            return self._tasks[lo:lo + self._day_counts[day]]
+        hi = bisect.bisect_left(self._keys, day_start + timedelta(days=1))
+        tasks = [task for task in self._tasks[lo:hi] if task.recurrence is None]
+        return list(heapq.merge(tasks, occurrences, key=lambda task: task.start_time))
+
+    def get_tasks_between(self, start: datetime, end: datetime) -> List[Task]:
+        """Get all tasks starting in the half-open range [start, end).
+
+        Args:
+            start: Inclusive lower bound on the start time
+            end: Exclusive upper bound on the start time
+
+        Returns:
+            Tasks in start-time order
+        """
+        lo = bisect.bisect_left(self._keys, start)
+        hi = bisect.bisect_left(self._keys, end)
+        return self._tasks[lo:hi]
+
+    def count_tasks_by_day(self, year: int, month: int,
+                           completed: Optional[bool] = None) -> Dict[int, int]:
+        """Count the tasks on each day of a month.
+
+        Args:
+            year: Year
+            month: Month (1-12)
+            completed: If given, only count tasks with this completion state
+
+        Returns:
+            Mapping of day of month to task count; days without matching
+            tasks are omitted
+        """
+        counts = {}
+        for day in range(1, days_in_month(year, month) + 1):
+            key = date(year, month, day)
+            total = self._day_counts.get(key)
+            if not total:
+                continue
+            done = self._done_by_day.get(key, 0)
+            if completed is None:
+                count = total
+            elif completed:
+                count = done
+            else:
+                count = total - done
+            if count:
+                counts[day] = count
+
+        month_start = datetime(year, month, 1)
+        month_end = month_start + timedelta(days=days_in_month(year, month))
+        for occurrence in self.occurrences_between(month_start, month_end):
+            if completed is None or occurrence.completed == completed:
+                day = occurrence.start_time.day
+                counts[day] = counts.get(day, 0) + 1
+        return counts
+
+    def count_tasks_per_day(self, start: date, days: int,
+                            completed: Optional[bool] = None) -> List[int]:
+        """Count the tasks on each of a run of consecutive days.
+
+        The counts come straight from the per-day index, which is kept
+        current on every change, so this costs O(days) however many tasks
+        there are, plus the occurrences of recurring tasks in the window.
+
+        Args:
+            start: First day
+            days: Number of days
+            completed: If given, only count tasks with this completion state
+
+        Returns:
+            One count per day
+        """
+        totals, done_by_day = self._day_counts, self._done_by_day
+        counts = []
+        for offset in range(days):
+            key = start + timedelta(days=offset)
+            if completed is None:
+                counts.append(totals.get(key, 0))
+            elif completed:
+                counts.append(done_by_day.get(key, 0))
+            else:
+                counts.append(totals.get(key, 0) - done_by_day.get(key, 0))
+
+        window_start = datetime.combine(start, time.min)
+        for occurrence in self.occurrences_between(window_start,
+                                                   window_start + timedelta(days=days)):
+            if completed is None or occurrence.completed == completed:
+                counts[(occurrence.start_time.date() - start).days] += 1
+        return counts
+
     def sort_tasks(self) -> None:
-        """Sort tasks by start time."""
-        self.tasks.sort(key=lambda t: t.start_time)
+        """Sort tasks by start time and rebuild the date index."""
+        self._tasks.sort(key=lambda t: t.start_time)
+        self._rebuild_index()
+        self.version += 1
@@ -0,0 +1,271 @@
+"""
+Recurrence rules for repeating tasks.
+
+A recurring task is stored once, with a ``Recurrence`` rule modelled on
+iCalendar's RRULE: a frequency and interval, optional weekdays, an end
+given by a date or a number of occurrences, and sparse exceptions. Its
+occurrences are never stored; they are generated for whatever window is
+being shown, and expanded windows are kept in an ``OccurrenceCache``.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from datetime import MAXYEAR, datetime, timedelta
+from typing import Callable, FrozenSet, List, Optional, Tuple
+
+from termtasks.utils.date_utils import days_in_month
+
+DAILY = "daily"
+WEEKLY = "weekly"
+MONTHLY = "monthly"
+YEARLY = "yearly"
+FREQUENCIES = (DAILY, WEEKLY, MONTHLY, YEARLY)
+
+WEEKDAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+_UNITS = {DAILY: "day", WEEKLY: "week", MONTHLY: "month", YEARLY: "year"}
+
+
+@dataclass(frozen=True)
+class Recurrence:
+    """When a task repeats.
+
+    The task's start time is the first occurrence if it matches the rule.
+    Weekly rules repeat on ``by_weekday`` (0 is Monday), or on the start
+    time's weekday; daily rules only keep the days in ``by_weekday`` if it
+    is given. Monthly and yearly rules repeat on the start time's day of
+    the month, skipping months (or years) without that day. ``until`` is
+    inclusive, and ``count`` counts excluded occurrences too, as in RRULE.
+
+    Rules are immutable; ``with_completed`` and ``with_exception`` return
+    changed copies, which are stored with ``TaskList.update_task``.
+    """
+
+    freq: str
+    interval: int = 1
+    by_weekday: Tuple[int, ...] = ()
+    until: Optional[datetime] = None
+    count: Optional[int] = None
+    # Start times of occurrences that were removed, or completed
+    exceptions: FrozenSet[datetime] = field(default_factory=frozenset)
+    completed: FrozenSet[datetime] = field(default_factory=frozenset)
+
+    def __post_init__(self):
+        """Validate the rule.
+
+        Raises:
+            ValueError: If a field is out of range or the fields conflict
+        """
+        if self.freq not in FREQUENCIES:
+            raise ValueError(f"unknown recurrence frequency {self.freq!r}")
+        if self.interval < 1:
+            raise ValueError("recurrence interval must be at least 1")
+        if any(not 0 <= day <= 6 for day in self.by_weekday):
+            raise ValueError("weekdays must be between 0 (Monday) and 6 (Sunday)")
+        if self.by_weekday and self.freq not in (DAILY, WEEKLY):
+            raise ValueError("weekdays are only supported for daily and weekly rules")
+        if self.until is not None and self.count is not None:
+            raise ValueError("a recurrence ends either at a date or after a count, not both")
+        if self.count is not None and self.count < 1:
+            raise ValueError("recurrence count must be at least 1")
+        object.__setattr__(self, "by_weekday", tuple(sorted(set(self.by_weekday))))
+        object.__setattr__(self, "exceptions", frozenset(self.exceptions))
+        object.__setattr__(self, "completed", frozenset(self.completed))
+
+    @property
+    def summary(self) -> str:
+        """Return a short description, such as "every 2 weeks on Mon, Thu"."""
+        if self.interval == 1:
+            text = self.freq
+        else:
+            text = f"every {self.interval} {_UNITS[self.freq]}s"
+        if self.by_weekday:
+            text += " on " + ", ".join(WEEKDAY_NAMES[day] for day in self.by_weekday)
+        return text
+
+    def _first_period(self, dtstart: datetime, start: datetime) -> int:
+        """Get a period at or before the one containing start."""
+        if self.freq == DAILY:
+            periods = (start - dtstart).days
+        elif self.freq == WEEKLY:
+            monday = dtstart.date() - timedelta(days=dtstart.weekday())
+            periods = (start.date() - monday).days // 7
+        elif self.freq == MONTHLY:
+            periods = (start.year - dtstart.year) * 12 + start.month - dtstart.month
+        else:
+            periods = start.year - dtstart.year
+        return max(0, periods // self.interval)
+
+    def _period(self, dtstart: datetime, period: int) -> Tuple[datetime, List[datetime]]:
+        """Get the start of a period and the rule's candidate times in it."""
+        step = period * self.interval
+        if self.freq == DAILY:
+            begin = dtstart + timedelta(days=step)
+            keep = not self.by_weekday or begin.weekday() in self.by_weekday
+            return begin, [begin] if keep else []
+        if self.freq == WEEKLY:
+            begin = dtstart + timedelta(weeks=step, days=-dtstart.weekday())
+            days = self.by_weekday or (dtstart.weekday(),)
+            return begin, [begin + timedelta(days=day) for day in days
+                           if begin + timedelta(days=day) >= dtstart]
+        if self.freq == MONTHLY:
+            year, month = divmod(dtstart.month - 1 + step, 12)
+            year, month = dtstart.year + year, month + 1
+        else:
+            year, month = dtstart.year + step, dtstart.month
+        if year > MAXYEAR:
+            # Past the last year datetime can hold, which no window reaches
+            return datetime.max, []
+        begin = dtstart.replace(year=year, month=month, day=1)
+        if dtstart.day > days_in_month(year, month):
+            return begin, []
+        return begin, [begin.replace(day=dtstart.day)]
+
+    def occurrences(self, dtstart: datetime, start: datetime, end: datetime) -> List[datetime]:
+        """Get the start times of the occurrences in a window.
+
+        Without a count, the expansion starts at the window rather than at
+        the first occurrence, so its cost depends on the window only.
+
+        Args:
+            dtstart: Start time of the recurring task
+            start: Inclusive lower bound of the window
+            end: Exclusive upper bound of the window
+
+        Returns:
+            Start times in [start, end), excluding exceptions, in order
+        """
+        times: List[datetime] = []
+        # Occurrences are counted from the first one, so a count means
+        # walking from the beginning
+        period = 0 if self.count is not None else self._first_period(dtstart, start)
+        seen = 0
+        while True:
+            begin, candidates = self._period(dtstart, period)
+            if begin >= end or (self.until is not None and begin > self.until):
+                return times
+            for when in candidates:
+                if when >= end or (self.until is not None and when > self.until):
+                    return times
+                if self.count is not None:
+                    if seen == self.count:
+                        return times
+                    seen += 1
+                if when >= start and when not in self.exceptions:
+                    times.append(when)
+            period += 1
+
+    def with_completed(self, when: datetime, completed: bool = True) -> "Recurrence":
+        """Get a copy of the rule with an occurrence marked (un)completed."""
+        if completed:
+            return replace(self, completed=self.completed | {when})
+        return replace(self, completed=self.completed - {when})
+
+    def with_exception(self, when: datetime) -> "Recurrence":
+        """Get a copy of the rule without an occurrence."""
+        return replace(self, exceptions=self.exceptions | {when},
+                       completed=self.completed - {when})
+
+    @classmethod
+    def parse(cls, text: str) -> "Recurrence":
+        """Parse a rule typed as a frequency, an optional interval and
+        optional weekdays, such as "weekly 2 mon,thu".
+
+        Args:
+            text: The rule
+
+        Returns:
+            The parsed rule
+
+        Raises:
+            ValueError: If the text is not a valid rule
+        """
+        words = text.replace(",", " ").lower().split()
+        if not words:
+            raise ValueError("empty recurrence rule")
+        freq, words = words[0], words[1:]
+        interval = 1
+        if words and words[0].isdigit():
+            interval, words = int(words[0]), words[1:]
+        names = [name.lower() for name in WEEKDAY_NAMES]
+        try:
+            by_weekday = tuple(names.index(word[:3]) for word in words)
+        except ValueError:
+            raise ValueError(f"unknown weekday in {text!r}") from None
+        return cls(freq, interval, by_weekday)
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for storage, leaving out defaults."""
+        data = {"freq": self.freq}
+        if self.interval != 1:
+            data["interval"] = self.interval
+        if self.by_weekday:
+            data["by_weekday"] = list(self.by_weekday)
+        if self.until is not None:
+            data["until"] = self.until.isoformat()
+        if self.count is not None:
+            data["count"] = self.count
+        if self.exceptions:
+            data["exceptions"] = sorted(when.isoformat() for when in self.exceptions)
+        if self.completed:
+            data["completed"] = sorted(when.isoformat() for when in self.completed)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Recurrence":
+        """Create a Recurrence from dictionary data."""
+        return cls(
+            freq=data["freq"],
+            interval=data.get("interval", 1),
+            by_weekday=tuple(data.get("by_weekday", ())),
+            until=datetime.fromisoformat(data["until"]) if data.get("until") else None,
+            count=data.get("count"),
+            exceptions=frozenset(datetime.fromisoformat(when)
+                                 for when in data.get("exceptions", ())),
+            completed=frozenset(datetime.fromisoformat(when)
+                                for when in data.get("completed", ())),
+        )
+
+
+class OccurrenceCache:
+    """A small LRU cache of expanded windows.
+
+    Entries are keyed on the window and a version that changes whenever a
+    recurring task does, so stale windows are never returned; they just
+    age out.
+    """
+
+    def __init__(self, maxsize: int = 32):
+        """Initialize the cache.
+
+        Args:
+            maxsize: Number of windows to keep
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._windows: "OrderedDict[tuple, list]" = OrderedDict()
+
+    def get(self, start: datetime, end: datetime, version: int,
+            expand: Callable[[datetime, datetime], list]) -> list:
+        """Get an expanded window, expanding and storing it on a miss.
+
+        Args:
+            start: Inclusive lower bound of the window
+            end: Exclusive upper bound of the window
+            version: Version of the recurring tasks
+            expand: Function expanding a window
+
+        Returns:
+            The expanded window
+        """
+        key = (start, end, version)
+        window = self._windows.get(key)
+        if window is not None:
+            self.hits += 1
+            self._windows.move_to_end(key)
+            return window
+        self.misses += 1
+        window = self._windows[key] = expand(start, end)
+        if len(self._windows) > self.maxsize:
+            self._windows.popitem(last=False)
+        return window
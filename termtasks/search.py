@@ -0,0 +1,252 @@
+"""
+Full-text search over task titles.
+
+Titles are indexed once per distinct title: each normalized title maps to
+the (start, ID) entries of the tasks that have it, sorted by start time,
+and each trigram of a title maps to the titles containing it. A query
+intersects the trigram sets of its pattern, checks the few candidate
+titles, and merges their entry lists, so results come out in start-time
+order without scanning or sorting the tasks.
+"""
+
+import bisect
+import heapq
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from termtasks.utils.date_utils import to_epoch_us
+
+# (start time in epoch microseconds, task ID)
+Entry = Tuple[int, str]
+
+
+def normalize(text: str) -> str:
+    """Lowercase text and collapse runs of whitespace to single spaces."""
+    return " ".join(text.lower().split())
+
+
+def _title_key(title: str) -> str:
+    """Get the indexed form of a title.
+
+    The leading space marks the start of the first word, so a prefix query
+    is a substring query for the prefix after a space.
+    """
+    return " " + normalize(title)
+
+
+def _trigrams(text: str) -> Set[str]:
+    """Get the distinct three-character substrings of text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """Trigram index over task titles.
+
+    ``TaskList`` keeps an attached index current as tasks are added,
+    edited and removed. An index may also hold tasks that are not loaded,
+    such as one read back from the on-disk cache of a lazily loaded store;
+    search results are (start, ID) entries, which callers resolve to tasks.
+
+    Queries shorter than three characters (two for prefix queries) have no
+    trigram and check every distinct title. A query that extends the
+    previous one only checks the previous matches, as when typing.
+    """
+
+    def __init__(self, tasks: Iterable = ()):
+        """Initialize the index.
+
+        Args:
+            tasks: Tasks to index, in any order
+        """
+        # Title key -> entries sorted by start time
+        self._titles: Dict[str, List[Entry]] = {}
+        # Trigram -> title keys containing it
+        self._grams: Dict[str, Set[str]] = {}
+        # Task ID -> (start, title key)
+        self._ids: Dict[str, Tuple[int, str]] = {}
+        self.version = 0
+        # (pattern, matching title keys, version) of the last query
+        self._last: Optional[Tuple[str, List[str], int]] = None
+        self.add_many(tasks)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._ids
+
+    def _entries_for(self, key: str) -> List[Entry]:
+        """Get the entry list of a title, indexing the title if it is new."""
+        entries = self._titles.get(key)
+        if entries is None:
+            entries = self._titles[key] = []
+            for gram in _trigrams(key):
+                self._grams.setdefault(gram, set()).add(key)
+        return entries
+
+    def add(self, task) -> None:
+        """Index a task, replacing any entry it already has."""
+        start, key = to_epoch_us(task.start_time), _title_key(task.title)
+        old = self._ids.get(task.id)
+        if old == (start, key):
+            return
+        if old is not None:
+            self.remove(task.id)
+        self._ids[task.id] = (start, key)
+        bisect.insort(self._entries_for(key), (start, task.id))
+        self.version += 1
+
+    def add_many(self, tasks: Iterable) -> None:
+        """Index many tasks, sorting each touched title's entries once."""
+        touched = set()
+        # Titles repeat, so normalize each distinct one once
+        keys: Dict[str, str] = {}
+        ids, titles = self._ids, self._titles
+        for task in tasks:
+            key = keys.get(task.title)
+            if key is None:
+                key = keys[task.title] = _title_key(task.title)
+            entry = (to_epoch_us(task.start_time), key)
+            old = ids.get(task.id)
+            if old == entry:
+                continue
+            if old is not None:
+                self.remove(task.id)
+            ids[task.id] = entry
+            entries = titles.get(key)
+            if entries is None:
+                entries = self._entries_for(key)
+            entries.append((entry[0], task.id))
+            touched.add(key)
+        for key in touched:
+            self._titles[key].sort()
+        if touched:
+            self.version += 1
+
+    def remove(self, task_id: str) -> None:
+        """Drop a task from the index, if it is there."""
+        old = self._ids.pop(task_id, None)
+        if old is None:
+            return
+        start, key = old
+        entries = self._titles[key]
+        del entries[bisect.bisect_left(entries, (start, task_id))]
+        if not entries:
+            del self._titles[key]
+            for gram in _trigrams(key):
+                titles = self._grams[gram]
+                titles.discard(key)
+                if not titles:
+                    del self._grams[gram]
+        self.version += 1
+
+    def _matching_titles(self, query: str, prefix: bool) -> List[str]:
+        """Get the title keys matching a query."""
+        pattern = normalize(query)
+        if not pattern:
+            return []
+        if prefix:
+            pattern = " " + pattern
+
+        last = self._last
+        if last is not None and last[2] == self.version and pattern.startswith(last[0]):
+            # Anything matching the longer pattern matched the shorter one
+            candidates: Iterable[str] = last[1]
+        elif len(pattern) >= 3:
+            sets = []
+            for gram in _trigrams(pattern):
+                titles = self._grams.get(gram)
+                if titles is None:
+                    return []
+                sets.append(titles)
+            sets.sort(key=len)
+            candidates = sets[0].intersection(*sets[1:])
+        else:
+            candidates = self._titles
+
+        titles = [key for key in candidates if pattern in key]
+        self._last = (pattern, titles, self.version)
+        return titles
+
+    def matches(self, query: str, prefix: bool = False) -> Iterator[Entry]:
+        """Iterate over the tasks whose titles contain a query, ignoring case.
+
+        The index must not change while iterating.
+
+        Args:
+            query: Text to look for
+            prefix: Only match the query at the start of a word
+
+        Returns:
+            Iterator of (start, ID) entries in start-time order
+        """
+        return heapq.merge(*(self._titles[key] for key in self._matching_titles(query, prefix)))
+
+    def search(self, query: str, prefix: bool = False, limit: Optional[int] = None) -> List[Entry]:
+        """Find the tasks whose titles contain a query; see ``matches``.
+
+        Args:
+            query: Text to look for
+            prefix: Only match the query at the start of a word
+            limit: Maximum number of results
+
+        Returns:
+            (start, ID) entries in start-time order
+        """
+        return list(islice(self.matches(query, prefix), limit))
+
+    def count(self, query: str, prefix: bool = False) -> int:
+        """Count the tasks whose titles contain a query, without listing them."""
+        return sum(len(self._titles[key]) for key in self._matching_titles(query, prefix))
+
+    def next_match(self, query: str, after: Optional[Entry] = None, prefix: bool = False,
+                   reverse: bool = False) -> Optional[Entry]:
+        """Find the match following (or preceding) an entry in start-time order.
+
+        Args:
+            query: Text to look for
+            after: Entry to start from, exclusive; None starts from the
+                first (or last) match
+            prefix: Only match the query at the start of a word
+            reverse: Search backwards
+
+        Returns:
+            The (start, ID) entry, or None if there is no such match
+        """
+        best = None
+        for key in self._matching_titles(query, prefix):
+            entries = self._titles[key]
+            if reverse:
+                i = len(entries) if after is None else bisect.bisect_left(entries, after)
+                if i and (best is None or entries[i - 1] > best):
+                    best = entries[i - 1]
+            else:
+                i = 0 if after is None else bisect.bisect_right(entries, after)
+                if i < len(entries) and (best is None or entries[i] < best):
+                    best = entries[i]
+        return best
+
+    def to_dict(self) -> dict:
+        """Convert to a dictionary for the on-disk cache.
+
+        Only titles and their entries are stored; trigrams are cheap to
+        recompute from the distinct titles.
+        """
+        return {
+            "titles": [
+                [key[1:], [start for start, _ in entries], [task_id for _, task_id in entries]]
+                for key, entries in self._titles.items()
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SearchIndex":
+        """Create an index from the on-disk cache."""
+        index = cls()
+        for title, starts, ids in data["titles"]:
+            key = " " + title
+            entries = index._entries_for(key)
+            entries.extend(zip(starts, ids))
+            for entry in entries:
+                index._ids[entry[1]] = (entry[0], key)
+        return index
@@ -0,0 +1,322 @@
+"""
+Compact task representations for very large schedules.
+
+``Task`` is a regular dataclass, so every instance carries a ``__dict__``,
+two ``datetime`` objects and an ID string. ``CompactTask`` is a slotted
+drop-in variant, and ``TaskStore`` keeps whole schedules in columns of
+machine integers, handing out ``TaskView`` objects on demand.
+"""
+
+import bisect
+from array import array
+from datetime import date, datetime, time
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from termtasks.models import Task, TaskList
+from termtasks.recurrence import Recurrence
+from termtasks.utils.date_utils import from_epoch_us, to_epoch_us
+
+try:
+    import numpy as np
+except ImportError:  # Optional; used to vectorize per-day counting
+    np = None
+
+DAY_US = 86400 * 10**6
+MINUTE_US = 60 * 10**6
+
+# Stored in the end column for tasks without an end time
+NO_END = -(2**63)
+
+
+class CompactTask:
+    """A slotted variant of ``Task`` with the same fields and behaviour."""
+
+    __slots__ = ("title", "start_time", "end_time", "completed", "id", "recurrence")
+
+    def __init__(self, title: str, start_time: datetime, end_time: Optional[datetime] = None,
+                 completed: bool = False, id: Optional[str] = None,
+                 recurrence: Optional[Recurrence] = None):
+        """Initialize the task, generating the ID if not provided."""
+        self.title = title
+        self.start_time = start_time
+        self.end_time = end_time
+        self.completed = completed
+        self.id = id
+        self.recurrence = recurrence
+        if self.id is None:
+            self.id = f"{self.start_time.strftime('%Y%m%d%H%M%S')}"
+
+    start_str = Task.start_str
+    end_str = Task.end_str
+    is_all_day = Task.is_all_day
+    to_dict = Task.to_dict
+    from_dict = classmethod(Task.from_dict.__func__)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, (Task, CompactTask, TaskView)):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return (f"CompactTask(title={self.title!r}, start_time={self.start_time!r}, "
+                f"end_time={self.end_time!r}, completed={self.completed!r}, id={self.id!r})")
+
+
+class TaskView:
+    """A lightweight handle on one row of a ``TaskStore``.
+
+    Attributes are read from the store's columns on access. A view stays
+    valid until the store is re-sorted.
+    """
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: "TaskStore", row: int):
+        """Point the view at a row of a store."""
+        self._store = store
+        self._row = row
+
+    @property
+    def title(self) -> str:
+        """Return the task title."""
+        store = self._store
+        return store._strings[store._titles[self._row]]
+
+    @property
+    def start_time(self) -> datetime:
+        """Return the start time."""
+        return from_epoch_us(self._store._starts[self._row])
+
+    @property
+    def end_time(self) -> Optional[datetime]:
+        """Return the end time, if any."""
+        end = self._store._ends[self._row]
+        return None if end == NO_END else from_epoch_us(end)
+
+    @property
+    def completed(self) -> bool:
+        """Return whether the task is completed."""
+        return self._store.is_completed(self._row)
+
+    @completed.setter
+    def completed(self, value: bool) -> None:
+        self._store.set_completed(self._row, value)
+
+    @property
+    def id(self) -> str:
+        """Return the task ID."""
+        task_id = self._store._ids[self._row]
+        if task_id is None:
+            return self.start_time.strftime("%Y%m%d%H%M%S")
+        return task_id
+
+    @property
+    def recurrence(self) -> None:
+        """Return None; a TaskStore holds one-off tasks only."""
+        return None
+
+    @property
+    def is_all_day(self) -> bool:
+        """Return True if the task is an all-day event."""
+        store = self._store
+        return (store._starts[self._row] % DAY_US < MINUTE_US
+                and store._ends[self._row] == NO_END)
+
+    start_str = Task.start_str
+    end_str = Task.end_str
+    to_dict = Task.to_dict
+
+    def to_task(self) -> Task:
+        """Materialize the row as a regular Task."""
+        return Task(self.title, self.start_time, self.end_time, self.completed, self.id)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, (Task, CompactTask, TaskView)):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"TaskView({self.to_dict()!r})"
+
+
+class TaskStore:
+    """Columnar storage for many tasks.
+
+    Start and end times are epoch microseconds in ``array('q')`` columns,
+    completion is a bitmap, and titles are interned in a string table.
+    IDs are only stored when they differ from the one ``Task`` would
+    generate from the start time. Rows are kept in start-time order.
+    Recurrence rules are not kept.
+    """
+
+    def __init__(self, tasks: Iterable[Union[Task, CompactTask, TaskView]] = ()):
+        """Initialize the store.
+
+        Args:
+            tasks: Optional initial tasks, in any order
+        """
+        self._starts = array("q")
+        self._ends = array("q")
+        self._titles = array("I")
+        self._ids: List[Optional[str]] = []
+        self._done = bytearray()
+        self._strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        self._sorted = True
+        for task in tasks:
+            self.append(task)
+
+    @classmethod
+    def from_columns(cls, starts: Iterable[int], ends: Iterable[int], titles: Iterable[str],
+                     ids: Iterable[Optional[str]], completed: Iterable[bool]) -> "TaskStore":
+        """Create a store from parallel columns without building Task objects.
+
+        Args:
+            starts: Start times in epoch microseconds
+            ends: End times in epoch microseconds, or ``NO_END``
+            titles: Task titles
+            ids: Task IDs, or None where the ID is the generated default
+            completed: Completion states
+        """
+        store = cls()
+        store._starts.extend(starts)
+        store._ends.extend(ends)
+        store._titles.extend(store._intern(title) for title in titles)
+        store._ids = list(ids)
+        store._done = bytearray((len(store._starts) + 7) // 8)
+        for row, done in enumerate(completed):
+            if done:
+                store.set_completed(row, True)
+        starts = store._starts
+        store._sorted = all(starts[i] <= starts[i + 1] for i in range(len(starts) - 1))
+        return store
+
+    @classmethod
+    def from_task_list(cls, task_list: TaskList) -> "TaskStore":
+        """Create a store holding the tasks of a TaskList."""
+        return cls(task_list.tasks)
+
+    def to_task_list(self) -> TaskList:
+        """Materialize every row into a regular TaskList."""
+        return TaskList(view.to_task() for view in self)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __getitem__(self, row: int) -> TaskView:
+        self._ensure_sorted()
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("TaskStore index out of range")
+        return TaskView(self, row)
+
+    def __iter__(self) -> Iterator[TaskView]:
+        self._ensure_sorted()
+        for row in range(len(self)):
+            yield TaskView(self, row)
+
+    def _intern(self, text: str) -> int:
+        """Get the string-table index of a string, adding it if needed."""
+        index = self._string_ids.get(text)
+        if index is None:
+            index = len(self._strings)
+            self._strings.append(text)
+            self._string_ids[text] = index
+        return index
+
+    def append(self, task: Union[Task, CompactTask, TaskView]) -> None:
+        """Add a task as a new row.
+
+        Args:
+            task: Any object with the fields of a Task
+        """
+        start = to_epoch_us(task.start_time)
+        if self._starts and start < self._starts[-1]:
+            self._sorted = False
+        row = len(self._starts)
+        self._starts.append(start)
+        self._ends.append(NO_END if task.end_time is None else to_epoch_us(task.end_time))
+        self._titles.append(self._intern(task.title))
+        default_id = task.start_time.strftime("%Y%m%d%H%M%S")
+        self._ids.append(None if task.id == default_id else task.id)
+        if row % 8 == 0:
+            self._done.append(0)
+        self.set_completed(row, task.completed)
+
+    def is_completed(self, row: int) -> bool:
+        """Return whether the task in a row is completed."""
+        return bool(self._done[row >> 3] & (1 << (row & 7)))
+
+    def set_completed(self, row: int, completed: bool) -> None:
+        """Set the completion bit of a row."""
+        if completed:
+            self._done[row >> 3] |= 1 << (row & 7)
+        else:
+            self._done[row >> 3] &= ~(1 << (row & 7)) & 0xFF
+
+    def _ensure_sorted(self) -> None:
+        """Reorder all columns by start time if rows were appended out of order."""
+        if self._sorted:
+            return
+        order = sorted(range(len(self)), key=self._starts.__getitem__)
+        done = [self.is_completed(row) for row in order]
+        self._starts = array("q", (self._starts[row] for row in order))
+        self._ends = array("q", (self._ends[row] for row in order))
+        self._titles = array("I", (self._titles[row] for row in order))
+        self._ids = [self._ids[row] for row in order]
+        self._done = bytearray((len(order) + 7) // 8)
+        for row, completed in enumerate(done):
+            if completed:
+                self.set_completed(row, True)
+        self._sorted = True
+
+    def get_tasks_between(self, start: datetime, end: datetime) -> List[TaskView]:
+        """Get views of the tasks starting in the half-open range [start, end).
+
+        Args:
+            start: Inclusive lower bound on the start time
+            end: Exclusive upper bound on the start time
+
+        Returns:
+            Views in start-time order
+        """
+        self._ensure_sorted()
+        lo = bisect.bisect_left(self._starts, to_epoch_us(start))
+        hi = bisect.bisect_left(self._starts, to_epoch_us(end))
+        return [TaskView(self, row) for row in range(lo, hi)]
+
+    def count_tasks_per_day(self, start: date, days: int,
+                            completed: Optional[bool] = None) -> List[int]:
+        """Count the tasks on each of a run of consecutive days.
+
+        The rows in range are bucketed by start day in a single pass, with
+        ``numpy.bincount`` when NumPy is installed.
+
+        Args:
+            start: First day
+            days: Number of days
+            completed: If given, only count tasks with this completion state
+
+        Returns:
+            One count per day
+        """
+        self._ensure_sorted()
+        origin = to_epoch_us(datetime.combine(start, time.min))
+        lo = bisect.bisect_left(self._starts, origin)
+        hi = bisect.bisect_left(self._starts, origin + days * DAY_US)
+
+        if np is not None:
+            buckets = (np.frombuffer(self._starts, dtype=np.int64)[lo:hi] - origin) // DAY_US
+            if completed is not None:
+                done = np.unpackbits(np.frombuffer(self._done, dtype=np.uint8),
+                                     bitorder="little")[lo:hi].astype(bool)
+                buckets = buckets[done if completed else ~done]
+            return np.bincount(buckets, minlength=days).tolist()
+
+        counts = [0] * days
+        starts = self._starts
+        for row in range(lo, hi):
+            if completed is None or self.is_completed(row) == completed:
+                counts[(starts[row] - origin) // DAY_US] += 1
+        return counts
@@ -0,0 +1,363 @@
+"""
+Screen backends for the TermTasks UI.
+
+The windows and the application draw through the active backend rather
+than the curses module, so they can run against ``HeadlessBackend``, an
+in-memory screen with scripted input, in tests and benchmarks.
+"""
+
+import curses
+import time
+from collections import Counter, deque
+from typing import Callable, Iterable, List, Optional, Tuple
+
+# Color pairs are stored in these attribute bits, as curses does
+COLOR_SHIFT = 8
+A_COLOR = 0xFF << COLOR_SHIFT
+
+# Entry in a headless key script: no key arrives during the next wait, so
+# the frame for the keys typed so far is drawn
+PAUSE = None
+
+# Line drawing characters used by the headless box()
+BOX_CHARS = {"h": "─", "v": "│", "tl": "┌", "tr": "┐", "bl": "└", "br": "┘"}
+
+
+class CursesBackend:
+    """Backend drawing to the terminal with curses."""
+
+    def run(self, func: Callable) -> object:
+        """Set up the terminal, call func with the main screen and restore it."""
+        return curses.wrapper(func)
+
+    def newwin(self, height: int, width: int, y: int, x: int):
+        """Create a window."""
+        return curses.newwin(height, width, y, x)
+
+    def color_pair(self, number: int) -> int:
+        """Get the attribute of a color pair."""
+        return curses.color_pair(number)
+
+    def init_colors(self, pairs: Iterable[Tuple[int, int, int]]) -> None:
+        """Turn on colors, hide the cursor and define color pairs.
+
+        Args:
+            pairs: (pair number, foreground, background) triples
+        """
+        curses.curs_set(0)
+        curses.start_color()
+        curses.use_default_colors()
+        for number, fg, bg in pairs:
+            curses.init_pair(number, fg, bg)
+
+    def doupdate(self) -> None:
+        """Output the changes staged with ``noutrefresh``."""
+        curses.doupdate()
+
+    def ungetch(self, key: int) -> None:
+        """Push a key back onto the input queue."""
+        curses.ungetch(key)
+
+    def echo(self, on: bool) -> None:
+        """Turn echoing of typed keys and the cursor on or off."""
+        if on:
+            curses.echo()
+        else:
+            curses.noecho()
+        curses.curs_set(1 if on else 0)
+
+    def clock(self) -> float:
+        """Get the time in seconds, for timers and frame pacing."""
+        return time.monotonic()
+
+
+class HeadlessWindow:
+    """An in-memory curses window.
+
+    It supports the window methods the UI uses. Each cell holds a
+    character and its attributes; ``calls`` counts calls by method name.
+    """
+
+    def __init__(self, backend: "HeadlessBackend", height: int, width: int, y: int, x: int):
+        self.backend = backend
+        self.height = height
+        self.width = width
+        self.y = y
+        self.x = x
+        self.cells = self._blank(height, width)
+        self.calls: Counter = Counter()
+        self._attrs = 0
+        self._timeout = -1
+
+    def _record(self, name: str) -> None:
+        self.calls[name] += 1
+        self.backend.calls[name] += 1
+
+    @staticmethod
+    def _blank(height: int, width: int) -> List[List[Tuple[str, int]]]:
+        return [[(" ", 0)] * width for _ in range(height)]
+
+    def _put(self, y: int, x: int, text: str, attr: int) -> None:
+        if not (0 <= y < self.height and 0 <= x < self.width):
+            raise curses.error(f"addstr at ({y}, {x}) outside a {self.height}x{self.width} window")
+        row = self.cells[y]
+        for ch in text:
+            row[x] = (ch, attr | self._attrs)
+            x += 1
+            if x == self.width:
+                # Like curses, text wraps onto the next line, and moving the
+                # cursor past the bottom right corner is an error
+                y, x = y + 1, 0
+                if y == self.height:
+                    raise curses.error("addstr past the end of the window")
+                row = self.cells[y]
+
+    def addstr(self, y: int, x: int, text: str, attr: int = 0) -> None:
+        self._record("addstr")
+        self._put(y, x, text, attr)
+
+    def erase(self) -> None:
+        self._record("erase")
+        self.cells = self._blank(self.height, self.width)
+
+    def clear(self) -> None:
+        self._record("clear")
+        self.cells = self._blank(self.height, self.width)
+
+    def clrtoeol(self) -> None:
+        self._record("clrtoeol")
+
+    def box(self) -> None:
+        self._record("box")
+        h, w = self.height - 1, self.width - 1
+        attr = self._attrs
+        for x in range(1, w):
+            self.cells[0][x] = self.cells[h][x] = (BOX_CHARS["h"], attr)
+        for y in range(1, h):
+            self.cells[y][0] = self.cells[y][w] = (BOX_CHARS["v"], attr)
+        self.cells[0][0] = (BOX_CHARS["tl"], attr)
+        self.cells[0][w] = (BOX_CHARS["tr"], attr)
+        self.cells[h][0] = (BOX_CHARS["bl"], attr)
+        self.cells[h][w] = (BOX_CHARS["br"], attr)
+
+    def attron(self, attr: int) -> None:
+        self._attrs |= attr
+
+    def attroff(self, attr: int) -> None:
+        self._attrs &= ~attr
+
+    def keypad(self, flag: bool) -> None:
+        pass
+
+    def touchwin(self) -> None:
+        pass
+
+    def getmaxyx(self) -> Tuple[int, int]:
+        return self.height, self.width
+
+    def resize(self, height: int, width: int) -> None:
+        cells = self._blank(height, width)
+        for y in range(min(height, self.height)):
+            cells[y][:min(width, self.width)] = self.cells[y][:width]
+        self.height, self.width, self.cells = height, width, cells
+
+    def mvwin(self, y: int, x: int) -> None:
+        self.y, self.x = y, x
+
+    def noutrefresh(self) -> None:
+        self._record("noutrefresh")
+        self.backend._stage(self)
+
+    def refresh(self) -> None:
+        self._record("refresh")
+        self.backend._stage(self)
+        self.backend.doupdate()
+
+    def timeout(self, ms: int) -> None:
+        self._timeout = ms
+
+    def getch(self) -> int:
+        self._record("getch")
+        return self.backend._next_key(self._timeout)
+
+    def getstr(self, y: int, x: int, n: int) -> bytes:
+        """Read keys up to Enter, echoing them when echo is on."""
+        self._record("getstr")
+        chars = []
+        while True:
+            key = self.backend._next_key(-1)
+            if key in (10, 13):
+                break
+            if len(chars) < n:
+                chars.append(chr(key))
+        text = "".join(chars)
+        if self.backend.echoing:
+            self._put(y, x, text, 0)
+        return text.encode("utf-8")
+
+    def text(self) -> List[str]:
+        """Get the window's lines as strings."""
+        return ["".join(ch for ch, _ in row) for row in self.cells]
+
+
+class HeadlessBackend:
+    """An in-memory screen with scripted keyboard input.
+
+    Keys given to the constructor or to ``feed`` are returned by
+    ``getch`` in order; keys typed together are handled as one batch, and
+    a ``PAUSE`` between them lets the UI draw a frame. Waiting for a key
+    advances a fake clock instead of sleeping, so timers fire as if the
+    keys were typed in real time; when no key is left, the screen gives up
+    after ``idle_limit`` seconds of fake time. ``doupdate`` copies the staged windows onto ``screen``, and
+    ``frames`` and ``calls`` record the drawing work.
+    """
+
+    def __init__(self, height: int = 40, width: int = 120, keys: Iterable = (),
+                 idle_limit: float = 60.0):
+        """Initialize the screen.
+
+        Args:
+            height: Screen height
+            width: Screen width
+            keys: Keys to type; ints, strings typed a character at a time,
+                or ``PAUSE``
+            idle_limit: Seconds of fake time to wait for a key once the
+                script has run out before raising an error
+        """
+        self.height = height
+        self.width = width
+        self.idle_limit = idle_limit
+        self.screen = HeadlessWindow._blank(height, width)
+        self.frames = 0
+        self.calls: Counter = Counter()
+        self.pairs = {}
+        self.echoing = False
+        self.now = 0.0
+        self.windows: List[HeadlessWindow] = []
+        self._keys: deque = deque()
+        self._staged: List[HeadlessWindow] = []
+        self._idle_since: Optional[float] = None
+        self.feed(keys)
+
+    def feed(self, keys: Iterable) -> None:
+        """Queue more keys to type.
+
+        Args:
+            keys: Ints, strings typed a character at a time, or ``PAUSE``
+        """
+        for key in keys:
+            if isinstance(key, str):
+                self._keys.extend(ord(ch) for ch in key)
+            else:
+                self._keys.append(key)
+
+    def _next_key(self, timeout_ms: int) -> int:
+        if self._keys and self._keys[0] is PAUSE:
+            if timeout_ms == 0:
+                # Draining the keys typed together
+                return -1
+            if timeout_ms > 0:
+                self._keys.popleft()
+                self.now += timeout_ms / 1000
+                return -1
+            # A blocking read just waits for the next key
+            while self._keys and self._keys[0] is PAUSE:
+                self._keys.popleft()
+        if self._keys:
+            self._idle_since = None
+            return self._keys.popleft()
+        if self._idle_since is None:
+            self._idle_since = self.now
+        if timeout_ms < 0 or self.now - self._idle_since >= self.idle_limit:
+            raise RuntimeError("headless screen is waiting for a key but the script has run out")
+        self.now += timeout_ms / 1000
+        return -1
+
+    def _stage(self, window: HeadlessWindow) -> None:
+        if window not in self._staged:
+            self._staged.append(window)
+
+    def run(self, func: Callable) -> object:
+        """Call func with the main screen."""
+        return func(self.newwin(self.height, self.width, 0, 0))
+
+    def newwin(self, height: int, width: int, y: int, x: int) -> HeadlessWindow:
+        """Create a window."""
+        window = HeadlessWindow(self, height, width, y, x)
+        self.windows.append(window)
+        return window
+
+    def color_pair(self, number: int) -> int:
+        """Get the attribute of a color pair."""
+        return number << COLOR_SHIFT
+
+    def init_colors(self, pairs: Iterable[Tuple[int, int, int]]) -> None:
+        """Record the color pairs."""
+        for number, fg, bg in pairs:
+            self.pairs[number] = (fg, bg)
+
+    def doupdate(self) -> None:
+        """Copy the staged windows onto the screen."""
+        self.frames += 1
+        self.calls["doupdate"] += 1
+        for window in self._staged:
+            for y, row in enumerate(window.cells):
+                if 0 <= window.y + y < self.height:
+                    line = self.screen[window.y + y]
+                    for x, cell in enumerate(row[:self.width - window.x]):
+                        line[window.x + x] = cell
+        self._staged = []
+
+    def ungetch(self, key: int) -> None:
+        """Push a key back onto the input queue."""
+        self._keys.appendleft(key)
+
+    def echo(self, on: bool) -> None:
+        """Turn echoing of typed keys on or off."""
+        self.echoing = on
+
+    def clock(self) -> float:
+        """Get the fake time in seconds."""
+        return self.now
+
+    def text(self) -> List[str]:
+        """Get the screen's lines as strings."""
+        return ["".join(ch for ch, _ in row) for row in self.screen]
+
+    def attr_at(self, y: int, x: int) -> int:
+        """Get the attributes of a screen cell."""
+        return self.screen[y][x][1]
+
+    def find(self, text: str) -> Optional[Tuple[int, int]]:
+        """Find text on the screen.
+
+        Returns:
+            The (row, column) of its first occurrence, or None
+        """
+        for y, line in enumerate(self.text()):
+            x = line.find(text)
+            if x >= 0:
+                return y, x
+        return None
+
+
+_backend = CursesBackend()
+
+
+def get_backend():
+    """Get the active screen backend."""
+    return _backend
+
+
+def set_backend(backend) -> object:
+    """Make a backend the active one.
+
+    Args:
+        backend: The backend, such as a ``HeadlessBackend``
+
+    Returns:
+        The previously active backend
+    """
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
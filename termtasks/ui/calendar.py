@@ -2,21 +2,332 @@
 Calendar window component.
 """
 
-import calendar
-import curses
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Set, Tuple
 
-from termtasks.models import TaskList
+from termtasks.models import Task, TaskList
+from termtasks.ui.backend import get_backend
+from termtasks.ui.line_cache import LineCache
 from termtasks.ui.window import Window
-from termtasks.utils.date_utils import get_month_calendar, month_name
+from termtasks.utils.date_utils import days_in_month, get_month_calendar, month_name
+
+DAY_HEADER = "   MON  TUE  WED  THU  FRI  SAT  SUN  "
+# Month view: marks days on which tasks overlap in time
+CONFLICT_MARK = "!"
+
+# Views of the calendar window
+MONTH_VIEW = "month"
+YEAR_VIEW = "year"
+
+# Year view: glyphs for increasing task load, width of a month block
+# (two columns per day) and the space between blocks
+LOAD_GLYPHS = "·░▒▓█"
+YEAR_MONTH_WIDTH = 14
+YEAR_MONTH_GAP = 2
+YEAR_LEGEND = "·░▒▓█ load  green: done  cyan: half done  yellow: overdue"
+
+
+@dataclass
+class MonthModel:
+    """Everything the calendar draws for one month, computed once."""
+
+    year: int
+    month: int
+    # Weeks of day numbers, 0 for days outside the month
+    grid: List[List[int]]
+    # Day of month -> number of tasks, and of completed tasks
+    counts: Dict[int, int]
+    done_counts: Dict[int, int]
+    # Days of month on which the time of two tasks overlaps
+    conflicts: Set[int]
+    # Formatted calendar lines, one per week
+    rows: List[str]
+
+
+def build_month_model(year: int, month: int, task_list: TaskList, today: date) -> MonthModel:
+    """Compute the calendar model of a month.
+
+    Args:
+        year: Year
+        month: Month (1-12)
+        task_list: The task list to count tasks from
+        today: Today's date, which is highlighted
+
+    Returns:
+        The month model
+    """
+    grid = get_month_calendar(year, month)
+    counts = task_list.count_tasks_by_day(year, month)
+    done_counts = task_list.count_tasks_by_day(year, month, completed=True)
+    conflicts = {day.day for day in
+                 task_list.conflict_days(date(year, month, 1), days_in_month(year, month))}
+    today_day = today.day if (today.year, today.month) == (year, month) else 0
+
+    rows = []
+    for week in grid:
+        cal_line = "  "
+        for day in week:
+            if day == 0:
+                cal_line += "     "
+                continue
+            if day == today_day:
+                mark = "*"
+            elif day in counts:
+                mark = "."
+            else:
+                mark = " "
+            cal_line += f" {day:2d}{mark}{CONFLICT_MARK if day in conflicts else ' '} "
+        rows.append(cal_line)
+    return MonthModel(year, month, grid, counts, done_counts, conflicts, rows)
+
+
+@dataclass
+class YearModel:
+    """The year heatmap, computed once per year and layout."""
+
+    year: int
+    # Task and completed-task counts for each day of the year
+    counts: List[int]
+    done_counts: List[int]
+    # Lines of (text, color pair) segments
+    lines: List[List[Tuple[str, int]]]
+
+
+def _day_color(count: int, done: int, day: date, today: date) -> int:
+    """Pick the color pair that shows a day's completion ratio."""
+    if day == today:
+        return 2
+    if not count:
+        return 0
+    if done == count:
+        return 3
+    if 2 * done >= count:
+        return 5
+    if day < today:
+        return 4
+    return 0
+
+
+def build_year_model(year: int, task_list: TaskList, today: date, columns: int = 3) -> YearModel:
+    """Compute the year heatmap.
+
+    Each day is shaded by its task count relative to the busiest day of
+    the year and colored by the share of its tasks that are completed.
+    The counts for all days come from one ``count_tasks_per_day`` call.
+
+    Args:
+        year: Year
+        task_list: The task list to count tasks from; a ``TaskStore``
+            works as well
+        today: Today's date, which is highlighted
+        columns: Number of months side by side
+
+    Returns:
+        The year model
+    """
+    start = date(year, 1, 1)
+    days = (date(year + 1, 1, 1) - start).days
+    counts = task_list.count_tasks_per_day(start, days)
+    done_counts = task_list.count_tasks_per_day(start, days, completed=True)
+    busiest = max(counts) or 1
+
+    lines: List[List[Tuple[str, int]]] = []
+    gap = " " * YEAR_MONTH_GAP
+    for first in range(1, 13, columns):
+        months = range(first, min(first + columns, 13))
+        grids = [get_month_calendar(year, month) for month in months]
+        block: List[List[Tuple[str, int]]] = [
+            [(gap.join(month_name(month)[:3].center(YEAR_MONTH_WIDTH) for month in months), 0)],
+            [(gap.join("M T W T F S S " for _ in months), 0)],
+        ]
+        for week in range(6):
+            segments: List[Tuple[str, int]] = []
+            for i, (month, grid) in enumerate(zip(months, grids)):
+                if i:
+                    segments.append((gap, 0))
+                for day in (grid[week] if week < len(grid) else [0] * 7):
+                    if day == 0:
+                        segments.append(("  ", 0))
+                        continue
+                    when = date(year, month, day)
+                    index = (when - start).days
+                    count = counts[index]
+                    level = 0 if not count else 1 + (len(LOAD_GLYPHS) - 2) * count // busiest
+                    color = _day_color(count, done_counts[index], when, today)
+                    segments.append((LOAD_GLYPHS[level], color))
+                    segments.append((" ", 0))
+            block.append(_join_segments(segments))
+        lines.extend(block)
+        lines.append([])
+    return YearModel(year, counts, done_counts, lines)
+
+
+def _join_segments(segments: List[Tuple[str, int]]) -> List[Tuple[str, int]]:
+    """Merge neighbouring segments of the same color."""
+    joined: List[Tuple[str, int]] = []
+    for text, color in segments:
+        if joined and joined[-1][1] == color:
+            joined[-1] = (joined[-1][0] + text, color)
+        else:
+            joined.append((text, color))
+    return joined
+
+
+def format_today_line(task: Task, width: int) -> str:
+    """Format a task's line in the list of today's tasks.
+
+    Args:
+        task: Task to format
+        width: Width of the content area
+
+    Returns:
+        The line, truncated to fit
+    """
+    task_display = f"  - {task.title} ({task.start_time.strftime('%H:%M')})"
+    if len(task_display) > width - 2:
+        task_display = task_display[:width - 5] + "..."
+    return task_display
+
+
+class CalendarCache:
+    """A small LRU cache of month and year models.
+
+    Models are keyed on the period, the TaskList and its version, and
+    today's date, so any change to the tasks or the passing of midnight
+    makes them stale.
+    """
+
+    def __init__(self, maxsize: int = 12):
+        """Initialize the cache.
+
+        Args:
+            maxsize: Number of months to keep
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._models: "OrderedDict[tuple, object]" = OrderedDict()
+
+    def _get(self, key: tuple, build: Callable[[], object]):
+        """Get a cached model, building and storing it on a miss."""
+        model = self._models.get(key)
+        if model is not None:
+            self.hits += 1
+            self._models.move_to_end(key)
+            return model
+        self.misses += 1
+        model = self._models[key] = build()
+        if len(self._models) > self.maxsize:
+            self._models.popitem(last=False)
+        return model
+
+    def get(self, year: int, month: int, task_list: TaskList, today: date) -> MonthModel:
+        """Get the model of a month, building it if it isn't cached.
+
+        Args:
+            year: Year
+            month: Month (1-12)
+            task_list: The task list to count tasks from
+            today: Today's date
+
+        Returns:
+            The month model
+        """
+        return self._get(
+            (MONTH_VIEW, year, month, id(task_list), task_list.version, today),
+            lambda: build_month_model(year, month, task_list, today),
+        )
+
+    def warm(self, year: int, month: int, task_list: TaskList, today: date,
+             months: int = 1) -> int:
+        """Build the models of the months around a month ahead of time.
+
+        Paging to a neighbouring month then finds its model cached. Models
+        built here don't count as misses.
+
+        Args:
+            year: Year of the month shown
+            month: Month shown (1-12)
+            task_list: The task list to count tasks from
+            today: Today's date
+            months: Number of months to build on either side
+
+        Returns:
+            Number of models built
+        """
+        built = 0
+        for offset in range(-months, months + 1):
+            if not offset:
+                continue
+            other_year, other_month = divmod(year * 12 + month - 1 + offset, 12)
+            other_month += 1
+            key = (MONTH_VIEW, other_year, other_month, id(task_list), task_list.version, today)
+            if key in self._models:
+                continue
+            self._models[key] = build_month_model(other_year, other_month, task_list, today)
+            built += 1
+            if len(self._models) > self.maxsize:
+                self._models.popitem(last=False)
+        return built
+
+    def get_year(self, year: int, task_list: TaskList, today: date,
+                 columns: int = 3) -> YearModel:
+        """Get the heatmap of a year, building it if it isn't cached.
+
+        Args:
+            year: Year
+            task_list: The task list to count tasks from
+            today: Today's date
+            columns: Number of months side by side
+
+        Returns:
+            The year model
+        """
+        return self._get(
+            (YEAR_VIEW, year, columns, id(task_list), task_list.version, today),
+            lambda: build_year_model(year, task_list, today, columns),
+        )
 
 
 class CalendarWindow(Window):
-    """Window for displaying the calendar view."""
+    """Window for displaying the calendar view.
+
+    It shows either one month with today's tasks, or a heatmap of the
+    whole year; ``toggle_view`` switches between them.
+    """
 
     def __init__(self, height: int, width: int, y: int, x: int):
         """Initialize the calendar window."""
         super().__init__(height, width, y, x)
+        self.cache = CalendarCache()
+        self.lines = LineCache(format_today_line)
+        self.view = MONTH_VIEW
+
+    def resize(self, height: int, width: int, y: int, x: int) -> None:
+        """Resize the window, dropping lines formatted for the old width."""
+        super().resize(height, width, y, x)
+        self.lines.clear()
+
+    def toggle_view(self) -> None:
+        """Switch between the month and year views."""
+        self.view = YEAR_VIEW if self.view == MONTH_VIEW else MONTH_VIEW
+
+    def warm(self, current_date: datetime, task_list: TaskList) -> int:
+        """Build the models of the months next to the one shown, in the month view.
+
+        Args:
+            current_date: The current date to display
+            task_list: The task list to display tasks from
+
+        Returns:
+            Number of models built
+        """
+        if self.view != MONTH_VIEW:
+            return 0
+        return self.cache.warm(current_date.year, current_date.month, task_list,
+                               datetime.now().date())
 
     def update(self, current_date: datetime, task_list: TaskList, active: bool = False) -> None:
         """Update the calendar display.
@@ -26,57 +337,39 @@ class CalendarWindow(Window):
             task_list: The task list to display tasks from
             active: Whether this window is active
         """
-        self.win.clear()
-        self.title = f"CALENDAR - {month_name(current_date.month)} {current_date.year}"
+        now = datetime.now()
+        today = now.date()
+        state = (self.view, current_date.year, current_date.month, id(task_list),
+                 task_list.version, active, today)
+        if not self.needs_redraw(state):
+            return
+        if self.view == YEAR_VIEW:
+            self._draw_year(current_date.year, task_list, today, active)
+            return
+
+        model = self.cache.get(current_date.year, current_date.month, task_list, today)
+
+        self.win.erase()
+        self.title = f"CALENDAR - {month_name(model.month)} {model.year}"
         self.draw_border(active)
 
         content_h, content_w = self.get_content_dims()
-        
+
         # Display day headers
-        day_header = "   MON  TUE  WED  THU  FRI  SAT  SUN  "
-        self.win.addstr(1, (content_w - len(day_header)) // 2 + 1, day_header)
-        
-        # Get calendar for current month
-        cal = get_month_calendar(current_date.year, current_date.month)
-        
+        self.win.addstr(1, (content_w - len(DAY_HEADER)) // 2 + 1, DAY_HEADER)
+
         # Display calendar
         row = 2
-        for week in cal:
-            cal_line = "  "
-            for day in week:
-                if day == 0:
-                    cal_line += "     "
-                else:
-                    # Check if there are tasks for this day
-                    day_date = current_date.replace(day=day)
-                    tasks_today = task_list.get_tasks_for_date(day_date)
-                    
-                    # Highlight today's date
-                    today = datetime.now().date()
-                    is_today = day_date.date() == today
-                    
-                    # Format the day number
-                    if is_today:
-                        day_str = f"{day:2d}*"
-                    elif tasks_today:
-                        day_str = f"{day:2d}."
-                    else:
-                        day_str = f"{day:2d} "
-                    
-                    # Add spacing
-                    cal_line += f" {day_str}  "
-            
-            # Display the calendar line
+        for cal_line in model.rows:
             self.win.addstr(row, (content_w - len(cal_line)) // 2 + 1, cal_line)
             row += 1
-            
+
             # Break if we've run out of space
             if row >= content_h - 6:
                 break
-        
+
         # Display tasks for today
-        today = datetime.now()
-        tasks_today = task_list.get_tasks_for_date(today)
+        tasks_today = task_list.get_tasks_for_date(now)
         
         row += 1
         self.win.addstr(row, 2, f"* Today: {len(tasks_today)} tasks")
@@ -85,13 +378,33 @@ class CalendarWindow(Window):
         for i, task in enumerate(tasks_today):
             if row + i + 1 >= content_h:
                 break
-                
-            task_display = f"  - {task.title} ({task.start_time.strftime('%H:%M')})"
-            if len(task_display) > content_w - 2:
-                task_display = task_display[:content_w - 5] + "..."
-                
-            self.win.addstr(row + i + 1, 2, task_display)
+            self.win.addstr(row + i + 1, 2, self.lines.get(task, content_w))
         
         # Display navigation help
-        nav_help = "Navigation: [p]rev month  [n]ext month"
-        self.win.addstr(content_h - 2, 2, nav_help)
+        nav_help = f"Navigation: [p]rev month  [n]ext month  [v] year view  {CONFLICT_MARK} overlap"
+        self.win.addstr(content_h - 2, 2, nav_help[:content_w - 2])
+
+    def _draw_year(self, year: int, task_list: TaskList, today: date, active: bool) -> None:
+        """Draw the year heatmap."""
+        self.win.erase()
+        self.title = f"YEAR - {year}"
+        self.draw_border(active)
+
+        content_h, content_w = self.get_content_dims()
+        columns = max(1, min(4, (content_w - 2 + YEAR_MONTH_GAP)
+                                // (YEAR_MONTH_WIDTH + YEAR_MONTH_GAP)))
+        model = self.cache.get_year(year, task_list, today, columns)
+
+        color_pair = get_backend().color_pair
+        # Keep the legend and help lines free
+        for row, segments in enumerate(model.lines[:max(0, content_h - 4)], start=1):
+            x = 2
+            for text, color in segments:
+                text = text[:content_w - x]
+                if text:
+                    self.win.addstr(row, x, text, color_pair(color) if color else 0)
+                x += len(text)
+
+        self.win.addstr(content_h - 1, 2, YEAR_LEGEND[:content_w - 2])
+        nav_help = "Navigation: [p]rev year  [n]ext year  [v] month view"
+        self.win.addstr(content_h - 2, 2, nav_help[:content_w - 2])
@@ -0,0 +1,174 @@
+"""
+Event loop for the TermTasks UI.
+"""
+
+import heapq
+import itertools
+import math
+import time
+from typing import Callable, List, Optional
+
+
+class Timer:
+    """A callback scheduled on an ``EventLoop``."""
+
+    __slots__ = ("due", "interval", "callback", "cancelled")
+
+    def __init__(self, due: float, interval: Optional[float], callback: Callable[[], object]):
+        """Initialize the timer.
+
+        Args:
+            due: Clock time at which the callback runs next
+            interval: Seconds between runs, or None to run once
+            callback: Function to call; if it returns a true value, a frame
+                is rendered afterwards
+        """
+        self.due = due
+        self.interval = interval
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """Stop the timer from running again."""
+        self.cancelled = True
+
+
+class EventLoop:
+    """Reads input in batches, runs timers and renders at a capped rate.
+
+    Each turn of the loop waits for a key or the next timer, then drains
+    every key already queued without blocking, so the keys typed (or
+    auto-repeated) while a frame was being drawn are handled together and
+    followed by a single frame. Frames are drawn only when something asked
+    for one, and no more than ``max_fps`` times a second.
+    """
+
+    def __init__(self, screen, max_fps: float = 30, clock: Callable[[], float] = time.monotonic):
+        """Initialize the loop.
+
+        Args:
+            screen: Curses window to read keys from
+            max_fps: Maximum number of frames per second
+            clock: Monotonic clock in seconds
+        """
+        self.screen = screen
+        self.frame_interval = 1.0 / max_fps
+        self.clock = clock
+        self._timers: List[tuple] = []
+        self._sequence = itertools.count()
+        self._render_requested = True
+        self._last_frame: Optional[float] = None
+        self._running = False
+
+    def call_later(self, delay: float, callback: Callable[[], object]) -> Timer:
+        """Run a callback once after a delay.
+
+        Args:
+            delay: Seconds to wait
+            callback: Function to call; see ``Timer``
+
+        Returns:
+            The timer, which can be cancelled
+        """
+        return self._schedule(Timer(self.clock() + delay, None, callback))
+
+    def call_every(self, interval: float, callback: Callable[[], object]) -> Timer:
+        """Run a callback repeatedly.
+
+        Args:
+            interval: Seconds between runs; the first run is one interval away
+            callback: Function to call; see ``Timer``
+
+        Returns:
+            The timer, which can be cancelled
+        """
+        return self._schedule(Timer(self.clock() + interval, interval, callback))
+
+    def _schedule(self, timer: Timer) -> Timer:
+        """Add a timer to the queue."""
+        heapq.heappush(self._timers, (timer.due, next(self._sequence), timer))
+        return timer
+
+    def request_render(self) -> None:
+        """Ask for a frame to be drawn as soon as the frame rate allows."""
+        self._render_requested = True
+
+    def stop(self) -> None:
+        """Make ``run`` return after the current turn."""
+        self._running = False
+
+    def _run_timers(self, now: float) -> None:
+        """Run the timers that are due."""
+        while self._timers and self._timers[0][0] <= now:
+            _, _, timer = heapq.heappop(self._timers)
+            if timer.cancelled:
+                continue
+            if timer.callback():
+                self._render_requested = True
+            if timer.interval is not None and not timer.cancelled:
+                # Skip runs missed while busy instead of running them back to back
+                timer.due = max(timer.due + timer.interval, now)
+                self._schedule(timer)
+
+    def _next_wakeup(self, now: float) -> Optional[float]:
+        """Get how long to wait for input, or None to wait indefinitely."""
+        deadlines = []
+        while self._timers and self._timers[0][2].cancelled:
+            heapq.heappop(self._timers)
+        if self._timers:
+            deadlines.append(self._timers[0][0])
+        if self._render_requested and self._last_frame is not None:
+            deadlines.append(self._last_frame + self.frame_interval)
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines) - now)
+
+    def read_keys(self, timeout: Optional[float]) -> List[int]:
+        """Wait for a key, then drain every key already queued.
+
+        Args:
+            timeout: Seconds to wait for the first key, or None to block
+
+        Returns:
+            The keys read, possibly none
+        """
+        # Round up, so a wait for a deadline doesn't wake just short of it
+        self.screen.timeout(-1 if timeout is None else math.ceil(timeout * 1000))
+        try:
+            key = self.screen.getch()
+            if key == -1:
+                return []
+            keys = [key]
+            self.screen.timeout(0)
+            while True:
+                key = self.screen.getch()
+                if key == -1:
+                    return keys
+                keys.append(key)
+        finally:
+            # Key handlers prompt with getch/getstr, which must block
+            self.screen.timeout(-1)
+
+    def run(self, handle_keys: Callable[[List[int]], object], render: Callable[[], None]) -> None:
+        """Run until ``stop`` is called.
+
+        Args:
+            handle_keys: Called with each batch of keys; a frame is rendered
+                afterwards
+            render: Draws a frame
+        """
+        self._running = True
+        while self._running:
+            now = self.clock()
+            # Compare with the same sum ``_next_wakeup`` waits for
+            if self._render_requested and (
+                    self._last_frame is None or now >= self._last_frame + self.frame_interval):
+                self._render_requested = False
+                self._last_frame = now
+                render()
+
+            keys = self.read_keys(self._next_wakeup(self.clock()))
+            self._run_timers(self.clock())
+            if keys:
+                handle_keys(keys)
+                self._render_requested = True
@@ -0,0 +1,56 @@
+"""
+Cache of formatted task lines for the UI windows.
+"""
+
+from typing import Callable, Dict, Tuple
+
+from termtasks.models import Task
+
+
+class LineCache:
+    """Formatted display lines of tasks, reused until they go stale.
+
+    A line is kept per task ID along with the task's version and the
+    width it was formatted for, so editing the task or resizing the window
+    formats it again. The task object itself is checked too, since a task
+    removed and added again can come back under the same ID and version.
+    """
+
+    def __init__(self, format_line: Callable[[Task, int], str], maxsize: int = 4096):
+        """Initialize the cache.
+
+        Args:
+            format_line: Function formatting a task's line for a width
+            maxsize: Number of lines to keep; the cache is emptied when full
+        """
+        self.format_line = format_line
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lines: Dict[str, Tuple[Task, int, int, str]] = {}
+
+    def get(self, task: Task, width: int) -> str:
+        """Get the formatted line of a task.
+
+        Args:
+            task: Task to format
+            width: Width the line must fit in
+
+        Returns:
+            The formatted line
+        """
+        entry = self._lines.get(task.id)
+        if entry is not None and entry[0] is task and entry[1] == task.version and entry[2] == width:
+            self.hits += 1
+            return entry[3]
+        self.misses += 1
+        if entry is None and len(self._lines) >= self.maxsize:
+            # Lines of removed tasks are only dropped here
+            self._lines.clear()
+        line = self.format_line(task, width)
+        self._lines[task.id] = (task, task.version, width, line)
+        return line
+
+    def clear(self) -> None:
+        """Drop every cached line."""
+        self._lines.clear()
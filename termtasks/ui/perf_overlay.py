@@ -0,0 +1,65 @@
+"""
+Performance overlay window component.
+"""
+
+from typing import Optional
+
+from termtasks.ui.window import Window
+from termtasks.utils.perf import Profiler
+
+# Stages shown by the overlay, with their labels
+OVERLAY_STAGES = (("frame", "frame"), ("save", "save"), ("reload", "reload"))
+
+
+class PerfOverlay(Window):
+    """Small window showing frame and storage timings over the calendar."""
+
+    HEIGHT = 7
+    WIDTH = 40
+    # Smallest useful size: the border around one truncated line
+    MIN_HEIGHT = 3
+    MIN_WIDTH = 12
+
+    def __init__(self, height: int, width: int, y: int, x: int):
+        """Initialize the overlay window."""
+        super().__init__(height, width, y, x, "PERF")
+
+    @classmethod
+    def fit(cls, screen_height: int, screen_width: int) -> Optional["PerfOverlay"]:
+        """Create the overlay over the top right corner of a screen.
+
+        On a small screen the overlay shrinks, showing fewer or shorter lines.
+
+        Args:
+            screen_height: Screen height
+            screen_width: Screen width
+
+        Returns:
+            The overlay, or None if the screen is too small for it
+        """
+        height = min(cls.HEIGHT, screen_height - 1)
+        width = min(cls.WIDTH, screen_width - 1)
+        if height < cls.MIN_HEIGHT or width < cls.MIN_WIDTH:
+            return None
+        return cls(height, width, 1, screen_width - width - 1)
+
+    def update(self, profiler: Profiler, task_count: int) -> None:
+        """Update the overlay.
+
+        Args:
+            profiler: Profiler holding the timings
+            task_count: Number of tasks loaded
+        """
+        lines = []
+        for name, label in OVERLAY_STAGES:
+            stage = profiler.stage(name)
+            lines.append(f"{label:7s}{stage.last * 1000:7.2f} ms  p95{stage.percentile(95) * 1000:7.2f} ms")
+        lines.append(f"tasks {task_count:>9}  frames {profiler.frames:>9}")
+        lines = tuple(lines)
+        if not self.needs_redraw(lines):
+            return
+
+        self.win.erase()
+        self.draw_border()
+        for row, line in enumerate(lines[:self.height - 2], start=1):
+            self.win.addstr(row, 2, line[:self.width - 4])
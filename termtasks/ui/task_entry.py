@@ -3,10 +3,12 @@ Task entry window component.
 """
 
 import curses
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional
 
-from termtasks.models import Task
+from termtasks.models import Task, TaskList
+from termtasks.recurrence import Recurrence
+from termtasks.ui.backend import get_backend
 from termtasks.ui.window import Window
 
 
@@ -17,9 +19,16 @@ class TaskEntryWindow(Window):
         """Initialize the task entry window."""
         super().__init__(height, width, y, x, "TASK ENTRY")
 
-    def update(self) -> None:
-        """Update the task entry display."""
-        self.win.clear()
+    def update(self, status: str = "") -> None:
+        """Update the task entry display.
+
+        Args:
+            status: Save status to show below the shortcuts
+        """
+        if not self.needs_redraw(status):
+            return
+
+        self.win.erase()
         self.draw_border()
 
         # Display task entry form
@@ -27,33 +36,74 @@ class TaskEntryWindow(Window):
         self.win.addstr(3, 2, "Date (YYYY-MM-DD): ____-__-__")
         self.win.addstr(4, 2, "Start time (HH:MM): __:__")
         self.win.addstr(5, 2, "End time (HH:MM): __:__ (optional)")
+        self.win.addstr(6, 2, "Repeat (e.g. weekly 2 mon,thu): (optional)"[:self.width - 4])
 
         # Display shortcuts
-        self.win.addstr(7, 2, "[a]dd task  [c]omplete task  [q]uit")
+        self.win.addstr(7, 2, "[a]dd task  [f]ree slot  [c]omplete task  [g]o to date  [/] search  [q]uit"[:self.width - 4])
+
+        # Display save status
+        if status:
+            self.win.addstr(8, 2, status[:self.width - 4], get_backend().color_pair(4))
+
+    def prompt_for_date(self, stdscr) -> Optional[datetime]:
+        """Prompt the user for a date to jump to.
+
+        Args:
+            stdscr: The main curses screen
+
+        Returns:
+            The date, today if left empty, or None if it is invalid
+        """
+        # The prompt overwrites the form, so redraw it afterwards
+        self.invalidate()
+        get_backend().echo(True)  # Show typed keys and the cursor
+
+        default_date = datetime.now().strftime("%Y-%m-%d")
+        self.win.addstr(2, 2, f"Go to date (YYYY-MM-DD) [{default_date}]: ")
+        self.win.clrtoeol()
+        date_str = self.win.getstr(2, 40, 10).decode('utf-8') or default_date
 
-    def prompt_for_task(self, stdscr) -> Optional[Task]:
+        # Reset cursor state
+        get_backend().echo(False)
+
+        try:
+            return datetime.strptime(date_str, "%Y-%m-%d")
+        except ValueError:
+            # Display error message
+            self.win.addstr(6, 2, "Invalid date format!", curses.A_BOLD)
+            self.win.refresh()
+            stdscr.getch()  # Wait for key press
+            return None
+
+    def prompt_for_task(self, stdscr, task_list: Optional[TaskList] = None,
+                        start: Optional[datetime] = None,
+                        end: Optional[datetime] = None) -> Optional[Task]:
         """Prompt the user for task details.
 
         Args:
             stdscr: The main curses screen
+            task_list: If given, warn when the task's time overlaps tasks
+                in it, and ask whether to add it anyway
+            start: Default date and start time, instead of now
+            end: Default end time, on the task's date
 
         Returns:
             Task object or None if cancelled
         """
-        curses.echo()
-        curses.curs_set(1)  # Show cursor
+        # The prompts overwrite the form, so redraw it afterwards
+        self.invalidate()
+        get_backend().echo(True)  # Show typed keys and the cursor
 
         # Get task title
         self.win.addstr(2, 2, "Task: ")
         self.win.clrtoeol()
         title = self.win.getstr(2, 8, 40).decode('utf-8')
         if not title:
-            curses.noecho()
-            curses.curs_set(0)  # Hide cursor
+            get_backend().echo(False)
             return None
 
         # Get date
-        today = datetime.now()
+        today = start or datetime.now()
         default_date = today.strftime("%Y-%m-%d")
         self.win.addstr(3, 2, f"Date (YYYY-MM-DD) [{default_date}]: ")
         self.win.clrtoeol()
@@ -70,13 +120,20 @@ class TaskEntryWindow(Window):
             start_time_str = default_time
 
         # Get end time (optional)
-        self.win.addstr(5, 2, "End time (HH:MM) [optional]: ")
+        default_end = end.strftime("%H:%M") if end else "optional"
+        self.win.addstr(5, 2, f"End time (HH:MM) [{default_end}]: ")
         self.win.clrtoeol()
         end_time_str = self.win.getstr(5, 32, 5).decode('utf-8')
+        if not end_time_str and end:
+            end_time_str = default_end
+
+        # Get recurrence rule (optional)
+        self.win.addstr(6, 2, "Repeat [optional]: ")
+        self.win.clrtoeol()
+        repeat_str = self.win.getstr(6, 21, 30).decode('utf-8')
 
         # Reset cursor state
-        curses.noecho()
-        curses.curs_set(0)  # Hide cursor
+        get_backend().echo(False)
 
         try:
             # Parse datetime
@@ -85,16 +142,88 @@ class TaskEntryWindow(Window):
             if end_time_str:
                 end_datetime = datetime.strptime(f"{date_str} {end_time_str}", "%Y-%m-%d %H:%M")
 
+            recurrence = Recurrence.parse(repeat_str) if repeat_str.strip() else None
+
             # Create task
-            return Task(
+            task = Task(
                 title=title,
                 start_time=start_datetime,
                 end_time=end_datetime,
-                completed=False
+                completed=False,
+                recurrence=recurrence,
             )
         except ValueError:
             # Display error message
-            self.win.addstr(6, 2, "Invalid date/time format!", curses.A_BOLD)
+            self.win.addstr(6, 2, "Invalid date/time or repeat format!", curses.A_BOLD)
+            self.win.clrtoeol()
             self.win.refresh()
             stdscr.getch()  # Wait for key press
             return None
+
+        if task_list is not None and not self.confirm_conflicts(stdscr, task, task_list):
+            return None
+        return task
+
+    def prompt_for_duration(self, stdscr, default: int = 60) -> Optional[timedelta]:
+        """Prompt the user for the length of a free slot to look for.
+
+        Args:
+            stdscr: The main curses screen
+            default: Minutes used if the answer is left empty
+
+        Returns:
+            The length, or None if it is invalid
+        """
+        # The prompt overwrites the form, so redraw it afterwards
+        self.invalidate()
+        get_backend().echo(True)  # Show typed keys and the cursor
+
+        prompt = f"Free slot length in minutes [{default}]: "
+        self.win.addstr(2, 2, prompt)
+        self.win.clrtoeol()
+        minutes_str = self.win.getstr(2, 2 + len(prompt), 4).decode('utf-8') or str(default)
+
+        # Reset cursor state
+        get_backend().echo(False)
+
+        if not minutes_str.isdigit() or not int(minutes_str):
+            self.show_message(stdscr, "Invalid length!")
+            return None
+        return timedelta(minutes=int(minutes_str))
+
+    def show_message(self, stdscr, message: str) -> None:
+        """Show a message in the form and wait for a key press.
+
+        Args:
+            stdscr: The main curses screen
+            message: Message to show
+        """
+        self.invalidate()
+        self.win.addstr(6, 2, message[:self.width - 4], curses.A_BOLD)
+        self.win.clrtoeol()
+        self.win.refresh()
+        stdscr.getch()  # Wait for key press
+
+    def confirm_conflicts(self, stdscr, task: Task, task_list: TaskList) -> bool:
+        """Warn if a task's time overlaps other tasks, and ask to go ahead.
+
+        Args:
+            stdscr: The main curses screen
+            task: The task to check
+            task_list: The tasks to check against
+
+        Returns:
+            Whether there is no conflict or the user confirmed
+        """
+        conflicts = task_list.conflicts(task)
+        if not conflicts:
+            return True
+        first = conflicts[0]
+        warning = f"Overlaps {first.title} ({first.start_time.strftime('%H:%M')}-{first.end_str})"
+        if len(conflicts) > 1:
+            warning += f" and {len(conflicts) - 1} more"
+        self.invalidate()
+        self.win.addstr(6, 2, f"{warning}. Add anyway? [y/N]"[:self.width - 4], curses.A_BOLD)
+        self.win.clrtoeol()
+        self.win.refresh()
+        return stdscr.getch() in (ord('y'), ord('Y'))
@@ -3,55 +3,157 @@ Task list window component.
 """
 
 import curses
-from termtasks.models import TaskList
+from typing import Optional
+
+from termtasks.models import Task, TaskList
+from termtasks.search import normalize
+from termtasks.ui.backend import get_backend
+from termtasks.ui.line_cache import LineCache
 from termtasks.ui.window import Window
 
 
+def format_task_line(task: Task, width: int) -> str:
+    """Format a task's line in the task list.
+
+    Args:
+        task: Task to format
+        width: Width of the window
+
+    Returns:
+        The line, truncated to fit inside the border
+    """
+    if task.recurrence is not None:
+        task_str = f"↻ {task.start_str} {task.title} ({task.recurrence.summary})"
+    else:
+        check = "☑" if task.completed else "☐"
+        task_str = f"{check} {task.start_str} {task.title}"
+    if len(task_str) > width - 4:
+        task_str = task_str[:width - 7] + "..."
+    return task_str
+
+
 class TaskListWindow(Window):
-    """Window for displaying the task list."""
+    """Window for displaying the task list.
+
+    Only the tasks inside a viewport are drawn. The viewport scrolls to
+    keep the selected task visible, so the cost of a frame depends on the
+    window height, not on the number of tasks. While searching, matches of
+    the query are highlighted in the visible titles.
+    """
 
     def __init__(self, height: int, width: int, y: int, x: int):
         """Initialize the task list window."""
         super().__init__(height, width, y, x, "TASK LIST")
+        self._selected = 0
+        # Index of the task on the first visible row
+        self.top = 0
+        self.lines = LineCache(format_task_line)
+        self._search = ""
+
+    @property
+    def page_size(self) -> int:
+        """Return the number of visible task rows."""
+        return max(1, self.height - 2)
+
+    def _follow(self, selected_index: int, count: int) -> None:
+        """Scroll the viewport just enough to show the selected task."""
+        rows = self.page_size
+        if selected_index < self.top:
+            self.top = selected_index
+        elif selected_index >= self.top + rows:
+            self.top = selected_index - rows + 1
+        self.top = max(0, min(self.top, count - rows))
 
-    def update(self, task_list: TaskList, selected_index: int, active: bool = False) -> None:
+    def update(self, task_list: TaskList, selected_index: int, active: bool = False,
+               search: Optional[str] = None, matches: int = 0) -> None:
         """Update the task list display.
 
+        When only the selection moved within the viewport, just the two
+        affected lines are redrawn.
+
         Args:
             task_list: The task list to display
             selected_index: Index of the selected task
             active: Whether this window is active
+            search: Search query to show and highlight, or None when not
+                searching
+            matches: Number of tasks matching the query
         """
-        self.win.clear()
+        count = len(task_list.tasks)
+        previous = self._selected
+        self._selected = selected_index
+        self._search = normalize(search or "")
+        self._follow(selected_index, count)
+        state = (id(task_list), task_list.version, active, self.top, search, matches)
+        if not self.needs_redraw(state):
+            if selected_index != previous:
+                for i in (previous, selected_index):
+                    self._draw_task(task_list, i, active)
+                self._draw_position(count, active)
+            return
+
+        self.win.erase()
         self.draw_border(active)
+        if search is not None:
+            label = f" /{search}  {matches} match{'es' if matches != 1 else ''} "
+            self.win.addstr(self.height - 1, 2, label[:self.width - 4], curses.A_BOLD)
 
-        if not task_list.tasks:
+        if not count:
             content_h, content_w = self.get_content_dims()
             message = "No tasks scheduled"
             x = (content_w - len(message)) // 2
             self.win.addstr(content_h // 2, x + 1, message)
             return
 
-        # Display tasks
-        for i, task in enumerate(task_list.tasks):
-            # Skip if out of view
-            if i >= self.height - 2:
-                break
-
-            # Determine display attributes
-            attr = 0
-            if i == selected_index and active:
-                attr = curses.color_pair(2)
-            elif task.completed:
-                attr = curses.color_pair(3)
-
-            # Format task
-            check = "☑" if task.completed else "☐"
-            task_str = f"{check} {task.start_str} {task.title}"
-
-            # Truncate if needed
-            if len(task_str) > self.width - 4:
-                task_str = task_str[:self.width - 7] + "..."
-
-            # Display the task
-            self.win.addstr(i + 1, 2, task_str, attr)
+        # Display the visible slice of tasks
+        for i in range(self.top, min(count, self.top + self.page_size)):
+            self._draw_task(task_list, i, active)
+        self._draw_position(count, active)
+
+    def _draw_task(self, task_list: TaskList, i: int, active: bool) -> None:
+        """Draw the line of the task at index i, if it is in view."""
+        # Skip if out of view
+        if not self.top <= i < min(len(task_list.tasks), self.top + self.page_size):
+            return
+        task = task_list.tasks[i]
+
+        # Determine display attributes
+        attr = 0
+        selected = i == self._selected and active
+        if selected:
+            attr = get_backend().color_pair(2)
+        elif task.completed:
+            attr = get_backend().color_pair(3)
+
+        line = self.lines.get(task, self.width)
+        self.draw_line(i - self.top + 1, line, attr)
+        if self._search:
+            self._highlight(i - self.top + 1, task, line,
+                            attr | curses.A_UNDERLINE if selected
+                            else get_backend().color_pair(5) | curses.A_BOLD)
+
+    def _highlight(self, row: int, task: Task, line: str, attr: int) -> None:
+        """Draw the first match of the search query in a task's title with attr."""
+        query = self._search
+        # Matches in the check mark or the time are not title matches
+        start = line.lower().find(query, len(task.start_str) + 3)
+        visible = self.width - 4
+        if start < 0 or start >= visible:
+            return
+        self.win.addstr(row, 2 + start, line[start:min(start + len(query), visible)], attr)
+
+    def resize(self, height: int, width: int, y: int, x: int) -> None:
+        """Resize the window, dropping lines formatted for the old width."""
+        super().resize(height, width, y, x)
+        self.lines.clear()
+
+    def _draw_position(self, count: int, active: bool) -> None:
+        """Show the selected position on the bottom border when the list scrolls."""
+        if count <= self.page_size:
+            return
+        # Fixed width for a given count, so a new label covers the old one
+        position = f" {self._selected + 1:>{len(str(count))}}/{count} "
+        x = self.width - len(position) - 2
+        if x > 0:
+            attr = curses.A_BOLD if active else 0
+            self.win.addstr(self.height - 1, x, position, attr)
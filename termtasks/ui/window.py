@@ -0,0 +1,127 @@
+"""
+Base window class for TermTasks UI.
+"""
+
+import curses
+from typing import Hashable, Tuple
+
+from termtasks.ui.backend import get_backend
+
+
+class Window:
+    """Base class for UI windows.
+
+    Windows redraw only when what they show has changed. ``update``
+    implementations summarize their inputs in a hashable state and call
+    ``needs_redraw``; unchanged windows are left alone, and changed ones
+    are erased (not cleared, which would force curses to repaint the whole
+    terminal) or patched line by line with ``draw_line``. Frames are
+    output with ``noutrefresh`` on each window and one ``doupdate``.
+
+    The curses window is created by the active screen backend; see
+    ``termtasks.ui.backend``.
+    """
+
+    def __init__(self, height: int, width: int, y: int, x: int, title: str = ""):
+        """Initialize a window.
+
+        Args:
+            height: Window height
+            width: Window width
+            y: Y position (row)
+            x: X position (column)
+            title: Window title
+        """
+        self.height = height
+        self.width = width
+        self.y = y
+        self.x = x
+        self.title = title
+        self.win = get_backend().newwin(height, width, y, x)
+        self.win.keypad(True)
+        # Whether the content must be redrawn whatever the state
+        self.dirty = True
+        self._state: Hashable = None
+
+    def needs_redraw(self, state: Hashable) -> bool:
+        """Check whether the content must be redrawn, and remember the state.
+
+        Args:
+            state: A summary of everything the content depends on
+
+        Returns:
+            True if the window was invalidated or the state changed
+        """
+        if self.dirty or state != self._state:
+            self.dirty = False
+            self._state = state
+            return True
+        return False
+
+    def invalidate(self) -> None:
+        """Force a full redraw on the next update."""
+        self.dirty = True
+
+    def draw_line(self, row: int, text: str, attr: int = 0) -> None:
+        """Replace one line of the content area.
+
+        Args:
+            row: Window row, inside the border
+            text: Text to draw from column 2; truncated to fit
+            attr: Attributes for the text
+        """
+        content_w = self.width - 2
+        self.win.addstr(row, 1, " " * content_w)
+        self.win.addstr(row, 2, text[:content_w - 2], attr)
+
+    def draw_border(self, active: bool = False) -> None:
+        """Draw a border around the window.
+
+        Args:
+            active: Whether this is the active window
+        """
+        attr = curses.A_BOLD if active else 0
+        self.win.attron(attr)
+        self.win.box()
+        self.win.attroff(attr)
+
+        # Draw title if provided
+        if self.title:
+            title_x = (self.width - len(self.title) - 4) // 2
+            if title_x < 1:
+                title_x = 1
+            self.win.addstr(0, title_x, f" {self.title} ", attr)
+
+    def get_content_dims(self) -> Tuple[int, int]:
+        """Get dimensions for the content area (inside border)."""
+        return self.height - 2, self.width - 2
+
+    def clear(self) -> None:
+        """Clear the window."""
+        self.win.erase()
+        self.dirty = True
+
+    def refresh(self) -> None:
+        """Refresh the window."""
+        self.win.refresh()
+
+    def noutrefresh(self) -> None:
+        """Stage the window's changes for the next ``doupdate``."""
+        self.win.noutrefresh()
+
+    def resize(self, height: int, width: int, y: int, x: int) -> None:
+        """Resize and reposition the window.
+
+        Args:
+            height: New height
+            width: New width
+            y: New Y position
+            x: New X position
+        """
+        self.height = height
+        self.width = width
+        self.y = y
+        self.x = x
+        self.win.resize(height, width)
+        self.win.mvwin(y, x)
+        self.dirty = True
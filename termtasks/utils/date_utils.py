@@ -6,6 +6,8 @@ import calendar
 from datetime import datetime, timedelta
 from typing import List
 
+EPOCH = datetime(1970, 1, 1)
+
 
 def month_name(month: int) -> str:
     """Get the name of a month.
@@ -76,6 +78,46 @@ def prev_month(date: datetime) -> datetime:
         return datetime(date.year, date.month - 1, 1)
 
 
+def shift_month(date: datetime, months: int) -> datetime:
+    """Get the first day of the month a number of months away.
+
+    Args:
+        date: Current date
+        months: Number of months to move; negative moves backwards
+
+    Returns:
+        Date representing the first day of the target month
+    """
+    index = date.year * 12 + date.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def to_epoch_us(date: datetime) -> int:
+    """Convert a naive datetime to microseconds since 1970-01-01.
+
+    The datetime is taken as-is, without any timezone conversion.
+
+    Args:
+        date: Date/time to convert
+
+    Returns:
+        Microseconds since the epoch
+    """
+    return (date - EPOCH) // timedelta(microseconds=1)
+
+
+def from_epoch_us(value: int) -> datetime:
+    """Convert microseconds since 1970-01-01 back to a naive datetime.
+
+    Args:
+        value: Microseconds since the epoch
+
+    Returns:
+        datetime object
+    """
+    return EPOCH + timedelta(microseconds=value)
+
+
 def format_date_for_display(date: datetime) -> str:
     """Format a date for display.
 
@@ -0,0 +1,366 @@
+"""
+Lazily loaded JSON storage for TermTasks.
+"""
+
+import bisect
+import heapq
+import json
+import os
+import re
+import struct
+from array import array
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from termtasks.models import Task, TaskList
+from termtasks.utils.date_utils import next_month, to_epoch_us
+from termtasks.utils.storage import TaskStorage, atomic_write, in_ranges
+
+DAY_US = 86400 * 10**6
+
+# Start of the tasks array in a tasks.json document
+_ARRAY_START = re.compile(r'\s*\{\s*"tasks"\s*:\s*\[')
+# Whitespace and commas between records
+_SEPARATOR = re.compile(r'[\s,]*')
+# Index entries with any flag set
+_FLAGGED = re.compile(rb'[^\x00]')
+
+_CHUNK_SIZE = 1 << 20
+
+
+class OffsetIndex:
+    """Sorted (start time, byte offset, length, flags) entries for a tasks.json file.
+
+    Start times are stored as epoch microseconds; the flags mark recurring
+    tasks. The index is kept in a
+    ``<file>.idx`` sidecar together with the size and modification time of
+    the file it describes, so a stale sidecar is detected and rebuilt.
+    """
+
+    MAGIC = b"TTIX"
+    VERSION = 2
+    HEADER = struct.Struct("<4sIqqq")
+
+    # Entry flags
+    RECURRING = 0x01
+
+    def __init__(self, starts: array = None, offsets: array = None, lengths: array = None,
+                 flags: array = None):
+        """Initialize the index from parallel arrays sorted by start time."""
+        self.starts = starts if starts is not None else array("q")
+        self.offsets = offsets if offsets is not None else array("q")
+        self.lengths = lengths if lengths is not None else array("q")
+        self.flags = flags if flags is not None else array("B")
+
+    @property
+    def columns(self) -> Tuple[array, ...]:
+        """Return the parallel arrays, in file order."""
+        return self.starts, self.offsets, self.lengths, self.flags
+
+    def append(self, start: int, offset: int, length: int, flags: int) -> None:
+        """Add an entry after the last one."""
+        self.starts.append(start)
+        self.offsets.append(offset)
+        self.lengths.append(length)
+        self.flags.append(flags)
+
+    def recurring(self) -> List[int]:
+        """Get the positions of the entries of recurring tasks."""
+        # Most entries have no flags; search for the others at C speed
+        flags = self.flags
+        return [match.start() for match in _FLAGGED.finditer(flags.tobytes())
+                if flags[match.start()] & self.RECURRING]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def range(self, start: datetime, end: datetime) -> Tuple[int, int]:
+        """Get the entry positions for start times in [start, end)."""
+        lo = bisect.bisect_left(self.starts, to_epoch_us(start))
+        hi = bisect.bisect_left(self.starts, to_epoch_us(end))
+        return lo, hi
+
+    @classmethod
+    def build(cls, filepath: str) -> "OffsetIndex":
+        """Build the index by scanning a tasks.json file.
+
+        Records are decoded to find their start time, but no Task objects
+        are created. The file is read in chunks decoded as Latin-1, so
+        character positions equal byte offsets.
+
+        Raises:
+            ValueError: If the file is not a tasks.json document
+        """
+        decoder = json.JSONDecoder()
+        entries = []
+        with open(filepath, "rb") as f:
+            text = f.read(_CHUNK_SIZE).decode("latin-1")
+            eof = len(text) < _CHUNK_SIZE
+            match = _ARRAY_START.match(text)
+            if not match:
+                raise ValueError(f"{filepath} is not a tasks document")
+            base = 0
+            pos = match.end()
+            while True:
+                pos = _SEPARATOR.match(text, pos).end()
+                if pos < len(text) and text[pos] == "]":
+                    break
+                try:
+                    if pos >= len(text):
+                        raise ValueError("need more data")
+                    record, end = decoder.raw_decode(text, pos)
+                except ValueError:
+                    # The record is cut off by the end of the chunk
+                    if eof:
+                        raise ValueError(f"{filepath} is truncated")
+                    chunk = f.read(_CHUNK_SIZE).decode("latin-1")
+                    eof = len(chunk) < _CHUNK_SIZE
+                    text = text[pos:] + chunk
+                    base += pos
+                    pos = 0
+                    continue
+                start = to_epoch_us(datetime.fromisoformat(record["start_time"]))
+                flags = cls.RECURRING if record.get("recurrence") else 0
+                entries.append((start, base + pos, end - pos, flags))
+                pos = end
+
+        entries.sort()
+        index = cls()
+        for entry in entries:
+            index.append(*entry)
+        return index
+
+    @classmethod
+    def read(cls, path: str, signature: Tuple[int, int]) -> Optional["OffsetIndex"]:
+        """Read a sidecar index if it matches the file's signature.
+
+        Args:
+            path: Path of the sidecar
+            signature: (size, mtime_ns) of the tasks file
+
+        Returns:
+            The index, or None if the sidecar is missing or stale
+        """
+        try:
+            with open(path, "rb") as f:
+                header = f.read(cls.HEADER.size)
+                if len(header) != cls.HEADER.size:
+                    return None
+                magic, version, count, size, mtime_ns = cls.HEADER.unpack(header)
+                if (magic, version, (size, mtime_ns)) != (cls.MAGIC, cls.VERSION, signature):
+                    return None
+                index = cls()
+                for column in index.columns:
+                    column.fromfile(f, count)
+                return index
+        except (OSError, EOFError, struct.error):
+            return None
+
+    def write(self, path: str, signature: Tuple[int, int]) -> None:
+        """Write the index to a sidecar file.
+
+        Args:
+            path: Path of the sidecar
+            signature: (size, mtime_ns) of the tasks file
+        """
+        with atomic_write(path, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION, len(self), *signature))
+            for column in self.columns:
+                column.tofile(f)
+
+
+def _file_signature(filepath: str) -> Tuple[int, int]:
+    """Get the (size, mtime_ns) pair identifying a version of a file."""
+    stat = os.stat(filepath)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _encode_task(task: Task) -> bytes:
+    """Encode a task the way ``json.dump(..., indent=2)`` lays out a record."""
+    return json.dumps(task.to_dict(), indent=2).replace("\n", "\n    ").encode("ascii")
+
+
+class LazyTaskStorage(TaskStorage):
+    """JSON task storage that decodes only the tasks that are needed.
+
+    The file format is the same as ``TaskStorage``'s. An ``OffsetIndex``
+    maps start times to byte ranges in the file, so a window of months can
+    be decoded without parsing the rest; recurring tasks are flagged in
+    the index and always loaded. When saving a partially loaded TaskList,
+    records outside the loaded windows are copied byte for byte from the
+    old file.
+    """
+
+    lazy = True
+    range_reads = True
+
+    def __init__(self, filepath: str = None):
+        """Initialize the storage handler.
+
+        Args:
+            filepath: Path to the task storage file. If None, uses default location.
+        """
+        super().__init__(filepath)
+        self.index_path = self.filepath + ".idx"
+        self._index: Optional[OffsetIndex] = None
+        self._signature: Optional[Tuple[int, int]] = None
+
+    def _ensure_index(self) -> OffsetIndex:
+        """Read, or build and persist, the index for the current file."""
+        if not os.path.exists(self.filepath):
+            self._index, self._signature = OffsetIndex(), None
+            return self._index
+
+        signature = _file_signature(self.filepath)
+        if self._index is None or signature != self._signature:
+            index = OffsetIndex.read(self.index_path, signature)
+            if index is None:
+                index = OffsetIndex.build(self.filepath)
+                index.write(self.index_path, signature)
+            self._index, self._signature = index, signature
+        return self._index
+
+    def _read_records(self, lo: int, hi: int) -> Iterator[bytes]:
+        """Read the raw bytes of index entries lo to hi."""
+        index = self._index
+        with open(self.filepath, "rb") as f:
+            for i in range(lo, hi):
+                f.seek(index.offsets[i])
+                yield f.read(index.lengths[i])
+
+    def load_tasks_around(self, date: datetime, margin_months: int = 1) -> TaskList:
+        """Load only the tasks of the month containing a date, plus a margin.
+
+        Falls back to loading everything if the file can't be indexed.
+
+        Args:
+            date: A date in the month to load
+            margin_months: Number of months to load on either side
+
+        Returns:
+            TaskList object containing the loaded tasks
+        """
+        try:
+            self._ensure_index()
+        except (ValueError, KeyError):
+            return self.load_tasks()
+        return super().load_tasks_around(date, margin_months)
+
+    def load_tasks_between(self, start: datetime, end: datetime) -> List[Task]:
+        """Decode the tasks starting in the half-open range [start, end).
+
+        Args:
+            start: Inclusive lower bound on the start time
+            end: Exclusive upper bound on the start time
+
+        Returns:
+            Tasks in start-time order
+        """
+        lo, hi = self._ensure_index().range(start, end)
+        if lo >= hi:
+            return []
+        return [Task.from_dict(json.loads(raw)) for raw in self._read_records(lo, hi)]
+
+    def load_recurring(self) -> List[Task]:
+        """Decode every recurring task.
+
+        Returns:
+            Recurring tasks in start-time order
+        """
+        index = self._ensure_index()
+        recurring = index.recurring()
+        if not recurring:
+            return []
+        tasks = []
+        with open(self.filepath, "rb") as f:
+            for i in recurring:
+                f.seek(index.offsets[i])
+                tasks.append(Task.from_dict(json.loads(f.read(index.lengths[i]))))
+        return tasks
+
+    def count_tasks_by_day(self, year: int, month: int,
+                           completed: Optional[bool] = None) -> Dict[int, int]:
+        """Count the stored tasks on each day of a month.
+
+        Without a completion filter the counts come from the index alone.
+
+        Args:
+            year: Year
+            month: Month (1-12)
+            completed: If given, only count tasks with this completion state
+
+        Returns:
+            Mapping of day of month to task count
+        """
+        start = datetime(year, month, 1)
+        if completed is not None:
+            return super().count_tasks_by_day(year, month, completed)
+
+        index = self._ensure_index()
+        lo, hi = index.range(start, next_month(start))
+        month_start = to_epoch_us(start)
+        counts: Dict[int, int] = {}
+        for i in range(lo, hi):
+            if index.flags[i] & index.RECURRING:
+                continue
+            day = (index.starts[i] - month_start) // DAY_US + 1
+            counts[day] = counts.get(day, 0) + 1
+        return self._add_occurrence_counts(counts, year, month, completed)
+
+    def save_tasks(self, task_list: TaskList) -> None:
+        """Save tasks, writing a new index alongside the file.
+
+        Args:
+            task_list: TaskList object containing tasks to save
+
+        Raises:
+            StorageConflictError: If another process changed the file
+        """
+        self._check_conflict()
+        os.makedirs(os.path.dirname(self.filepath) or ".", exist_ok=True)
+
+        # Records of the old file that were never loaded are kept as they are
+        # (recurring ones are always loaded)
+        kept: Iterator[Tuple[int, bytes, int]] = iter(())
+        if self.loaded_ranges is not None and os.path.exists(self.filepath):
+            kept = self._read_unloaded(self._ensure_index())
+
+        records = heapq.merge(
+            ((to_epoch_us(task.start_time), _encode_task(task),
+              OffsetIndex.RECURRING if task.recurrence is not None else 0)
+             for task in task_list.tasks),
+            kept,
+            key=lambda record: record[0],
+        )
+
+        new_index = OffsetIndex()
+        with atomic_write(self.filepath, "wb") as f:
+            f.write(b'{\n  "tasks": [')
+            separator = b"\n    "
+            for start, raw, flags in records:
+                f.write(separator)
+                separator = b",\n    "
+                new_index.append(start, f.tell(), len(raw), flags)
+                f.write(raw)
+            f.write(b"\n  ]\n}" if len(new_index) else b"]\n}")
+
+        signature = _file_signature(self.filepath)
+        new_index.write(self.index_path, signature)
+        self._index, self._signature = new_index, signature
+        self._mark_synced()
+
+    def _read_unloaded(self, index: OffsetIndex) -> Iterator[Tuple[int, bytes, int]]:
+        """Read the records of the current file that were never loaded, in order.
+
+        Records are read one at a time while the new file is written, so
+        the unloaded part of the file is never held in memory. The old file
+        stays readable until the new one is renamed over it.
+        """
+        loaded = [(to_epoch_us(lo), to_epoch_us(hi)) for lo, hi in self.loaded_ranges]
+        with open(self.filepath, "rb") as f:
+            for i in range(len(index)):
+                start = index.starts[i]
+                if index.flags[i] & index.RECURRING or in_ranges(start, loaded):
+                    continue
+                f.seek(index.offsets[i])
+                yield start, f.read(index.lengths[i]), 0
@@ -0,0 +1,148 @@
+"""
+Lightweight timing instrumentation for TermTasks.
+"""
+
+import bisect
+import json
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# Upper bounds of the histogram buckets in seconds: 0.1 ms doubling up to
+# about 52 s; slower samples go in a last, unbounded bucket
+BUCKET_BOUNDS = tuple(0.0001 * 2 ** i for i in range(20))
+
+
+class Histogram:
+    """Durations of one stage: totals, log-scale buckets and recent samples."""
+
+    def __init__(self, recent: int = 256):
+        """Initialize an empty histogram.
+
+        Args:
+            recent: Number of latest samples kept for percentiles
+        """
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+        self.buckets: List[int] = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.recent: deque = deque(maxlen=recent)
+
+    def add(self, seconds: float) -> None:
+        """Record a duration."""
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.recent.append(seconds)
+
+    @property
+    def mean(self) -> float:
+        """Return the mean duration, or 0 without samples."""
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        """Get a percentile of the recent samples.
+
+        Args:
+            p: Percentile, from 0 to 100
+
+        Returns:
+            The duration, or 0 without samples
+        """
+        if not self.recent:
+            return 0.0
+        samples = sorted(self.recent)
+        return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+class Profiler:
+    """Times the stages of the UI loop and the storage calls.
+
+    Stages are timed with ``timer`` (or ``record``) from any thread; each
+    has a ``Histogram``. ``end_frame`` closes a frame: the stage times
+    recorded since the previous frame are written, with the frame time, as
+    one JSON line to the log file if there is one.
+    """
+
+    def __init__(self, log_path: Optional[str] = None):
+        """Initialize the profiler.
+
+        Args:
+            log_path: File to append per-frame timings to, as JSON lines
+        """
+        self.stages: Dict[str, Histogram] = {}
+        self.counters: Counter = Counter()
+        self.frames = 0
+        self._frame_stages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._log = open(log_path, "a", buffering=1, encoding="utf-8") if log_path else None
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Time the body of a ``with`` statement as a stage.
+
+        Args:
+            name: Stage name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float) -> None:
+        """Record a stage duration.
+
+        Args:
+            name: Stage name
+            seconds: How long it took
+        """
+        with self._lock:
+            histogram = self.stages.get(name)
+            if histogram is None:
+                histogram = self.stages[name] = Histogram()
+            histogram.add(seconds)
+            self._frame_stages[name] = self._frame_stages.get(name, 0.0) + seconds
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Add to a counter."""
+        with self._lock:
+            self.counters[name] += n
+
+    def stage(self, name: str) -> Histogram:
+        """Get a stage's histogram, empty if it never ran."""
+        return self.stages.get(name) or Histogram()
+
+    def end_frame(self, seconds: float, **fields) -> None:
+        """Record a frame and log the stage times since the previous one.
+
+        Args:
+            seconds: How long the frame took to draw
+            **fields: Extra values to log with the frame, such as the
+                number of tasks
+        """
+        self.record("frame", seconds)
+        with self._lock:
+            self.frames += 1
+            stages, self._frame_stages = self._frame_stages, {}
+            if self._log is None:
+                return
+            record = {
+                "frame": self.frames,
+                "time": round(time.time(), 3),
+                "stages_ms": {name: round(value * 1000, 3) for name, value in stages.items()},
+            }
+            record.update(fields)
+            self._log.write(json.dumps(record) + "\n")
+
+    def close(self) -> None:
+        """Close the log file."""
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
@@ -0,0 +1,106 @@
+"""
+Background prefetching of months for lazily loaded storage.
+"""
+
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from termtasks.models import Task, TaskList
+from termtasks.utils.perf import Profiler
+from termtasks.utils.storage import TaskStorage
+
+
+class MonthPrefetcher:
+    """Reads windows of months from storage in a background thread.
+
+    ``request`` asks for a window; only the latest request is kept, so
+    paging quickly through months doesn't queue up reads. The tasks read
+    are added to the TaskList by ``apply``, which the main loop calls, so
+    the list is only ever modified from one thread.
+    """
+
+    def __init__(self, storage: TaskStorage, lock: threading.RLock,
+                 profiler: Optional[Profiler] = None):
+        """Start the reader thread.
+
+        Args:
+            storage: Storage backend to read from; should be lazy
+            lock: Lock serializing access to the storage, normally the
+                background saver's ``storage_lock``; ``apply`` callers also
+                hold the lock guarding the TaskList
+            profiler: Profiler timing the reads as the "prefetch" stage
+        """
+        self.storage = storage
+        self.lock = lock
+        self.profiler = profiler or Profiler()
+        self._cond = threading.Condition()
+        self._wanted: Optional[Tuple[datetime, datetime]] = None
+        self._reading = False
+        self._results: List[Tuple[List[Tuple[datetime, datetime]], List[Task]]] = []
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="termtasks-prefetch", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> bool:
+        """Return whether a read is outstanding or its result unapplied."""
+        with self._cond:
+            return self._wanted is not None or self._reading or bool(self._results)
+
+    def request(self, start: datetime, end: datetime) -> None:
+        """Ask for the tasks starting in [start, end) to be read.
+
+        Args:
+            start: Inclusive lower bound on the start time
+            end: Exclusive upper bound on the start time
+        """
+        with self._cond:
+            self._wanted = (start, end)
+            self._cond.notify()
+
+    def _run(self) -> None:
+        """Reader thread: read requested windows one at a time."""
+        while True:
+            with self._cond:
+                while self._wanted is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                start, end = self._wanted
+                self._wanted = None
+                self._reading = True
+            try:
+                with self.lock, self.profiler.timer("prefetch"):
+                    result = self.storage.read_window(start, end)
+            except Exception:
+                # Prefetching is best effort; the window is read again when shown
+                result = None
+            with self._cond:
+                self._reading = False
+                if result is not None:
+                    self._results.append(result)
+
+    def apply(self, task_list: TaskList) -> int:
+        """Add the tasks read so far to a TaskList.
+
+        Args:
+            task_list: TaskList returned by ``load_tasks_around``
+
+        Returns:
+            Number of tasks added
+        """
+        with self._cond:
+            results, self._results = self._results, []
+        added = 0
+        with self.lock:
+            for ranges, tasks in results:
+                added += self.storage.add_window(task_list, ranges, tasks)
+        return added
+
+    def close(self) -> None:
+        """Stop the reader thread, dropping unapplied results."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
@@ -0,0 +1,186 @@
+"""
+Background saving for TermTasks.
+"""
+
+import threading
+import time
+from typing import Optional
+
+from termtasks.models import ChangeSet, TaskList
+from termtasks.utils.perf import Profiler
+from termtasks.utils.storage import StorageConflictError, TaskStorage
+
+
+class _Snapshot:
+    """The task order of a TaskList at one moment.
+
+    Storage backends only read ``tasks`` when writing, so this stands in
+    for the TaskList while the writer runs without the TaskList's lock.
+    Tasks edited during the write are written again on the next save,
+    since the edits are logged as changes.
+    """
+
+    def __init__(self, task_list: TaskList):
+        self.tasks = list(task_list.tasks)
+
+
+class BackgroundSaver:
+    """Writes changes to storage from a background thread.
+
+    The TaskList records its own changes; ``mark_dirty`` wakes the writer
+    after modifying it. The writer waits until no new change has arrived for
+    ``delay`` seconds (but never longer than ``max_delay`` after the first
+    unsaved change), so a burst of edits is written once, and hands the
+    accumulated ``ChangeSet`` to ``TaskStorage.save_changes``.
+
+    ``lock`` guards the TaskList: hold it while modifying the list so that
+    a save never sees a half-applied change. The writer only holds it while
+    taking the changes and copying the task order, not while writing.
+    ``storage_lock`` guards the storage backend and is held for the whole
+    write; take it, before ``lock``, around anything else that uses the
+    storage, such as loading months or reloading.
+
+    If another process changed the storage in the meantime, the writer
+    keeps the changes and waits: merging modifies the TaskList, which only
+    the main thread does. The main loop reloads (see ``TaskStorage.reload``)
+    and calls ``mark_dirty`` to retry. ``flush`` merges and retries itself.
+    """
+
+    def __init__(self, storage: TaskStorage, task_list: TaskList,
+                 delay: float = 0.25, max_delay: float = 2.0,
+                 profiler: Optional[Profiler] = None):
+        """Start the writer thread.
+
+        Args:
+            storage: Storage backend to write to
+            task_list: The TaskList being edited
+            delay: Seconds without changes before writing
+            max_delay: Upper bound on how long a change stays unsaved
+            profiler: Profiler timing the writes as the "save" stage
+        """
+        self.storage = storage
+        self.task_list = task_list
+        self.delay = delay
+        self.max_delay = max_delay
+        self.profiler = profiler or Profiler()
+        self.lock = threading.RLock()
+        self.storage_lock = threading.RLock()
+        self.last_error: Optional[Exception] = None
+        self._cond = threading.Condition(self.lock)
+        # Whether a write conflicted and waits for the main loop to merge
+        self.conflict = False
+        self._first_dirty: Optional[float] = None
+        self._last_dirty: Optional[float] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="termtasks-saver", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        """Return the number of changes waiting to be written."""
+        return self.task_list.change_count
+
+    @property
+    def status(self) -> str:
+        """Return a short description of the save state for display."""
+        if self.last_error is not None:
+            return f"Save failed: {self.last_error}"
+        if self.pending:
+            return f"Saving ({self.pending} pending)..."
+        return ""
+
+    def mark_dirty(self) -> None:
+        """Report that the TaskList was modified, or merged after a conflict."""
+        with self._cond:
+            self.conflict = False
+            now = time.monotonic()
+            if self._first_dirty is None:
+                self._first_dirty = now
+            self._last_dirty = now
+            self._cond.notify()
+
+    def _run(self) -> None:
+        """Writer thread: wait for the debounce deadline, then write."""
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    if not self.pending or self.conflict:
+                        self._cond.wait()
+                        continue
+                    if self._last_dirty is None:
+                        # Changed without mark_dirty; start the clock now
+                        self._first_dirty = self._last_dirty = time.monotonic()
+                    due = min(self._last_dirty + self.delay, self._first_dirty + self.max_delay)
+                    remaining = due - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            self._write()
+
+    def _take(self):
+        """Take the pending changes and a snapshot to write. Call with both locks held."""
+        changes = self.task_list.take_changes()
+        self._first_dirty = self._last_dirty = None
+        return changes, _Snapshot(self.task_list)
+
+    def _write(self, merge: bool = False) -> None:
+        """Write all pending changes.
+
+        Args:
+            merge: On a conflict, merge the stored version into the TaskList
+                and retry. Only the main thread may merge.
+        """
+        with self.storage_lock:
+            with self.lock:
+                if not self.pending:
+                    return
+                changes, snapshot = self._take()
+            try:
+                try:
+                    self._save(snapshot, changes)
+                except StorageConflictError:
+                    with self.lock:
+                        self.task_list.restore_changes(changes)
+                        if not merge:
+                            # Leave the merge to the main loop
+                            self.conflict = True
+                            return
+                        # Merge the newer stored version, keeping our changes, and retry
+                        self.storage.reload(self.task_list)
+                        changes, snapshot = self._take()
+                    self._save(snapshot, changes)
+            except Exception as e:
+                # Keep the changes for the next attempt
+                with self.lock:
+                    self.task_list.restore_changes(changes)
+                    self._first_dirty = self._last_dirty = time.monotonic()
+                    self.last_error = e
+            else:
+                self.last_error = None
+
+    def _save(self, snapshot: _Snapshot, changes: ChangeSet) -> None:
+        """Hand changes to the storage backend."""
+        with self.profiler.timer("save"):
+            self.storage.save_changes(snapshot, changes)
+
+    def flush(self) -> None:
+        """Write pending changes now, in the calling thread.
+
+        Raises:
+            Exception: Whatever the storage backend raised, if writing failed
+        """
+        self._write(merge=True)
+        if self.last_error is not None:
+            raise self.last_error
+
+    def close(self) -> None:
+        """Flush pending changes and stop the writer thread."""
+        try:
+            self.flush()
+        finally:
+            with self._cond:
+                self._closed = True
+                self._cond.notify()
+            self._thread.join()
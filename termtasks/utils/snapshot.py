@@ -0,0 +1,448 @@
+"""
+Binary snapshot format for TermTasks.
+
+A snapshot is a header, a section of fixed-width records sorted by start
+time, and a heap of UTF-8 strings that the records point into::
+
+    header   magic "TTSN", version, flags, record count, heap size
+    records  start, end (epoch microseconds), title offset/length,
+             ID offset/length, recurrence offset/length, flags
+    heap     titles (each distinct title stored once), IDs and
+             recurrence rules as JSON
+
+Version 1 records have no recurrence fields; they are still read.
+
+Records are decoded in bulk with ``struct.iter_unpack`` over a memory map
+of the file, and large files can be decoded by several processes at once.
+Because records are sorted and fixed-width, a range of start times is
+found by bisecting the map, and only its records are decoded.
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from termtasks.models import Task, TaskList
+from termtasks.recurrence import Recurrence
+from termtasks.store import NO_END, TaskStore
+from termtasks.utils.date_utils import EPOCH, to_epoch_us
+from termtasks.utils.storage import TaskStorage, atomic_write
+
+MAGIC = b"TTSN"
+VERSION = 2
+
+HEADER = struct.Struct("<4sHHQQ")
+RECORD = struct.Struct("<qqIIIIIIB3x")
+RECORDS = {1: struct.Struct("<qqIIIIB3x"), 2: RECORD}
+# A record's start time, and where its recurrence rule length is
+START = struct.Struct("<q")
+RULE_LENGTH_OFFSET = struct.calcsize("<qqIIIII")
+
+_NONZERO = re.compile(rb"[^\x00]")
+
+# Records address the string heap with 32-bit offsets and lengths
+MAX_HEAP_SIZE = 2**32 - 1
+
+# Record flags
+COMPLETED = 0x01
+HAS_END = 0x02
+
+
+def encode_snapshot(tasks: Iterable[Task]) -> bytes:
+    """Encode tasks as a binary snapshot.
+
+    Args:
+        tasks: Tasks to encode, in any order
+
+    Returns:
+        The snapshot bytes
+
+    Raises:
+        ValueError: If the string heap outgrows 32-bit offsets
+    """
+    heap = bytearray()
+    titles: Dict[str, Tuple[int, int]] = {}
+    records = bytearray()
+    count = 0
+
+    for task in sorted(tasks, key=lambda t: t.start_time):
+        title = titles.get(task.title)
+        if title is None:
+            data = task.title.encode("utf-8")
+            title = titles[task.title] = (len(heap), len(data))
+            heap += data
+
+        flags = COMPLETED if task.completed else 0
+        end = 0
+        if task.end_time is not None:
+            flags |= HAS_END
+            end = to_epoch_us(task.end_time)
+        # IDs are always stored: regenerating default IDs with strftime
+        # would dominate decoding time
+        data = task.id.encode("utf-8")
+        id_offset, id_length = len(heap), len(data)
+        heap += data
+        rule_offset, rule_length = len(heap), 0
+        if task.recurrence is not None:
+            data = json.dumps(task.recurrence.to_dict()).encode("utf-8")
+            rule_length = len(data)
+            heap += data
+
+        # Checked before packing, which would fail with a struct.error
+        if len(heap) > MAX_HEAP_SIZE:
+            raise ValueError("Snapshot string heap is too large")
+        records += RECORD.pack(to_epoch_us(task.start_time), end, title[0], title[1],
+                               id_offset, id_length, rule_offset, rule_length, flags)
+        count += 1
+
+    return HEADER.pack(MAGIC, VERSION, 0, count, len(heap)) + records + heap
+
+
+def write_snapshot(filepath: str, tasks: Iterable[Task]) -> None:
+    """Atomically write tasks to a snapshot file.
+
+    Args:
+        filepath: Destination path
+        tasks: Tasks to write, in any order
+    """
+    data = encode_snapshot(tasks)
+    with atomic_write(filepath, "wb") as f:
+        f.write(data)
+
+
+def _parse_header(buf) -> Tuple[int, int, int, struct.Struct]:
+    """Validate a snapshot header.
+
+    Returns:
+        (record count, offset of the record section, offset of the heap,
+        record format)
+
+    Raises:
+        ValueError: If the buffer is not a supported snapshot
+    """
+    if len(buf) < HEADER.size:
+        raise ValueError("Not a TermTasks snapshot")
+    magic, version, _, count, heap_size = HEADER.unpack_from(buf)
+    if magic != MAGIC:
+        raise ValueError("Not a TermTasks snapshot")
+    record = RECORDS.get(version)
+    if record is None:
+        raise ValueError(f"Unsupported snapshot version {version}")
+    heap_start = HEADER.size + count * record.size
+    if len(buf) < heap_start + heap_size:
+        raise ValueError("Snapshot is truncated")
+    return count, HEADER.size, heap_start, record
+
+
+def _unpack_records(record: struct.Struct, section) -> Iterable[tuple]:
+    """Unpack records as (start, end, title offset/length, ID offset/length,
+    recurrence offset/length, flags), whatever the version."""
+    if record is RECORD:
+        return record.iter_unpack(section)
+    return ((start, end, title_offset, title_length, id_offset, id_length, 0, 0, flags)
+            for start, end, title_offset, title_length, id_offset, id_length, flags
+            in record.iter_unpack(section))
+
+
+def decode_records(buf, lo: int = 0, hi: Optional[int] = None) -> List[Task]:
+    """Decode a range of records from a snapshot buffer.
+
+    Args:
+        buf: The snapshot as bytes, a memoryview or an mmap
+        lo: First record to decode
+        hi: End of the record range; defaults to the last record
+
+    Returns:
+        Tasks in start-time order
+    """
+    count, records_start, heap_start, record = _parse_header(buf)
+    hi = count if hi is None else min(hi, count)
+    tasks: List[Task] = []
+    if lo >= hi:
+        return tasks
+
+    with memoryview(buf) as view:
+        heap = view[heap_start:]
+        titles: Dict[int, str] = {}
+        section = view[records_start + lo * record.size:records_start + hi * record.size]
+        for (start, end, title_offset, title_length, id_offset, id_length,
+             rule_offset, rule_length, flags) in _unpack_records(record, section):
+            title = titles.get(title_offset)
+            if title is None:
+                title = titles[title_offset] = str(
+                    heap[title_offset:title_offset + title_length], "utf-8")
+            start_time = EPOCH + timedelta(microseconds=start)
+            task = Task(
+                title,
+                start_time,
+                EPOCH + timedelta(microseconds=end) if flags & HAS_END else None,
+                bool(flags & COMPLETED),
+                str(heap[id_offset:id_offset + id_length], "utf-8"),
+            )
+            if rule_length:
+                task.recurrence = Recurrence.from_dict(
+                    json.loads(str(heap[rule_offset:rule_offset + rule_length], "utf-8")))
+            tasks.append(task)
+        section.release()
+        heap.release()
+    return tasks
+
+
+def find_record(buf, start_us: int) -> int:
+    """Find the first record starting at or after a time, by bisection.
+
+    Args:
+        buf: The snapshot as bytes, a memoryview or an mmap
+        start_us: Start time in epoch microseconds
+
+    Returns:
+        Position of the record, or the record count if there is none
+    """
+    count, records_start, _, record = _parse_header(buf)
+    lo, hi = 0, count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if START.unpack_from(buf, records_start + mid * record.size)[0] < start_us:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def recurring_records(buf) -> List[int]:
+    """Find the records of recurring tasks without decoding any record.
+
+    The bytes of the rule length column are read as strided views and
+    searched for non-zero values.
+
+    Args:
+        buf: The snapshot as bytes, a memoryview or an mmap
+
+    Returns:
+        Positions of the records, in start-time order
+    """
+    _, records_start, heap_start, record = _parse_header(buf)
+    if record is not RECORD:
+        # Version 1 has no rules
+        return []
+    positions = set()
+    with memoryview(buf) as view:
+        section = view[records_start:heap_start]
+        for offset in range(RULE_LENGTH_OFFSET, RULE_LENGTH_OFFSET + 4):
+            column = bytes(section[offset::record.size])
+            positions.update(match.start() for match in _NONZERO.finditer(column))
+        section.release()
+    return sorted(positions)
+
+
+def decode_store(buf) -> TaskStore:
+    """Decode a snapshot buffer into a columnar TaskStore.
+
+    No Task or datetime objects are created; columns are filled straight
+    from the unpacked records. Recurrence rules are not kept.
+
+    Args:
+        buf: The snapshot as bytes, a memoryview or an mmap
+
+    Returns:
+        A TaskStore with every record
+    """
+    count, records_start, heap_start, record = _parse_header(buf)
+    if not count:
+        return TaskStore()
+
+    with memoryview(buf) as view:
+        heap = view[heap_start:]
+        section = view[records_start:heap_start]
+        starts, ends, title_offsets, title_lengths, id_offsets, id_lengths, _, _, flags = zip(
+            *_unpack_records(record, section))
+        section.release()
+
+        strings: Dict[int, str] = {}
+        titles = []
+        for offset, length in zip(title_offsets, title_lengths):
+            title = strings.get(offset)
+            if title is None:
+                title = strings[offset] = str(heap[offset:offset + length], "utf-8")
+            titles.append(title)
+        ids = [
+            str(heap[offset:offset + length], "utf-8")
+            for offset, length in zip(id_offsets, id_lengths)
+        ]
+        heap.release()
+
+    return TaskStore.from_columns(
+        starts,
+        (end if flag & HAS_END else NO_END for end, flag in zip(ends, flags)),
+        titles,
+        ids,
+        (bool(flag & COMPLETED) for flag in flags),
+    )
+
+
+def _decode_file_range(filepath: str, lo: int, hi: int) -> List[Task]:
+    """Decode a record range of a snapshot file (runs in worker processes)."""
+    with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return decode_records(mm, lo, hi)
+
+
+def read_snapshot(filepath: str, workers: int = 1) -> TaskList:
+    """Read a snapshot file through a memory map.
+
+    Args:
+        filepath: Path of the snapshot
+        workers: Number of processes to decode with. Decoded tasks have to
+            be pickled back to this process, so this only pays off for
+            very large files on machines with many cores.
+
+    Returns:
+        TaskList object containing the tasks
+    """
+    return TaskList(_read_snapshot_tasks(filepath, workers))
+
+
+def _read_snapshot_tasks(filepath: str, workers: int) -> List[Task]:
+    """Decode every record of a snapshot file; see ``read_snapshot``."""
+    if os.path.getsize(filepath) == 0:
+        raise ValueError("Not a TermTasks snapshot")
+
+    with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        count = _parse_header(mm)[0]
+        if workers <= 1 or count < 2 * workers:
+            return decode_records(mm)
+
+    # Imported here: multiprocessing is slow to import and rarely used
+    from concurrent.futures import ProcessPoolExecutor
+
+    step = -(-count // workers)
+    tasks: List[Task] = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_decode_file_range, filepath, lo, min(lo + step, count))
+            for lo in range(0, count, step)
+        ]
+        for future in futures:
+            tasks.extend(future.result())
+    return tasks
+
+
+def read_snapshot_store(filepath: str) -> TaskStore:
+    """Read a snapshot file into a columnar TaskStore.
+
+    Args:
+        filepath: Path of the snapshot
+
+    Returns:
+        A TaskStore with every record
+    """
+    if os.path.getsize(filepath) == 0:
+        raise ValueError("Not a TermTasks snapshot")
+    with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return decode_store(mm)
+
+
+def json_to_snapshot(json_path: str, snapshot_path: str) -> None:
+    """Convert a tasks.json file to a binary snapshot."""
+    write_snapshot(snapshot_path, TaskStorage(json_path).load_tasks().tasks)
+
+
+def snapshot_to_json(snapshot_path: str, json_path: str) -> None:
+    """Convert a binary snapshot to a tasks.json file."""
+    TaskStorage(json_path).save_tasks(read_snapshot(snapshot_path))
+
+
+class BinaryTaskStorage(TaskStorage):
+    """Task storage in the binary snapshot format.
+
+    Ranges and recurring tasks are read straight from the sorted records,
+    but saving always rewrites the whole snapshot, so the backend is not
+    lazy.
+    """
+
+    default_filename = "tasks.ttb"
+    range_reads = True
+
+    def __init__(self, filepath: str = None, workers: int = 1):
+        """Initialize the storage handler.
+
+        Args:
+            filepath: Path to the snapshot file. If None, uses default location.
+            workers: Number of decoder processes; see ``read_snapshot``
+        """
+        super().__init__(filepath)
+        self.workers = workers
+
+    def _read_all(self) -> List[Task]:
+        """Read every task from the snapshot."""
+        if not os.path.exists(self.filepath):
+            return []
+        try:
+            return _read_snapshot_tasks(self.filepath, self.workers)
+        except ValueError:
+            # Return no tasks if the file is not a valid snapshot
+            return []
+
+    def _decode(self, decode) -> List[Task]:
+        """Map the snapshot and decode some of its records.
+
+        Args:
+            decode: Function of the mapped snapshot returning tasks
+
+        Returns:
+            The tasks, or none if there is no valid snapshot
+        """
+        if not os.path.exists(self.filepath):
+            return []
+        try:
+            with open(self.filepath, "rb") as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return decode(mm)
+        except ValueError:
+            # Empty files can't be mapped; invalid snapshots hold no tasks
+            return []
+
+    def load_tasks_between(self, start: datetime, end: datetime) -> List[Task]:
+        """Decode the tasks starting in the half-open range [start, end).
+
+        Args:
+            start: Inclusive lower bound on the start time
+            end: Exclusive upper bound on the start time
+
+        Returns:
+            Tasks in start-time order
+        """
+        def decode_range(buf) -> List[Task]:
+            return decode_records(buf, find_record(buf, to_epoch_us(start)),
+                                  find_record(buf, to_epoch_us(end)))
+        return self._decode(decode_range)
+
+    def load_recurring(self) -> List[Task]:
+        """Decode every recurring task.
+
+        Returns:
+            Recurring tasks in start-time order
+        """
+        def decode_recurring(buf) -> List[Task]:
+            tasks = []
+            for i in recurring_records(buf):
+                tasks.extend(decode_records(buf, i, i + 1))
+            return tasks
+        return self._decode(decode_recurring)
+
+    def save_tasks(self, task_list: TaskList) -> None:
+        """Save tasks to the snapshot.
+
+        Args:
+            task_list: TaskList object containing tasks to save
+
+        Raises:
+            StorageConflictError: If another process changed the file
+        """
+        self._check_conflict()
+        os.makedirs(os.path.dirname(self.filepath) or ".", exist_ok=True)
+        write_snapshot(self.filepath, task_list.tasks)
+        self._mark_synced()
@@ -0,0 +1,347 @@
+"""
+SQLite storage backend for TermTasks.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from termtasks.models import ChangeSet, Task, TaskList
+from termtasks.recurrence import Recurrence
+from termtasks.utils.date_utils import next_month
+from termtasks.utils.storage import StorageConflictError, TaskStorage, file_signature
+
+if TYPE_CHECKING:
+    from termtasks.search import SearchIndex
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT,
+    completed INTEGER NOT NULL DEFAULT 0,
+    recurrence TEXT
+);
+"""
+
+# Created after older databases have been migrated
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_tasks_start_time ON tasks (start_time);
+CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks (completed, start_time);
+CREATE INDEX IF NOT EXISTS idx_tasks_recurring ON tasks (start_time) WHERE recurrence IS NOT NULL;
+"""
+
+COLUMNS = "id, title, start_time, end_time, completed, recurrence"
+COLUMN_NAMES = COLUMNS.split(", ")
+PLACEHOLDERS = "?, ?, ?, ?, ?, ?"
+
+
+def _row_to_task(row: tuple) -> Task:
+    """Create a Task from a row of the tasks table."""
+    task_id, title, start_time, end_time, completed, recurrence = row
+    return Task(
+        id=task_id,
+        title=title,
+        start_time=datetime.fromisoformat(start_time),
+        end_time=datetime.fromisoformat(end_time) if end_time else None,
+        completed=bool(completed),
+        recurrence=Recurrence.from_dict(json.loads(recurrence)) if recurrence else None,
+    )
+
+
+def _task_to_row(task: Task) -> tuple:
+    """Convert a Task to a row of the tasks table."""
+    return (
+        task.id,
+        task.title,
+        task.start_time.isoformat(),
+        task.end_time.isoformat() if task.end_time else None,
+        int(task.completed),
+        json.dumps(task.recurrence.to_dict()) if task.recurrence is not None else None,
+    )
+
+
+class SQLiteTaskStorage(TaskStorage):
+    """Task storage backed by an SQLite database.
+
+    Tasks live in an indexed table, so range and per-day queries are
+    answered by the database without loading every task, and a single
+    changed task is written as one row. Start times are stored as ISO
+    strings, which sort chronologically. Because changes are written row by
+    row, several processes can edit different tasks of one database; a
+    change to a row that another process changed since it was read raises
+    ``StorageConflictError``.
+    Recurrence rules are stored as JSON; recurring tasks are always loaded,
+    whatever window is asked for.
+    """
+
+    default_filename = "tasks.db"
+    lazy = True
+    range_reads = True
+    incremental = True
+
+    def __init__(self, filepath: str = None):
+        """Initialize the storage handler.
+
+        Args:
+            filepath: Path to the database file. If None, uses default location.
+        """
+        super().__init__(filepath)
+        os.makedirs(os.path.dirname(self.filepath) or ".", exist_ok=True)
+        # The connection may be used from a background saver thread; the
+        # lock serializes access to it.
+        self._lock = threading.Lock()
+        # The rows as last read or written, by task ID, to detect rows that
+        # another process changed since
+        self._synced_rows: Dict[str, tuple] = {}
+        self.conn = sqlite3.connect(self.filepath, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(tasks)")}
+            if "recurrence" not in columns:
+                # Databases from before recurring tasks
+                self.conn.execute("ALTER TABLE tasks ADD COLUMN recurrence TEXT")
+            self.conn.executescript(INDEXES)
+
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """Run a query and return all rows."""
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def _read_all(self) -> List[Task]:
+        """Read every task from the database."""
+        rows = self._query(f"SELECT {COLUMNS} FROM tasks ORDER BY start_time")
+        return self._rows_to_tasks(rows)
+
+    def _rows_to_tasks(self, rows: List[tuple]) -> List[Task]:
+        """Create Tasks from rows, remembering the rows as synced."""
+        for row in rows:
+            self._synced_rows[row[0]] = row
+        return [_row_to_task(row) for row in rows]
+
+    def _disk_version(self) -> int:
+        """Get the data version, which changes when another connection commits."""
+        return self._query("PRAGMA data_version")[0][0]
+
+    def _cache_signature(self):
+        """Get the signature of the database file and the size of its log.
+
+        The log is emptied before caches are written and removed when the
+        last connection closes; either way its size is 0.
+        """
+        wal = file_signature(self.filepath + "-wal")
+        return file_signature(self.filepath), wal[1] if wal else 0
+
+    def save_search_index(self, index: "SearchIndex") -> None:
+        """Write the search index cache, after moving the log into the database.
+
+        Args:
+            index: Index of every stored task
+        """
+        with self._lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        super().save_search_index(index)
+
+    def load_tasks_between(self, start: datetime, end: datetime) -> List[Task]:
+        """Load the tasks starting in the half-open range [start, end).
+
+        Args:
+            start: Inclusive lower bound on the start time
+            end: Exclusive upper bound on the start time
+
+        Returns:
+            Tasks in start-time order
+        """
+        rows = self._query(
+            f"SELECT {COLUMNS} FROM tasks WHERE start_time >= ? AND start_time < ? "
+            "ORDER BY start_time",
+            (start.isoformat(), end.isoformat()),
+        )
+        return self._rows_to_tasks(rows)
+
+    def load_recurring(self) -> List[Task]:
+        """Load every recurring task.
+
+        Returns:
+            Recurring tasks in start-time order
+        """
+        rows = self._query(
+            f"SELECT {COLUMNS} FROM tasks WHERE recurrence IS NOT NULL ORDER BY start_time")
+        return self._rows_to_tasks(rows)
+
+    def count_tasks_by_day(self, year: int, month: int,
+                           completed: Optional[bool] = None) -> Dict[int, int]:
+        """Count the stored tasks on each day of a month.
+
+        Args:
+            year: Year
+            month: Month (1-12)
+            completed: If given, only count tasks with this completion state
+
+        Returns:
+            Mapping of day of month to task count
+        """
+        start = datetime(year, month, 1)
+        sql = (
+            "SELECT CAST(substr(start_time, 9, 2) AS INTEGER), COUNT(*) FROM tasks "
+            "WHERE start_time >= ? AND start_time < ? AND recurrence IS NULL"
+        )
+        params = (start.isoformat(), next_month(start).isoformat())
+        if completed is not None:
+            sql += " AND completed = ?"
+            params += (int(completed),)
+        sql += " GROUP BY substr(start_time, 1, 10)"
+        return self._add_occurrence_counts(dict(self._query(sql, params)), year, month, completed)
+
+    def save_tasks(self, task_list: TaskList) -> None:
+        """Replace the stored tasks with the given ones in one transaction.
+
+        If only windows of months were loaded, just the rows in those
+        windows are replaced.
+
+        Args:
+            task_list: TaskList object containing tasks to save
+
+        Raises:
+            StorageConflictError: If another process changed the database
+        """
+        self._check_conflict()
+        with self._lock, self.conn:
+            if self.loaded_ranges is None:
+                self.conn.execute("DELETE FROM tasks")
+            else:
+                self.conn.executemany(
+                    "DELETE FROM tasks WHERE start_time >= ? AND start_time < ?",
+                    ((lo.isoformat(), hi.isoformat()) for lo, hi in self.loaded_ranges),
+                )
+                # Recurring tasks are loaded wherever they start
+                self.conn.execute("DELETE FROM tasks WHERE recurrence IS NOT NULL")
+            rows = [_task_to_row(task) for task in task_list.tasks]
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO tasks ({COLUMNS}) VALUES ({PLACEHOLDERS})", rows)
+        if self.loaded_ranges is None:
+            self._synced_rows = {}
+        self._synced_rows.update((row[0], row) for row in rows)
+        self._mark_synced()
+
+    def _begin_checked(self, task_ids: List[str]) -> None:
+        """Start a write transaction, checking that other processes left some rows alone.
+
+        The write lock is taken first, so nobody can commit between the
+        check and the writes. The rows are only compared when another
+        connection committed since the last load or save. Call with the
+        connection lock held.
+
+        Args:
+            task_ids: IDs of the rows about to be written or deleted
+
+        Raises:
+            StorageConflictError: If one of the rows was changed, added or
+                deleted since it was last read or written
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        if self.conn.execute("PRAGMA data_version").fetchone()[0] == self._synced_version:
+            return
+        for task_id in task_ids:
+            row = self.conn.execute(f"SELECT {COLUMNS} FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            if row != self._synced_rows.get(task_id):
+                raise StorageConflictError(
+                    f"task {task_id!r} in {self.filepath} was changed by another process")
+
+    def _update_row(self, row: tuple) -> bool:
+        """Update the stored row of a task, setting only the columns that changed.
+
+        Without a synced copy of the row every column is set. Call inside
+        a transaction.
+
+        Returns:
+            Whether the row exists
+        """
+        old = self._synced_rows.get(row[0])
+        if old is None:
+            changed = range(1, len(row))
+        else:
+            changed = [i for i in range(1, len(row)) if row[i] != old[i]]
+            if not changed:
+                return True
+        assignments = ", ".join(f"{COLUMN_NAMES[i]} = ?" for i in changed)
+        cursor = self.conn.execute(f"UPDATE tasks SET {assignments} WHERE id = ?",
+                                   [row[i] for i in changed] + [row[0]])
+        return cursor.rowcount > 0
+
+    def save_task(self, task_list: TaskList, task: Task) -> None:
+        """Update the row of a single task, inserting it if it is new.
+
+        Args:
+            task_list: TaskList object containing the task
+            task: The added or changed task
+
+        Raises:
+            StorageConflictError: If another process changed the row
+        """
+        row = _task_to_row(task)
+        with self._lock, self.conn:
+            self._begin_checked([task.id])
+            if not self._update_row(row):
+                self.conn.execute(f"INSERT INTO tasks ({COLUMNS}) VALUES ({PLACEHOLDERS})", row)
+        self._synced_rows[task.id] = row
+
+    def delete_task(self, task_list: TaskList, task_id: str) -> None:
+        """Delete the row of a single task.
+
+        Args:
+            task_list: TaskList object the task was removed from
+            task_id: ID of the removed task
+
+        Raises:
+            StorageConflictError: If another process changed the row
+        """
+        with self._lock, self.conn:
+            self._begin_checked([task_id])
+            self.conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+        self._synced_rows.pop(task_id, None)
+
+    def save_changes(self, task_list: TaskList, changes: ChangeSet) -> None:
+        """Write all changed rows in a single transaction.
+
+        New tasks are inserted; changed ones get an UPDATE of just the
+        columns that changed, such as ``completed`` when a task is ticked off.
+
+        Args:
+            task_list: TaskList object the changes were taken from
+            changes: Changes returned by ``TaskList.take_changes``
+
+        Raises:
+            StorageConflictError: If another process changed one of the rows;
+                nothing is written
+        """
+        if not changes:
+            return
+        added = [_task_to_row(task) for task in changes.added]
+        updated = [_task_to_row(task) for task in changes.updated]
+        rows = added + updated
+        with self._lock, self.conn:
+            self._begin_checked([row[0] for row in rows] + changes.removed)
+            self.conn.executemany(f"INSERT INTO tasks ({COLUMNS}) VALUES ({PLACEHOLDERS})", added)
+            for row in updated:
+                if not self._update_row(row):
+                    # Removed by another process since; ours wins, as merged
+                    self.conn.execute(f"INSERT INTO tasks ({COLUMNS}) VALUES ({PLACEHOLDERS})", row)
+            self.conn.executemany(
+                "DELETE FROM tasks WHERE id = ?",
+                ((task_id,) for task_id in changes.removed),
+            )
+        self._synced_rows.update((row[0], row) for row in rows)
+        for task_id in changes.removed:
+            self._synced_rows.pop(task_id, None)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self.conn.close()
@@ -4,14 +4,150 @@ Storage utilities for TermTasks.
 
 import json
 import os
-from pathlib import Path
-from typing import Dict, List
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import IO, TYPE_CHECKING, Dict, Iterator, List, Optional, Set, Tuple
 
-from termtasks.models import Task, TaskList
+from termtasks.models import ChangeSet, Task, TaskList, unique_id
+from termtasks.utils.date_utils import shift_month
+
+if TYPE_CHECKING:
+    from termtasks.search import SearchIndex
+
+BACKENDS = ("json", "journal", "sqlite", "lazy", "binary")
+
+# File extensions that select a backend when none is configured
+BACKEND_EXTENSIONS = {
+    ".json": "json",
+    ".db": "sqlite",
+    ".sqlite": "sqlite",
+    ".sqlite3": "sqlite",
+    ".ttb": "binary",
+}
+
+# Marks a storage handler that has not loaded or saved anything yet
+_UNSYNCED = object()
+
+# Format version of the search index cache
+SEARCH_CACHE_VERSION = 1
+
+
+class StorageConflictError(Exception):
+    """Raised when saving would overwrite changes made by another process."""
+
+
+def file_signature(filepath: str) -> Optional[Tuple[int, int, int]]:
+    """Get the (inode, size, mtime_ns) identifying a version of a file.
+
+    Returns:
+        The signature, or None if the file does not exist
+    """
+    try:
+        stat = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+@contextmanager
+def atomic_write(filepath: str, mode: str = "w") -> Iterator[IO]:
+    """Open a temporary file that atomically replaces ``filepath`` on success.
+
+    The file is flushed and fsynced before the rename; if the block raises,
+    the temporary file is removed and ``filepath`` is left untouched.
+
+    Args:
+        filepath: Destination path
+        mode: File mode, ``"w"`` or ``"wb"``
+    """
+    # Imported here: tempfile is slow to import, and commands that only read don't need it
+    import tempfile
+
+    directory = os.path.dirname(filepath) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".tasks-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _merge_ranges(ranges: List[Tuple[datetime, datetime]]) -> List[Tuple[datetime, datetime]]:
+    """Merge overlapping or touching half-open ranges."""
+    merged: List[Tuple[datetime, datetime]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _subtract_ranges(start: datetime, end: datetime,
+                     ranges: List[Tuple[datetime, datetime]]) -> List[Tuple[datetime, datetime]]:
+    """Get the parts of [start, end) not covered by merged ``ranges``."""
+    missing = []
+    for lo, hi in ranges:
+        if hi <= start or lo >= end:
+            continue
+        if lo > start:
+            missing.append((start, lo))
+        start = max(start, hi)
+    if start < end:
+        missing.append((start, end))
+    return missing
+
+
+def in_ranges(value, ranges: List[Tuple]) -> bool:
+    """Check whether a value falls in one of a list of half-open ranges."""
+    for lo, hi in ranges:
+        if lo <= value < hi:
+            return True
+    return False
 
 
 class TaskStorage:
-    """Handles storing and retrieving tasks."""
+    """Handles storing and retrieving tasks.
+
+    Backends whose ``lazy`` flag is set can answer ``load_tasks_between``
+    without reading everything, so a TaskList may be loaded a window of
+    months at a time with ``load_tasks_around`` and ``load_month``. While
+    only windows are loaded, ``loaded_ranges`` lists the start-time ranges
+    held in memory, and saving the whole list leaves tasks outside those
+    ranges alone.
+
+    Backends whose ``range_reads`` flag is set also answer
+    ``load_tasks_between`` and ``load_recurring`` without reading
+    everything, but may not be lazy because they save everything at once.
+    Every lazy backend sets it.
+
+    Backends whose ``incremental`` flag is set write a single record in
+    ``save_task``/``delete_task``; the others rewrite everything.
+    ``save_changes`` writes a ``ChangeSet`` taken from a TaskList the
+    cheapest way the backend allows.
+
+    ``load_search_index`` gets a title index of every stored task, from a
+    cache next to the storage when it is current; ``save_search_index``
+    writes that cache.
+
+    Other processes may write the same storage. ``has_changed`` cheaply
+    checks whether they have since the last load or save, and ``reload``
+    merges their changes into a TaskList. Saves raise
+    ``StorageConflictError`` instead of overwriting a newer version: saves
+    of the whole list if anything changed, and incremental saves if one of
+    the tasks being written changed.
+    """
+
+    default_filename = "tasks.json"
+    lazy = False
+    range_reads = False
+    incremental = False
 
     def __init__(self, filepath: str = None):
         """Initialize the storage handler.
@@ -24,9 +160,14 @@ class TaskStorage:
             home_dir = os.path.expanduser("~")
             data_dir = os.path.join(home_dir, ".termtasks")
             os.makedirs(data_dir, exist_ok=True)
-            self.filepath = os.path.join(data_dir, "tasks.json")
+            self.filepath = os.path.join(data_dir, self.default_filename)
         else:
             self.filepath = filepath
+        self.loaded_ranges: Optional[List[Tuple[datetime, datetime]]] = None
+        # Version of the storage last loaded or saved
+        self._synced_version = _UNSYNCED
+        # (index, index version) of a search index read from a current cache
+        self._cached_search = None
 
     def load_tasks(self) -> TaskList:
         """Load tasks from storage.
@@ -34,38 +175,719 @@ class TaskStorage:
         Returns:
             TaskList object containing stored tasks
         """
-        task_list = TaskList()
+        self.loaded_ranges = None
+        self._mark_synced()
+        return TaskList(self._read_all())
+
+    def _read_all(self) -> List[Task]:
+        """Read every stored task, in any order."""
+        tasks = []
 
         if not os.path.exists(self.filepath):
-            return task_list
+            return tasks
 
         try:
             with open(self.filepath, "r") as f:
                 data = json.load(f)
                 for task_data in data["tasks"]:
-                    task = Task.from_dict(task_data)
-                    task_list.tasks.append(task)
+                    tasks.append(Task.from_dict(task_data))
         except (json.JSONDecodeError, KeyError, FileNotFoundError):
             # Return empty task list if there's an error
             pass
 
-        task_list.sort_tasks()
+        return tasks
+
+    def _disk_version(self):
+        """Get a value that changes whenever the stored tasks change."""
+        return file_signature(self.filepath)
+
+    def _cache_signature(self):
+        """Get a value identifying the stored data, for caches kept on disk."""
+        return file_signature(self.filepath)
+
+    @property
+    def search_index_path(self) -> str:
+        """Return the path of the search index cache."""
+        return self.filepath + ".search"
+
+    def load_search_index(self, task_list: TaskList) -> "SearchIndex":
+        """Get a title index of every stored task and attach it to a TaskList.
+
+        The index is read from the cache if it was written for the stored
+        data, and built otherwise. Unsaved changes in the list are applied
+        to it.
+
+        Args:
+            task_list: The loaded tasks, in full or in windows
+
+        Returns:
+            The index, which the TaskList keeps current from now on
+        """
+        from termtasks.search import SearchIndex
+        signature = json.loads(json.dumps(self._cache_signature()))
+        index = None
+        from_cache = False
+        try:
+            with open(self.search_index_path, "r") as f:
+                data = json.load(f)
+            if data["version"] == SEARCH_CACHE_VERSION and data["signature"] == signature:
+                index = SearchIndex.from_dict(data)
+                from_cache = True
+        except (OSError, ValueError, KeyError, TypeError):
+            # Missing or unreadable cache: rebuild it
+            pass
+        if index is None:
+            index = SearchIndex(task_list.tasks if self.loaded_ranges is None else self._read_all())
+        for task_id in task_list.changes().removed:
+            index.remove(task_id)
+        task_list.attach_search_index(index)
+        self._cached_search = (index, index.version) if from_cache else None
+        return index
+
+    def save_search_index(self, index: "SearchIndex") -> None:
+        """Write the search index cache.
+
+        Call this once every change has been saved. Nothing is written if
+        another process changed the storage since, as the index would not
+        cover its changes.
+
+        Args:
+            index: Index of every stored task
+        """
+        if self.has_changed() or self._cached_search == (index, index.version):
+            # Stale, or the cache already holds it
+            return
+        data = {"version": SEARCH_CACHE_VERSION, "signature": self._cache_signature()}
+        data.update(index.to_dict())
+        try:
+            with atomic_write(self.search_index_path) as f:
+                json.dump(data, f, separators=(",", ":"))
+        except OSError:
+            # The cache is optional
+            pass
+
+    def _mark_synced(self) -> None:
+        """Remember the current storage version as the one we hold."""
+        self._synced_version = self._disk_version()
+
+    def has_changed(self) -> bool:
+        """Check whether the storage was changed since it was last loaded or saved.
+
+        This is cheap enough to poll from the main loop.
+        """
+        return (self._synced_version is not _UNSYNCED
+                and self._disk_version() != self._synced_version)
+
+    def _check_conflict(self) -> None:
+        """Refuse to overwrite storage that changed since it was last synced.
+
+        Raises:
+            StorageConflictError: If another process changed the storage
+        """
+        if self.has_changed():
+            raise StorageConflictError(f"{self.filepath} was changed by another process")
+
+    def reload(self, task_list: TaskList) -> int:
+        """Merge changes made to storage by other processes into a TaskList.
+
+        Only the loaded ranges are re-read if the list was loaded lazily.
+        Tasks with unsaved local changes keep their local version.
+
+        Args:
+            task_list: TaskList returned by ``load_tasks`` or ``load_tasks_around``
+
+        Returns:
+            Number of tasks added, changed or removed
+        """
+        version = self._disk_version()
+        if self.loaded_ranges is None:
+            tasks = self._read_all()
+        else:
+            tasks = [task for lo, hi in self.loaded_ranges
+                     for task in self.load_tasks_between(lo, hi)]
+            tasks.extend(task for task in self.load_recurring()
+                         if not in_ranges(task.start_time, self.loaded_ranges))
+        self._synced_version = version
+        return task_list.merge(tasks, self.loaded_ranges)
+
+    def load_tasks_around(self, date: datetime, margin_months: int = 1) -> TaskList:
+        """Load only the tasks of the month containing a date, plus a margin.
+
+        Args:
+            date: A date in the month to load
+            margin_months: Number of months to load on either side
+
+        Returns:
+            TaskList object containing the loaded tasks
+        """
+        self.loaded_ranges = []
+        self._mark_synced()
+        task_list = TaskList(self.load_recurring())
+        self.load_month(task_list, date, margin_months)
         return task_list
 
+    def load_month(self, task_list: TaskList, date: datetime, margin_months: int = 1) -> int:
+        """Page the month containing a date, plus a margin, into a TaskList.
+
+        Args:
+            task_list: TaskList returned by ``load_tasks_around``
+            date: A date in the month to load
+            margin_months: Number of months to load on either side
+
+        Returns:
+            Number of tasks added
+        """
+        return self.load_window(
+            task_list, shift_month(date, -margin_months), shift_month(date, margin_months + 1)
+        )
+
+    def load_window(self, task_list: TaskList, start: datetime, end: datetime) -> int:
+        """Add the tasks starting in [start, end) that aren't loaded yet.
+
+        Does nothing if the TaskList was loaded in full.
+
+        Args:
+            task_list: TaskList returned by ``load_tasks_around``
+            start: Inclusive lower bound on the start time
+            end: Exclusive upper bound on the start time
+
+        Returns:
+            Number of tasks added
+        """
+        return self.add_window(task_list, *self.read_window(start, end))
+
+    def read_window(self, start: datetime, end: datetime
+                    ) -> Tuple[List[Tuple[datetime, datetime]], List[Task]]:
+        """Read the stored tasks starting in [start, end) that aren't loaded yet.
+
+        Nothing is added to a TaskList, so this can run in a background
+        thread while the list is in use; pass the result to ``add_window``.
+
+        Args:
+            start: Inclusive lower bound on the start time
+            end: Exclusive upper bound on the start time
+
+        Returns:
+            (ranges that were read, tasks in them)
+        """
+        if self.loaded_ranges is None:
+            return [], []
+        missing = _subtract_ranges(start, end, self.loaded_ranges)
+        tasks = []
+        for lo, hi in missing:
+            tasks.extend(self.load_tasks_between(lo, hi))
+        return missing, tasks
+
+    def add_window(self, task_list: TaskList, ranges: List[Tuple[datetime, datetime]],
+                   tasks: List[Task]) -> int:
+        """Add tasks returned by ``read_window`` to a TaskList.
+
+        Tasks that were loaded in the meantime, or that are already in the
+        list because they were moved there from another window, are skipped.
+
+        Args:
+            task_list: TaskList returned by ``load_tasks_around``
+            ranges: Ranges returned by ``read_window``
+            tasks: Tasks returned by ``read_window``
+
+        Returns:
+            Number of tasks added
+        """
+        if self.loaded_ranges is None:
+            return 0
+        tasks = [
+            task for task in tasks
+            if task_list.get_task(task.id) is None
+            and not in_ranges(task.start_time, self.loaded_ranges)
+        ]
+        if tasks:
+            task_list.add_tasks(tasks, record_changes=False)
+        self.loaded_ranges = _merge_ranges(self.loaded_ranges + ranges)
+        return len(tasks)
+
+    def load_tasks_between(self, start: datetime, end: datetime) -> List[Task]:
+        """Load the tasks starting in the half-open range [start, end).
+
+        Args:
+            start: Inclusive lower bound on the start time
+            end: Exclusive upper bound on the start time
+
+        Returns:
+            Tasks in start-time order
+        """
+        return TaskList(self._read_all()).get_tasks_between(start, end)
+
+    def load_recurring(self) -> List[Task]:
+        """Load every recurring task.
+
+        Recurring tasks occur in every window, so lazily loaded lists hold
+        all of them whatever their start time.
+
+        Returns:
+            Recurring tasks in start-time order
+        """
+        return [task for task in self._read_all() if task.recurrence is not None]
+
+    def _add_occurrence_counts(self, counts: Dict[int, int], year: int, month: int,
+                               completed: Optional[bool]) -> Dict[int, int]:
+        """Add the occurrences of recurring tasks in a month to day counts."""
+        recurring = self.load_recurring()
+        if recurring:
+            for day, count in TaskList(recurring).count_tasks_by_day(year, month, completed).items():
+                counts[day] = counts.get(day, 0) + count
+        return counts
+
+    def count_tasks_by_day(self, year: int, month: int,
+                           completed: Optional[bool] = None) -> Dict[int, int]:
+        """Count the stored tasks on each day of a month.
+
+        Args:
+            year: Year
+            month: Month (1-12)
+            completed: If given, only count tasks with this completion state
+
+        Returns:
+            Mapping of day of month to task count
+        """
+        return TaskList(self._read_all()).count_tasks_by_day(year, month, completed)
+
     def save_tasks(self, task_list: TaskList) -> None:
         """Save tasks to storage.
 
         Args:
             task_list: TaskList object containing tasks to save
+
+        Raises:
+            StorageConflictError: If another process changed the file
         """
+        self._check_conflict()
         # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        os.makedirs(os.path.dirname(self.filepath) or ".", exist_ok=True)
 
         # Convert tasks to dictionary
         data = {
             "tasks": [task.to_dict() for task in task_list.tasks]
         }
 
-        # Write to file
-        with open(self.filepath, "w") as f:
+        # Write to a temporary file and rename it over the old one
+        with atomic_write(self.filepath) as f:
             json.dump(data, f, indent=2)
+        self._mark_synced()
+
+    def save_task(self, task_list: TaskList, task: Task) -> None:
+        """Save a single task that was added or changed.
+
+        The JSON backend has to rewrite the whole file; other backends
+        override this to persist just the one record.
+
+        Args:
+            task_list: TaskList object containing the task
+            task: The added or changed task
+        """
+        self.save_tasks(task_list)
+
+    def delete_task(self, task_list: TaskList, task_id: str) -> None:
+        """Delete a single task from storage.
+
+        Args:
+            task_list: TaskList object the task was removed from
+            task_id: ID of the removed task
+        """
+        self.save_tasks(task_list)
+
+    def save_changes(self, task_list: TaskList, changes: ChangeSet) -> None:
+        """Persist only the tasks that were added, changed or removed.
+
+        Non-incremental backends save the whole list once, however many
+        tasks changed.
+
+        Args:
+            task_list: TaskList object the changes were taken from
+            changes: Changes returned by ``TaskList.take_changes``
+        """
+        if not changes:
+            return
+        if not self.incremental:
+            self.save_tasks(task_list)
+            return
+        for task in changes.added + changes.updated:
+            self.save_task(task_list, task)
+        for task_id in changes.removed:
+            self.delete_task(task_list, task_id)
+
+    def close(self) -> None:
+        """Release any resources held by the storage backend."""
+
+
+class JournalTaskStorage(TaskStorage):
+    """Task storage backed by a snapshot plus an append-only journal.
+
+    The snapshot uses the same JSON format as ``TaskStorage``. Each change is
+    appended to ``<filepath>.journal`` as one small JSON record, so the cost
+    of an edit does not depend on the number of tasks. Once the journal
+    holds ``compact_every`` records, the snapshot is rewritten in a
+    background thread and the journal is started afresh.
+
+    Records appended by other processes are picked up by ``reload`` by
+    reading just the new end of the journal.
+    """
+
+    incremental = True
+
+    def __init__(self, filepath: str = None, compact_every: int = 1000, fsync: bool = False):
+        """Initialize the storage handler.
+
+        Args:
+            filepath: Path to the snapshot file. If None, uses default location.
+            compact_every: Number of journal records that triggers compaction
+            fsync: Whether to fsync the journal after every record
+        """
+        super().__init__(filepath)
+        self.journal_path = self.filepath + ".journal"
+        # Journal being folded into the snapshot by a running compaction
+        self.rotated_path = self.filepath + ".journal.old"
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self._journal = None
+        self._journal_records = 0
+        # Inode of the journal file and how far into it we have read
+        self._journal_inode: Optional[int] = None
+        self._journal_offset = 0
+        self._compactor: Optional[threading.Thread] = None
+        # Held by the compactor thread while it replaces the snapshot, drops
+        # the rotated journal and records the synced version
+        self._lock = threading.RLock()
+
+    def _read_all(self) -> List[Task]:
+        """Read the snapshot and replay the journal on top of it."""
+        records: Dict[str, Optional[dict]] = {}
+
+        with self._lock:
+            if os.path.exists(self.filepath):
+                try:
+                    with open(self.filepath, "r") as f:
+                        for task_data in json.load(f)["tasks"]:
+                            # Tasks sharing an ID are renamed as on loading
+                            # into a TaskList, which is what journal records
+                            # written since refer to
+                            task_data["id"] = unique_id(task_data["id"], records)
+                            records[task_data["id"]] = task_data
+                except (json.JSONDecodeError, KeyError):
+                    pass
+
+            self._journal_records, _ = self._replay(self.rotated_path, records)
+        signature = file_signature(self.journal_path)
+        self._journal_inode = signature[0] if signature else None
+        applied, self._journal_offset = self._replay(self.journal_path, records)
+        self._journal_records += applied
+
+        return [Task.from_dict(data) for data in records.values() if data is not None]
+
+    def _replay(self, path: str, records: Dict[str, Optional[dict]],
+                offset: int = 0) -> Tuple[int, int]:
+        """Apply the records of a journal file to a dict of task data.
+
+        Removed tasks are set to None. A partially written last record
+        (from a crash, or another process mid-append) is ignored.
+
+        Args:
+            path: Journal file
+            records: Task data by ID, updated in place
+            offset: Byte offset to start reading at
+
+        Returns:
+            (number of records applied, offset after the last complete record)
+        """
+        if not os.path.exists(path):
+            return 0, offset
+
+        applied = 0
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("op") == "put":
+                    records[record["task"]["id"]] = record["task"]
+                elif record.get("op") == "del":
+                    records[record["id"]] = None
+                applied += 1
+        return applied, offset
+
+    def _disk_version(self):
+        """Get the signature of the snapshot; the journal is checked separately."""
+        return file_signature(self.filepath)
+
+    def _cache_signature(self):
+        """Get the signatures of the snapshot and the journal."""
+        return file_signature(self.filepath), file_signature(self.journal_path)
+
+    def has_changed(self) -> bool:
+        """Check whether the snapshot was replaced or the journal grew.
+
+        While our own compaction is replacing the snapshot this reports no
+        change rather than waiting; the next poll sees the outcome.
+        """
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            if super().has_changed():
+                return True
+            if self._synced_version is _UNSYNCED:
+                return False
+        finally:
+            self._lock.release()
+        signature = file_signature(self.journal_path)
+        if signature is None:
+            return self._journal_inode is not None
+        return signature[0] != self._journal_inode or signature[1] != self._journal_offset
+
+    def reload(self, task_list: TaskList) -> int:
+        """Merge changes made by other processes into a TaskList.
+
+        If only the journal grew, just the new records are read.
+
+        Args:
+            task_list: TaskList returned by ``load_tasks``
+
+        Returns:
+            Number of tasks added, changed or removed
+        """
+        signature = file_signature(self.journal_path)
+        with self._lock:
+            replaced = self._disk_version() != self._synced_version
+            if replaced or signature is None or signature[0] != self._journal_inode \
+                    or signature[1] < self._journal_offset:
+                return super().reload(task_list)
+
+        records: Dict[str, Optional[dict]] = {}
+        applied, self._journal_offset = self._replay(self.journal_path, records, self._journal_offset)
+        self._journal_records += applied
+        return task_list.apply_external(
+            (Task.from_dict(data) for data in records.values() if data is not None),
+            [task_id for task_id, data in records.items() if data is None],
+        )
+
+    def _append(self, task_list: TaskList, record: dict) -> None:
+        """Append a record to the journal, compacting when it grows large."""
+        if self._journal is not None:
+            # Another process's compaction may have rotated the journal we
+            # hold open; appending to it would lose the record
+            signature = file_signature(self.journal_path)
+            if signature is None or signature[0] != os.fstat(self._journal.fileno()).st_ino:
+                self._journal.close()
+                self._journal = None
+        if self._journal is None:
+            os.makedirs(os.path.dirname(self.filepath) or ".", exist_ok=True)
+            self._journal = open(self.journal_path, "a")
+            if self._journal_inode is None and self._journal.tell() == 0:
+                self._journal_inode = os.fstat(self._journal.fileno()).st_ino
+        stat = os.fstat(self._journal.fileno())
+        self._journal.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+        if stat.st_ino == self._journal_inode and stat.st_size == self._journal_offset:
+            # Nobody else appended since we last read; skip our own record
+            self._journal_offset = self._journal.tell()
+
+        self._journal_records += 1
+        # Compacting now would need the other process's changes merged first;
+        # put it off until the main loop has reloaded
+        if self._journal_records >= self.compact_every and not self.has_changed():
+            self.compact(task_list)
+
+    def save_task(self, task_list: TaskList, task: Task) -> None:
+        """Append a record for an added or changed task.
+
+        Args:
+            task_list: TaskList object containing the task
+            task: The added or changed task
+        """
+        self._append(task_list, {"op": "put", "task": task.to_dict()})
+
+    def delete_task(self, task_list: TaskList, task_id: str) -> None:
+        """Append a record for a removed task.
+
+        Args:
+            task_list: TaskList object the task was removed from
+            task_id: ID of the removed task
+        """
+        self._append(task_list, {"op": "del", "id": task_id})
+
+    def save_changes(self, task_list: TaskList, changes: ChangeSet) -> None:
+        """Append records for the tasks that were added, changed or removed.
+
+        Args:
+            task_list: TaskList object the changes were taken from
+            changes: Changes returned by ``TaskList.take_changes``
+
+        Raises:
+            StorageConflictError: If another process changed one of the
+                tasks, or replaced the snapshot, since they were last read;
+                nothing is written
+        """
+        if not changes:
+            return
+        self._check_changes({task.id for task in changes.added + changes.updated}
+                            | set(changes.removed))
+        super().save_changes(task_list, changes)
+
+    def _check_changes(self, task_ids: Set[str]) -> None:
+        """Check that records appended by other processes leave some tasks alone.
+
+        Only the part of the journal not read yet is looked at. A replaced
+        snapshot or rotated journal can't be checked task by task, so it
+        counts as a conflict; ``reload`` merges it.
+
+        Raises:
+            StorageConflictError: If another process changed one of the tasks
+        """
+        with self._lock:
+            replaced = TaskStorage.has_changed(self)
+        signature = file_signature(self.journal_path)
+        offset = self._journal_offset
+        if signature is not None and signature[0] != self._journal_inode:
+            # A journal started by another process since we read it is all new
+            replaced = replaced or self._journal_inode is not None
+            offset = 0
+        elif signature is None:
+            replaced = replaced or self._journal_inode is not None
+        if replaced:
+            raise StorageConflictError(f"{self.filepath} was changed by another process")
+        if signature is None or signature[1] <= offset:
+            return
+        records: Dict[str, Optional[dict]] = {}
+        self._replay(self.journal_path, records, offset)
+        changed = task_ids & records.keys()
+        if changed:
+            raise StorageConflictError(
+                f"task {min(changed)!r} in {self.filepath} was changed by another process")
+
+    def save_tasks(self, task_list: TaskList) -> None:
+        """Write a full snapshot synchronously and clear the journal.
+
+        Args:
+            task_list: TaskList object containing tasks to save
+
+        Raises:
+            StorageConflictError: If another process changed the snapshot or
+                the journal since it was last read
+        """
+        self.compact(task_list, background=False)
+
+    def compact(self, task_list: TaskList, background: bool = True) -> None:
+        """Fold the journal into a new snapshot.
+
+        The current journal is renamed out of the way and a fresh one is
+        started, so edits made while the snapshot is written are not lost.
+        The rotated journal is deleted once the new snapshot is in place;
+        replaying it again after a crash is harmless.
+
+        Args:
+            task_list: TaskList object containing tasks to save
+            background: Whether to write the snapshot in a background thread
+
+        Raises:
+            StorageConflictError: If another process changed the snapshot or
+                the journal since it was last read; ``reload`` merges them
+        """
+        if self._compactor is not None:
+            if background and self._compactor.is_alive():
+                return
+            self._compactor.join()
+            self._compactor = None
+
+        if self.has_changed():
+            raise StorageConflictError(f"{self.filepath} was changed by another process")
+
+        os.makedirs(os.path.dirname(self.filepath) or ".", exist_ok=True)
+        data = {"tasks": [task.to_dict() for task in task_list.tasks]}
+
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if os.path.exists(self.journal_path):
+            if os.path.exists(self.rotated_path):
+                # A previous compaction did not finish; fold both journals in
+                with open(self.rotated_path, "a") as rotated, open(self.journal_path, "r") as f:
+                    rotated.write(f.read())
+                os.unlink(self.journal_path)
+            else:
+                os.replace(self.journal_path, self.rotated_path)
+        self._journal_records = 0
+        self._journal_inode, self._journal_offset = None, 0
+
+        if background:
+            self._compactor = threading.Thread(
+                target=self._write_snapshot, args=(data,), name="termtasks-compactor", daemon=True
+            )
+            self._compactor.start()
+        else:
+            self._write_snapshot(data)
+
+    def _write_snapshot(self, data: dict) -> None:
+        """Atomically replace the snapshot and drop the rotated journal."""
+        text = json.dumps(data, indent=2)
+        with self._lock:
+            with atomic_write(self.filepath) as f:
+                f.write(text)
+            self._mark_synced()
+            if os.path.exists(self.rotated_path):
+                os.unlink(self.rotated_path)
+
+    def close(self) -> None:
+        """Wait for a running compaction and close the journal."""
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+def open_storage(filepath: str = None, backend: str = None) -> TaskStorage:
+    """Create the storage handler for a backend.
+
+    The backend is chosen by, in order: the ``backend`` argument, the
+    ``TERMTASKS_BACKEND`` environment variable, and the file extension.
+    The file defaults to ``TERMTASKS_FILE`` if set.
+
+    Args:
+        filepath: Path to the task storage file. If None, uses default location.
+        backend: One of ``BACKENDS``
+
+    Returns:
+        A TaskStorage instance
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    if filepath is None:
+        filepath = os.environ.get("TERMTASKS_FILE") or None
+    if backend is None:
+        backend = os.environ.get("TERMTASKS_BACKEND") or None
+    if backend is None and filepath is not None:
+        backend = BACKEND_EXTENSIONS.get(os.path.splitext(filepath)[1].lower())
+    if backend is None:
+        backend = "json"
+
+    if backend == "json":
+        return TaskStorage(filepath)
+    if backend == "journal":
+        return JournalTaskStorage(filepath)
+    if backend == "sqlite":
+        from termtasks.utils.sqlite_storage import SQLiteTaskStorage
+        return SQLiteTaskStorage(filepath)
+    if backend == "lazy":
+        from termtasks.utils.lazy_storage import LazyTaskStorage
+        return LazyTaskStorage(filepath)
+    if backend == "binary":
+        from termtasks.utils.snapshot import BinaryTaskStorage
+        return BinaryTaskStorage(filepath)
+    raise ValueError(f"Unknown storage backend: {backend!r}")
@@ -0,0 +1,201 @@
+"""
+Tests for the headless screen backend, and the UI running on it.
+"""
+
+import curses
+import os
+import tempfile
+import unittest
+from datetime import date, datetime, time, timedelta
+from unittest import mock
+
+from termtasks.app import TaskSchedulerApp
+from termtasks.models import Task, TaskList
+from termtasks.ui.backend import PAUSE, HeadlessBackend, set_backend
+from termtasks.ui.calendar import CalendarWindow
+from termtasks.ui.perf_overlay import PerfOverlay
+from termtasks.ui.task_entry import TaskEntryWindow
+from termtasks.ui.task_list import TaskListWindow
+from termtasks.utils.perf import Profiler
+from termtasks.utils.storage import TaskStorage
+
+
+class TestHeadlessBackend(unittest.TestCase):
+    """Test drawing windows on the in-memory screen."""
+
+    def setUp(self):
+        self.backend = HeadlessBackend(30, 100)
+        previous = set_backend(self.backend)
+        self.addCleanup(set_backend, previous)
+        self.task_list = TaskList(
+            Task(f"Task {hour}", datetime(2025, 4, 22, hour, 0), completed=hour == 10)
+            for hour in range(9, 14)
+        )
+
+    def test_windows(self):
+        """Test that the windows' content ends up on the screen."""
+        task_list_win = TaskListWindow(20, 50, 0, 0)
+        entry_win = TaskEntryWindow(10, 50, 20, 0)
+        calendar_win = CalendarWindow(30, 50, 0, 50)
+        task_list_win.update(self.task_list, 1, True)
+        entry_win.update("Saving (1 pending)...")
+        calendar_win.update(datetime(2025, 4, 1), self.task_list)
+        for window in (task_list_win, entry_win, calendar_win):
+            window.noutrefresh()
+        self.backend.doupdate()
+
+        text = self.backend.text()
+        self.assertEqual(text[0][:3], "┌──")
+        self.assertIn("TASK LIST", text[0])
+        self.assertIn("☐ 2025-04-22 09:00 Task 9", text[1])
+        self.assertIn("CALENDAR - APRIL 2025", text[0])
+        self.assertEqual(self.backend.find("Saving (1 pending)..."), (28, 2))
+
+        # The selected line is highlighted; the window is inactive otherwise
+        self.assertEqual(self.backend.attr_at(2, 2), self.backend.color_pair(2))
+        self.assertEqual(self.backend.attr_at(1, 2), 0)
+        self.assertEqual(self.backend.frames, 1)
+
+    def test_conflict_prompt(self):
+        """Test the warning shown for a task that overlaps another."""
+        self.task_list.add_task(Task("Meeting", datetime(2025, 4, 22, 9, 0),
+                                     datetime(2025, 4, 22, 10, 0)))
+        entry_win = TaskEntryWindow(10, 80, 20, 0)
+        stdscr = self.backend.newwin(30, 100, 0, 0)
+        self.backend.feed(["n", PAUSE, "y"])
+        new = Task("Sync", datetime(2025, 4, 22, 9, 30), datetime(2025, 4, 22, 9, 45))
+        self.assertFalse(entry_win.confirm_conflicts(stdscr, new, self.task_list))
+        self.assertEqual(self.backend.find("Overlaps Meeting (09:00-10:00). Add anyway? [y/N]"),
+                         (26, 2))
+        self.assertTrue(entry_win.confirm_conflicts(stdscr, new, self.task_list))
+        self.assertTrue(entry_win.confirm_conflicts(
+            stdscr, Task("Later", datetime(2025, 4, 22, 10, 0)), self.task_list))
+
+    def test_addstr_bounds(self):
+        """Test that writing outside a window fails as with curses."""
+        window = self.backend.newwin(3, 10, 0, 0)
+        window.addstr(0, 8, "wrap")
+        self.assertEqual(window.text()[1][:2], "ap")
+        with self.assertRaises(Exception):
+            window.addstr(2, 9, "x")
+        with self.assertRaises(Exception):
+            window.addstr(3, 0, "x")
+
+    def test_perf_overlay_fits(self):
+        """Test that the overlay shrinks to fit a small screen, or is left out."""
+        overlay = PerfOverlay.fit(30, 100)
+        self.assertEqual((overlay.height, overlay.width, overlay.y, overlay.x), (7, 40, 1, 59))
+
+        overlay = PerfOverlay.fit(5, 20)
+        self.assertEqual((overlay.height, overlay.width, overlay.y, overlay.x), (4, 19, 1, 0))
+        overlay.update(Profiler(), 3)
+        self.assertEqual(overlay.win.text()[1], "│ frame     0.00  │")
+
+        self.assertIsNone(PerfOverlay.fit(3, 100))
+        self.assertIsNone(PerfOverlay.fit(30, 12))
+
+    def test_script_runs_out(self):
+        """Test that waiting for a key that will never come is an error."""
+        window = self.backend.newwin(3, 10, 0, 0)
+        self.backend.feed(["a", PAUSE, 258])
+        self.assertEqual(window.getch(), ord("a"))
+        window.timeout(100)
+        self.assertEqual([window.getch(), window.getch()], [-1, 258])
+        self.assertEqual(window.getch(), -1)
+        self.assertAlmostEqual(self.backend.clock(), 0.2)
+        window.timeout(-1)
+        with self.assertRaises(RuntimeError):
+            window.getch()
+
+
+class TestHeadlessApp(unittest.TestCase):
+    """Test the application loop with scripted keys."""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, "tasks.json")
+        patch = mock.patch.dict(os.environ, {"TERMTASKS_FILE": self.path,
+                                             "TERMTASKS_BACKEND": "json"})
+        patch.start()
+        self.addCleanup(patch.stop)
+        TaskStorage(self.path).save_tasks(TaskList([
+            Task("Standup", datetime(2025, 4, 22, 9, 0)),
+            Task("Review", datetime(2025, 4, 22, 11, 0)),
+        ]))
+
+    def test_add_and_complete(self):
+        """Test adding a task and completing one through the keyboard."""
+        backend = HeadlessBackend(40, 120, keys=["aLunch\n2025-04-22\n12:00\n\n\n", "jc", PAUSE, "q"])
+        app = TaskSchedulerApp(backend=backend)
+        app.run()
+
+        tasks = TaskStorage(self.path).load_tasks().tasks
+        self.assertEqual([task.title for task in tasks], ["Standup", "Review", "Lunch"])
+        self.assertEqual([task.completed for task in tasks], [False, True, False])
+        self.assertIn("☑ 2025-04-22 11:00 Review", "\n".join(backend.text()))
+
+    def test_conflict_warning(self):
+        """Test that adding an overlapping task asks for confirmation."""
+        TaskStorage(self.path).save_tasks(TaskList([
+            Task("Standup", datetime(2025, 4, 22, 9, 0), datetime(2025, 4, 22, 9, 30)),
+        ]))
+        add = "aSync\n2025-04-22\n09:15\n09:45\n\n"
+        backend = HeadlessBackend(40, 120, keys=[add, PAUSE, "n", add, PAUSE, "y", PAUSE, "q"])
+        app = TaskSchedulerApp(backend=backend)
+        app.run()
+
+        # The first attempt was declined
+        self.assertEqual([task.title for task in app.task_list.tasks], ["Standup", "Sync"])
+
+    def test_free_slot(self):
+        """Test adding a task in the next free slot of working hours."""
+        backend = HeadlessBackend(40, 120, keys=["f45\nFocus\n\n\n\n\n", PAUSE, "q"])
+        before = datetime.now()
+        app = TaskSchedulerApp(backend=backend)
+        app.run()
+
+        focus = app.task_list.tasks[-1]
+        self.assertEqual(focus.title, "Focus")
+        self.assertEqual(focus.end_time - focus.start_time, timedelta(minutes=45))
+        self.assertGreater(focus.start_time, before)
+        self.assertLess(focus.start_time.weekday(), 5)
+        self.assertGreaterEqual(focus.start_time.time(), time(9, 0))
+        self.assertLessEqual(focus.end_time.time(), time(17, 0))
+
+    def test_recurring_task(self):
+        """Test adding a recurring task and completing its next occurrence."""
+        backend = HeadlessBackend(40, 120, keys=["aGym\n2025-04-21\n07:00\n\nweekly mon\n",
+                                                 "c", PAUSE, "q"])
+        app = TaskSchedulerApp(backend=backend)
+        app.run()
+
+        gym = TaskStorage(self.path).load_tasks().tasks[0]
+        today = datetime.combine(date.today(), datetime.min.time())
+        monday = today + timedelta(days=-today.weekday() % 7, hours=7)
+        self.assertEqual(gym.recurrence.completed, {monday})
+        self.assertIn("↻ 2025-04-21 07:00 Gym (weekly on Mon)", "\n".join(backend.text()))
+
+    def test_search(self):
+        """Test typing a search query and stepping to the next match."""
+        backend = HeadlessBackend(40, 120, keys=["/REV", PAUSE, "\n", PAUSE, PAUSE, "q"])
+        app = TaskSchedulerApp(backend=backend)
+        app.run()
+
+        self.assertEqual(app.selected_task_index, 1)
+        self.assertIsNotNone(backend.find("/REV  1 match "))
+        y, x = backend.find("Review")
+        self.assertTrue(backend.attr_at(y, x) & curses.A_UNDERLINE)
+        self.assertTrue(os.path.exists(self.path + ".search"))
+
+    def test_year_view(self):
+        """Test switching the calendar to the year view."""
+        backend = HeadlessBackend(40, 120, keys=["\tv", PAUSE, "q"])
+        app = TaskSchedulerApp(backend=backend)
+        app.run()
+        self.assertIsNotNone(backend.find(f"YEAR - {datetime.now().year}"))
+        self.assertIsNotNone(backend.find("[n]ext year"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+"""
+Tests for the command-line interface.
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from datetime import datetime, timedelta
+from unittest import mock
+
+from termtasks import cli
+from termtasks.cli import main
+from termtasks.exporter import EXPORT_FORMATS
+from termtasks.importer import IMPORT_FORMATS
+from termtasks.utils.storage import TaskStorage
+
+
+class TestCommands(unittest.TestCase):
+    """Test the commands working on the configured storage."""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.dir = tmpdir.name
+        self.path = os.path.join(tmpdir.name, "tasks.json")
+        patch = mock.patch.dict(os.environ, {"TERMTASKS_FILE": self.path,
+                                             "TERMTASKS_BACKEND": "json"})
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def run_main(self, *argv):
+        """Run the command line, returning the exit status and output."""
+        out, err = io.StringIO(), io.StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            status = main(list(argv))
+        return status, out.getvalue(), err.getvalue()
+
+    def test_add_and_today(self):
+        """Test adding tasks and listing today's."""
+        today = datetime.now().strftime("%Y-%m-%d")
+        status, out, _ = self.run_main("add", "Lunch", today, "12:00", "13:00")
+        self.assertEqual(status, 0)
+        lunch_id = out.strip()
+        _, _, err = self.run_main("add", "Call", today, "12:30", "12:45")
+        self.assertIn(f"overlaps [ ] {today} 12:00-13:00 Lunch ({lunch_id})", err)
+        self.run_main("add", "Review", "2025-04-22")
+        self.run_main("add", "Gym", "2025-04-21", "07:00", "08:00", "--repeat", "daily")
+
+        _, out, _ = self.run_main("today")
+        stamp = today.replace("-", "")
+        self.assertEqual(out.splitlines(), [
+            f"[ ] {today} 07:00-08:00 Gym (20250421070000@{stamp}070000)",
+            f"[ ] {today} 12:00-13:00 Lunch ({lunch_id})",
+            f"[ ] {today} 12:30-12:45 Call ({stamp}123000)",
+        ])
+
+        _, out, _ = self.run_main("list")
+        self.assertEqual(out.splitlines()[:2], ["[R] 2025-04-21 07:00-08:00 Gym (20250421070000) daily",
+                                                "[ ] 2025-04-22 00:00 Review (20250422000000)"])
+
+        status, _, err = self.run_main("add", "Backwards", today, "10:00", "09:00")
+        self.assertEqual(status, 1)
+        self.assertIn("ends before", err)
+        status, _, err = self.run_main("add", "Bad", today, "--repeat", "hourly")
+        self.assertEqual(status, 1)
+        with self.assertRaises(SystemExit), redirect_stderr(io.StringIO()):
+            main(["add", "Bad", "tomorrow"])
+
+    def test_done(self):
+        """Test completing tasks, occurrences and the next occurrence of a series."""
+        self.run_main("add", "Review", "2025-04-22", "09:00")
+        self.run_main("add", "Gym", "2025-04-21", "07:00", "--repeat", "daily")
+        self.assertEqual(self.run_main("done", "20250422090000")[0], 0)
+        self.assertEqual(self.run_main("done", "20250421070000@20250423070000")[0], 0)
+        self.assertEqual(self.run_main("done", "20250421070000")[0], 0)
+
+        _, out, _ = self.run_main("range", "2025-04-22", "2025-04-23", "--completed")
+        self.assertEqual(out.splitlines(), ["[x] 2025-04-22 09:00 Review (20250422090000)",
+                                            "[x] 2025-04-23 07:00 Gym (20250421070000@20250423070000)"])
+        tomorrow = datetime.now() + timedelta(days=1)
+        _, out, _ = self.run_main("range", tomorrow.strftime("%Y-%m-%d"), "--completed")
+        self.assertEqual(out, "")
+        _, out, _ = self.run_main("today", "--completed")
+        self.assertIn("Gym", out)
+
+        self.run_main("done", "20250422090000", "--undo")
+        _, out, _ = self.run_main("list", "--completed")
+        self.assertEqual(out, "")
+
+        for task_id in ("missing", "20250421070000@20250423080000", "20250421070000@soon"):
+            status, _, err = self.run_main("done", task_id)
+            self.assertEqual(status, 1)
+            self.assertTrue(err.startswith("termtasks: "))
+
+        status, _, err = self.run_main("range", "2025-04-23", "2025-04-22")
+        self.assertEqual(status, 1)
+
+    def test_lazy_imports(self):
+        """Test that commands don't import the UI, importer, exporter or indexes."""
+        code = ("import sys; from termtasks.cli import build_parser; build_parser(); "
+                "print(' '.join(sorted(sys.modules)))")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        modules = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True,
+                                 text=True, cwd=root).stdout.split()
+        for module in ("curses", "termtasks.app", "termtasks.ui", "termtasks.importer",
+                       "termtasks.exporter", "termtasks.intervals", "termtasks.search"):
+            self.assertNotIn(module, modules)
+        # The parser's copies of the format lists
+        self.assertEqual(cli.IMPORT_FORMATS, IMPORT_FORMATS)
+        self.assertEqual(cli.EXPORT_FORMATS, EXPORT_FORMATS)
+
+    def write_csv(self):
+        """Write a CSV file with one good and one broken record."""
+        csv_path = os.path.join(self.dir, "events.csv")
+        with open(csv_path, "w") as f:
+            f.write("title,start_time,end_time\n"
+                    "Lunch,2025-04-22 12:00,2025-04-22 13:00\n"
+                    "Broken,someday,\n")
+        return csv_path
+
+    def test_import(self):
+        """Test importing a CSV file twice."""
+        csv_path = self.write_csv()
+
+        status, out, err = self.run_main("import", csv_path)
+        self.assertEqual(status, 0)
+        self.assertIn("Imported 1 tasks", out)
+        self.assertIn("line 3", err)
+        self.assertEqual([task.title for task in TaskStorage(self.path).load_tasks().tasks], ["Lunch"])
+
+        status, out, _ = self.run_main("import", csv_path)
+        self.assertIn("Imported 0 tasks", out)
+        self.assertIn("1 duplicates", out)
+
+        with mock.patch.object(TaskStorage, "close", autospec=True) as close:
+            status, _, err = self.run_main("import", os.path.join(self.dir, "missing.ics"))
+        self.assertEqual(status, 1)
+        self.assertIn("missing.ics", err)
+        close.assert_called_once()
+
+    def test_export(self):
+        """Test exporting a range to stdout and to a file."""
+        self.run_main("import", self.write_csv())
+        status, out, _ = self.run_main("export", "--from", "2025-04-22", "--to", "2025-04-22")
+        self.assertEqual(status, 0)
+        self.assertEqual([json.loads(line)["title"] for line in out.splitlines()], ["Lunch"])
+        _, out, _ = self.run_main("export", "--from", "2025-04-23")
+        self.assertEqual(out, "")
+
+        ics_path = os.path.join(self.dir, "out.ics")
+        status, _, err = self.run_main("export", "--pending", "-o", ics_path)
+        self.assertEqual(status, 0)
+        self.assertIn("Exported 1 tasks", err)
+        with open(ics_path, newline="") as f:
+            self.assertIn("SUMMARY:Lunch\r\n", f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -11,6 +11,9 @@ from termtasks.utils.date_utils import (
     days_in_month,
     next_month,
     prev_month,
+    shift_month,
+    to_epoch_us,
+    from_epoch_us,
     format_date_for_display,
     format_time_for_display,
     parse_date_time,
@@ -82,6 +85,18 @@ class TestDateUtils(unittest.TestCase):
         self.assertEqual(prev_date.month, 12)
         self.assertEqual(prev_date.day, 1)
 
+    def test_shift_month(self):
+        """Test moving several months at once."""
+        self.assertEqual(shift_month(datetime(2025, 4, 15), 0), datetime(2025, 4, 1))
+        self.assertEqual(shift_month(datetime(2025, 11, 15), 3), datetime(2026, 2, 1))
+        self.assertEqual(shift_month(datetime(2025, 2, 15), -2), datetime(2024, 12, 1))
+
+    def test_epoch_round_trip(self):
+        """Test converting to and from epoch microseconds."""
+        date = datetime(2025, 4, 22, 9, 30, 15, 250)
+        self.assertEqual(to_epoch_us(datetime(1970, 1, 2)), 86400 * 10**6)
+        self.assertEqual(from_epoch_us(to_epoch_us(date)), date)
+
     def test_format_date_for_display(self):
         """Test formatting dates for display."""
         date = datetime(2025, 4, 22)
@@ -0,0 +1,116 @@
+"""
+Tests for the UI event loop.
+"""
+
+import unittest
+
+from termtasks.ui.event_loop import EventLoop
+
+
+class FakeScreen:
+    """Scripted key source driving a fake clock.
+
+    ``script`` is a list of (time, key) pairs. ``getch`` returns the next
+    key once the clock has reached its time; otherwise it advances the
+    clock by the timeout and returns -1, like a curses window would.
+    """
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.now = 0.0
+        self._timeout = -1
+
+    def clock(self):
+        return self.now
+
+    def timeout(self, ms):
+        self._timeout = ms
+
+    def getch(self):
+        if self.script and self.script[0][0] <= self.now:
+            return self.script.pop(0)[1]
+        if self._timeout < 0:
+            if not self.script:
+                raise AssertionError("blocked with no input left")
+            self.now = self.script[0][0]
+        else:
+            target = self.now + self._timeout / 1000
+            if self.script and self.script[0][0] <= target:
+                self.now = self.script[0][0]
+            else:
+                self.now = target
+                return -1
+        return self.script.pop(0)[1]
+
+
+class TestEventLoop(unittest.TestCase):
+    """Test the EventLoop class."""
+
+    def test_batches_queued_keys(self):
+        """Test that keys queued during a frame are handled as one batch."""
+        screen = FakeScreen([(0.0, ord("j"))] * 50 + [(1.0, ord("q"))])
+        loop = EventLoop(screen, max_fps=30, clock=screen.clock)
+        batches, frames = [], []
+
+        def handle_keys(keys):
+            batches.append(keys)
+            if ord("q") in keys:
+                loop.stop()
+
+        loop.run(handle_keys, lambda: frames.append(screen.now))
+        self.assertEqual([len(batch) for batch in batches], [50, 1])
+        # The initial frame and one after the batch
+        self.assertEqual(len(frames), 2)
+
+    def test_handlers_read_blocking(self):
+        """Test that key handlers can wait for keys, as prompts do."""
+        screen = FakeScreen([(0.0, ord("a")), (1.0, ord("y")), (2.0, ord("q"))])
+        loop = EventLoop(screen, max_fps=30, clock=screen.clock)
+        answers = []
+
+        def handle_keys(keys):
+            if ord("a") in keys:
+                answers.append(screen.getch())
+            if ord("q") in keys:
+                loop.stop()
+
+        loop.run(handle_keys, lambda: None)
+        self.assertEqual(answers, [ord("y")])
+
+    def test_frame_rate_cap(self):
+        """Test that rendering is capped to the maximum frame rate."""
+        # A key every millisecond for a second
+        script = [(i / 1000, ord("j")) for i in range(1000)] + [(1.0, ord("q"))]
+        screen = FakeScreen(script)
+        loop = EventLoop(screen, max_fps=10, clock=screen.clock)
+        frames = []
+
+        def handle_keys(keys):
+            if ord("q") in keys:
+                loop.stop()
+
+        loop.run(handle_keys, lambda: frames.append(screen.now))
+        self.assertLessEqual(len(frames), 12)
+        gaps = [b - a for a, b in zip(frames, frames[1:])]
+        self.assertTrue(all(gap >= 0.1 - 1e-9 for gap in gaps))
+
+    def test_timers(self):
+        """Test repeating and one-shot timers and render requests."""
+        screen = FakeScreen([(1.05, ord("q"))])
+        loop = EventLoop(screen, clock=screen.clock)
+        ticks, once = [], []
+        loop.call_every(0.25, lambda: ticks.append(screen.now))
+        loop.call_later(0.5, lambda: once.append(screen.now) or True)
+        cancelled = loop.call_later(0.6, lambda: once.append("cancelled"))
+        cancelled.cancel()
+        frames = []
+
+        loop.run(lambda keys: loop.stop(), lambda: frames.append(screen.now))
+        self.assertEqual(ticks, [0.25, 0.5, 0.75, 1.0])
+        self.assertEqual(once, [0.5])
+        # Initial frame and the one the one-shot timer asked for
+        self.assertEqual(frames, [0.0, 0.5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Tests for exporting tasks to iCalendar, CSV and JSON Lines.
+"""
+
+import io
+import json
+import unittest
+from datetime import datetime
+
+from termtasks.exporter import export_tasks, select_tasks
+from termtasks.importer import read_csv, read_ics
+from termtasks.models import Task, TaskList
+from termtasks.recurrence import WEEKLY, Recurrence
+
+
+def make_tasks():
+    """Create tasks spread over a few weeks, with a weekly series."""
+    gym = Task("Gym", datetime(2025, 3, 3, 7, 0), datetime(2025, 3, 3, 8, 0), id="gym",
+               recurrence=Recurrence(WEEKLY, by_weekday=(0,), until=datetime(2025, 4, 30),
+                                     exceptions=frozenset({datetime(2025, 4, 14, 7, 0)}),
+                                     completed=frozenset({datetime(2025, 3, 3, 7, 0),
+                                                          datetime(2025, 3, 10, 7, 0)})))
+    return [
+        gym,
+        Task("Old", datetime(2025, 1, 10, 9, 0), id="old"),
+        Task("Lunch, with \"Sam\"", datetime(2025, 4, 22, 12, 0), datetime(2025, 4, 22, 13, 0),
+             id="lunch"),
+        Task("Report", datetime(2025, 4, 23, 17, 0), id="report", completed=True),
+        Task("Holiday", datetime(2025, 5, 1), id="holiday"),
+        Task("Later", datetime(2025, 6, 1, 9, 0), id="later"),
+    ]
+
+
+class TestSelectTasks(unittest.TestCase):
+    """Test choosing the tasks to export."""
+
+    def setUp(self):
+        self.task_list = TaskList(make_tasks())
+
+    def ids(self, *args, **kwargs):
+        """Select tasks, returning their IDs."""
+        return [task.id for task in select_tasks(self.task_list, *args, **kwargs)]
+
+    def test_all(self):
+        """Test that every task is selected in start-time order."""
+        self.assertEqual(self.ids(), ["old", "gym", "lunch", "report", "holiday", "later"])
+
+    def test_range(self):
+        """Test that series are selected by their occurrences."""
+        self.assertEqual(self.ids(datetime(2025, 4, 20), datetime(2025, 5, 2)),
+                         ["gym", "lunch", "report", "holiday"])
+        self.assertEqual(self.ids(datetime(2025, 5, 1), datetime(2025, 5, 2)), ["holiday"])
+        self.assertEqual(self.ids(end=datetime(2025, 3, 1)), ["old"])
+        self.assertEqual(self.ids(datetime(2025, 6, 2)), [])
+
+    def test_completed(self):
+        """Test filtering by completion."""
+        self.assertEqual(self.ids(datetime(2025, 4, 1), completed=True), ["report"])
+        self.assertEqual(self.ids(datetime(2025, 4, 1), completed=False),
+                         ["gym", "lunch", "holiday", "later"])
+
+
+class TestWriters(unittest.TestCase):
+    """Test that exported files import back unchanged."""
+
+    def export(self, fmt):
+        """Export the sample tasks, returning the text."""
+        out = io.StringIO(newline="")
+        self.assertEqual(export_tasks(make_tasks(), out, fmt), 6)
+        return out.getvalue()
+
+    def assertRoundTrip(self, tasks):
+        """Assert that the tasks equal the sample tasks."""
+        original = {task.id: task.to_dict() for task in make_tasks()}
+        self.assertEqual({task.id: task.to_dict() for task in tasks}, original)
+
+    def test_jsonl(self):
+        """Test that each line is a storage record."""
+        lines = self.export("jsonl").splitlines()
+        self.assertRoundTrip(Task.from_dict(json.loads(line)) for line in lines)
+
+    def test_csv(self):
+        """Test that the CSV uses the importer's own columns."""
+        text = self.export("csv")
+        self.assertTrue(text.startswith("id,title,start_time,end_time,completed,recurrence\r\n"))
+        self.assertRoundTrip(read_csv(io.StringIO(text, newline="")))
+
+    def test_ics(self):
+        """Test events, rules, exceptions and completion, of occurrences too."""
+        text = self.export("ics")
+        self.assertIn("DTSTART;VALUE=DATE:20250501\r\n", text)
+        self.assertIn("RRULE:FREQ=WEEKLY;BYDAY=MO;UNTIL=20250430T000000\r\n", text)
+        self.assertIn("EXDATE:20250414T070000\r\n", text)
+        self.assertIn("X-TERMTASKS-COMPLETED-OCCURRENCE:20250310T070000\r\n", text)
+        self.assertRoundTrip(read_ics(io.StringIO(text, newline="")))
+
+    def test_ics_folding(self):
+        """Test that long lines are folded without splitting characters."""
+        title = "Planning " + "é" * 100
+        out = io.StringIO(newline="")
+        export_tasks([Task(title, datetime(2025, 4, 22, 9, 0), id="long")], out, "ics")
+        lines = out.getvalue().split("\r\n")
+        self.assertTrue(all(len(line.encode("utf-8")) <= 75 for line in lines))
+        self.assertEqual(next(read_ics(io.StringIO(out.getvalue(), newline=""))).title, title)
+
+    def test_unknown_format(self):
+        """Test that an unknown format is rejected."""
+        with self.assertRaises(ValueError):
+            export_tasks([], io.StringIO(), "xml")
+
+
+if __name__ == "__main__":
+    unittest.main()
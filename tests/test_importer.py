@@ -0,0 +1,162 @@
+"""
+Tests for importing tasks from iCalendar and CSV files.
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+from termtasks.importer import import_tasks, read_csv, read_ics
+from termtasks.models import Task, TaskList
+from termtasks.recurrence import WEEKLY
+
+ICS = """\
+BEGIN:VCALENDAR
+VERSION:2.0
+BEGIN:VEVENT
+UID:standup@example.com
+DTSTART:20250421T090000
+DTEND:20250421T091500
+RRULE:FREQ=WEEKLY;BYDAY=MO,WE,FR;UNTIL=20250530
+EXDATE:20250423T090000
+SUMMARY:Standup\\, team
+BEGIN:VALARM
+ACTION:DISPLAY
+DESCRIPTION:Reminder
+END:VALARM
+END:VEVENT
+BEGIN:VEVENT
+UID:standup@example.com
+RECURRENCE-ID:20250425T090000
+DTSTART:20250425T100000
+DURATION:PT30M
+SUMMARY:Standup (moved)
+END:VEVENT
+BEGIN:VEVENT
+UID:holiday
+DTSTART;VALUE=DATE:20250501
+DTEND;VALUE=DATE:20250502
+SUMMARY:Holiday with a long title that is
+  folded
+END:VEVENT
+BEGIN:VTODO
+UID:report
+DUE:20250422T170000
+STATUS:COMPLETED
+SUMMARY:Report
+END:VTODO
+BEGIN:VEVENT
+UID:broken
+SUMMARY:No start
+END:VEVENT
+END:VCALENDAR
+"""
+
+CSV = """\
+Subject,Start Date,Start Time,End Date,End Time,All Day Event
+Lunch,04/22/2025,12:00 PM,04/22/2025,1:00 PM,False
+Offsite,2025-04-24,,2025-04-24,,True
+Nothing,not a date,,,,
+"""
+
+
+class TestReaders(unittest.TestCase):
+    """Test the iCalendar and CSV parsers."""
+
+    def test_ics(self):
+        """Test events, to-dos, recurrence, overrides and folded lines."""
+        warnings = []
+        tasks = {task.id: task for task in read_ics(ICS.splitlines(True), warnings.append)}
+        self.assertEqual(set(tasks), {"standup@example.com", "standup@example.com@20250425090000",
+                                      "holiday", "report"})
+
+        standup = tasks["standup@example.com"]
+        self.assertEqual(standup.title, "Standup, team")
+        self.assertEqual(standup.end_time, datetime(2025, 4, 21, 9, 15))
+        rule = standup.recurrence
+        self.assertEqual((rule.freq, rule.by_weekday), (WEEKLY, (0, 2, 4)))
+        self.assertEqual(rule.until, datetime(2025, 5, 30, 23, 59, 59))
+        # The moved occurrence is excluded from the series
+        self.assertEqual(rule.exceptions, {datetime(2025, 4, 23, 9, 0), datetime(2025, 4, 25, 9, 0)})
+        moved = tasks["standup@example.com@20250425090000"]
+        self.assertEqual((moved.start_time, moved.end_time),
+                         (datetime(2025, 4, 25, 10, 0), datetime(2025, 4, 25, 10, 30)))
+
+        holiday = tasks["holiday"]
+        self.assertEqual(holiday.title, "Holiday with a long title that is folded")
+        self.assertTrue(holiday.is_all_day)
+        self.assertTrue(tasks["report"].completed)
+        self.assertEqual(tasks["report"].start_time, datetime(2025, 4, 22, 17, 0))
+
+        self.assertEqual(len(warnings), 1)
+        self.assertIn("no DTSTART", warnings[0])
+        with self.assertRaises(ValueError):
+            list(read_ics(ICS.splitlines(True)))
+
+    def test_csv(self):
+        """Test calendar-export columns and the exporter's own columns."""
+        warnings = []
+        tasks = list(read_csv(CSV.splitlines(True), warnings.append))
+        self.assertEqual([task.title for task in tasks], ["Lunch", "Offsite"])
+        self.assertEqual((tasks[0].start_time, tasks[0].end_time),
+                         (datetime(2025, 4, 22, 12, 0), datetime(2025, 4, 22, 13, 0)))
+        self.assertTrue(tasks[1].is_all_day)
+        self.assertEqual(len(warnings), 1)
+        self.assertIn("line 4", warnings[0])
+        # Records without an ID get a stable one
+        self.assertEqual(tasks[0].id, list(read_csv(CSV.splitlines(True), warnings.append))[0].id)
+
+        own = ('id,title,start_time,end_time,completed,recurrence\n'
+               'gym,Gym,2025-04-21T07:00:00,2025-04-21T08:00:00,True,weekly mon\n'
+               'yoga,Yoga,2025-04-22T07:00:00,,False,"{""freq"": ""daily"", ""count"": 3}"\n')
+        gym, yoga = read_csv(own.splitlines(True))
+        self.assertEqual((gym.id, gym.completed, gym.recurrence.by_weekday), ("gym", True, (0,)))
+        self.assertEqual(yoga.recurrence.count, 3)
+
+    def test_csv_offsets(self):
+        """Test that times with a UTC offset become local times, mixing with naive ones."""
+        rows = ('title,start_time,end_time\n'
+                'Call,2025-04-22T09:00:00+02:00,2025-04-22T10:00:00Z\n'
+                'Trip,2025-04-22T00:00:00,2025-04-23T12:00:00+00:00\n')
+        call, trip = read_csv(rows.splitlines(True))
+
+        def local(*args, tzinfo):
+            return datetime(*args, tzinfo=tzinfo).astimezone().replace(tzinfo=None)
+
+        self.assertEqual(call.start_time, local(2025, 4, 22, 7, 0, tzinfo=timezone.utc))
+        self.assertEqual(call.end_time, local(2025, 4, 22, 10, 0, tzinfo=timezone.utc))
+        self.assertIsNone(call.start_time.tzinfo)
+        self.assertEqual(trip.start_time, datetime(2025, 4, 22, 0, 0))
+        self.assertEqual(trip.end_time, local(2025, 4, 23, 12, 0, tzinfo=timezone.utc))
+
+
+class TestImportTasks(unittest.TestCase):
+    """Test importing files into a TaskList."""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, "calendar.ics")
+        with open(self.path, "w") as f:
+            f.write(ICS)
+
+    def test_import(self):
+        """Test that tasks are added once, with progress reports."""
+        task_list = TaskList([Task("Report", datetime(2025, 4, 22, 17, 0), id="report")])
+        reports = []
+        stats = import_tasks(task_list, self.path, warn=lambda message: None,
+                             progress=lambda stats: reports.append(stats.read), batch_size=2)
+        self.assertEqual((stats.read, stats.added, stats.duplicates, stats.warnings), (4, 3, 1, 1))
+        self.assertEqual(reports, [2, 4])
+        self.assertEqual(len(task_list.tasks), 4)
+        self.assertEqual(task_list.change_count, 3)
+        self.assertEqual([task.title for task in task_list.get_tasks_for_date(datetime(2025, 4, 25))],
+                         ["Standup (moved)"])
+
+        stats = import_tasks(task_list, self.path, warn=lambda message: None)
+        self.assertEqual((stats.added, stats.duplicates), (0, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Tests for the interval index.
+"""
+
+import random
+import unittest
+from datetime import datetime, timedelta
+
+from termtasks.intervals import IntervalIndex
+from termtasks.models import Task
+
+
+class TestIntervalIndex(unittest.TestCase):
+    """Test the IntervalIndex class."""
+
+    def setUp(self):
+        self.tasks = [
+            Task("Standup", datetime(2025, 4, 22, 9, 0), datetime(2025, 4, 22, 9, 30), id="standup"),
+            Task("Review", datetime(2025, 4, 22, 9, 15), datetime(2025, 4, 22, 11, 0), id="review"),
+            Task("Lunch", datetime(2025, 4, 22, 12, 0), datetime(2025, 4, 22, 13, 0), id="lunch"),
+            Task("Offsite", datetime(2025, 4, 21, 8, 0), datetime(2025, 4, 23, 18, 0), id="offsite"),
+            Task("Reminder", datetime(2025, 4, 22, 10, 0), id="reminder"),
+        ]
+        self.index = IntervalIndex(self.tasks)
+
+    def ids(self, tasks):
+        return [task.id for task in tasks]
+
+    def test_overlapping(self):
+        """Test half-open overlap queries in start-time order."""
+        self.assertEqual(len(self.index), 4)
+        day = datetime(2025, 4, 22)
+        self.assertEqual(self.ids(self.index.overlapping(day.replace(hour=9, minute=20), day.replace(hour=12))),
+                         ["offsite", "standup", "review"])
+        # Touching intervals don't overlap
+        self.assertEqual(self.ids(self.index.overlapping(day.replace(hour=11), day.replace(hour=12))),
+                         ["offsite"])
+        self.assertEqual(self.index.overlapping(datetime(2025, 4, 24), datetime(2025, 4, 25)), [])
+
+    def test_add_and_remove(self):
+        """Test that the index follows added and removed tasks."""
+        review = self.tasks[1]
+        self.index.remove(review)
+        self.index.remove(review)
+        self.assertEqual(len(self.index), 3)
+        self.assertNotIn("review", self.ids(self.index.overlapping(datetime(2025, 4, 22),
+                                                                   datetime(2025, 4, 23))))
+        review.start_time = datetime(2025, 4, 24, 9, 0)
+        review.end_time = datetime(2025, 4, 24, 10, 0)
+        self.index.add(review)
+        self.assertEqual(self.ids(self.index.overlapping(datetime(2025, 4, 24), datetime(2025, 4, 25))),
+                         ["review"])
+
+    def test_matches_scan(self):
+        """Test random queries against a linear scan while tasks change."""
+        rng = random.Random(7)
+        base = datetime(2025, 1, 1)
+        tasks = []
+        for i in range(300):
+            start = base + timedelta(minutes=rng.randrange(0, 60 * 24 * 30, 15))
+            tasks.append(Task(f"Task {i}", start, start + timedelta(minutes=rng.choice((15, 60, 600, 3000))),
+                              id=f"t{i}"))
+        index = IntervalIndex(tasks[:200])
+        live = tasks[:200]
+        for task in tasks[200:]:
+            index.add(task)
+            live.append(task)
+        for task in rng.sample(live, 100):
+            index.remove(task)
+            live.remove(task)
+
+        for _ in range(200):
+            start = base + timedelta(minutes=rng.randrange(0, 60 * 24 * 31))
+            end = start + timedelta(minutes=rng.randrange(1, 3000))
+            expected = sorted((task for task in live if task.start_time < end and task.end_time > start),
+                              key=lambda task: (task.start_time, task.id))
+            self.assertEqual(self.ids(index.overlapping(start, end)), self.ids(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,9 +3,10 @@ Tests for task models.
 """
 
 import unittest
-from datetime import datetime
+from datetime import date, datetime, time, timedelta
 
-from termtasks.models import Task, TaskList
+from termtasks.models import Occurrence, Task, TaskList
+from termtasks.recurrence import WEEKLY, YEARLY, Recurrence
 
 
 class TestTask(unittest.TestCase):
@@ -172,6 +173,277 @@ class TestTaskList(unittest.TestCase):
         self.assertEqual(task_list.tasks[1].title, "Task 2")
         self.assertEqual(task_list.tasks[2].title, "Task 3")
 
+    def test_get_tasks_between(self):
+        """Test retrieving tasks in a start-time range."""
+        task_list = TaskList()
+        task_list.add_task(Task("Task 1", datetime(2025, 4, 21, 9, 0)))
+        task_list.add_task(Task("Task 2", datetime(2025, 4, 22, 9, 0)))
+        task_list.add_task(Task("Task 3", datetime(2025, 4, 23, 9, 0)))
+
+        # The range is half-open
+        tasks = task_list.get_tasks_between(datetime(2025, 4, 22, 9, 0), datetime(2025, 4, 23, 9, 0))
+        self.assertEqual([t.title for t in tasks], ["Task 2"])
+
+        tasks = task_list.get_tasks_between(datetime(2025, 4, 1), datetime(2025, 5, 1))
+        self.assertEqual(len(tasks), 3)
+
+    def test_count_tasks_by_day(self):
+        """Test counting tasks for each day of a month."""
+        task_list = TaskList()
+        task1 = Task("Task 1", datetime(2025, 4, 22, 9, 0))
+        task_list.add_task(task1)
+        task_list.add_task(Task("Task 2", datetime(2025, 4, 22, 15, 0)))
+        task_list.add_task(Task("Task 3", datetime(2025, 4, 30, 10, 0)))
+        task_list.add_task(Task("Task 4", datetime(2025, 5, 1, 10, 0)))
+
+        self.assertEqual(task_list.count_tasks_by_day(2025, 4), {22: 2, 30: 1})
+
+        # Completion toggles keep the completed counts current
+        task_list.set_completed(task1, True)
+        self.assertTrue(task1.completed)
+        self.assertEqual(task_list.count_tasks_by_day(2025, 4, completed=True), {22: 1})
+        self.assertEqual(task_list.count_tasks_by_day(2025, 4, completed=False), {22: 1, 30: 1})
+
+    def test_index_after_remove(self):
+        """Test that removing a task updates the date index."""
+        task_list = TaskList()
+        task_list.add_task(Task("Task 1", datetime(2025, 4, 22, 9, 0), id="task1"))
+        task_list.add_task(Task("Task 2", datetime(2025, 4, 22, 10, 0), id="task2"))
+
+        task_list.remove_task("task1")
+
+        self.assertEqual(len(task_list.get_tasks_for_date(datetime(2025, 4, 22))), 1)
+        self.assertEqual(task_list.count_tasks_by_day(2025, 4), {22: 1})
+
+    def test_tasks_view_is_read_only(self):
+        """Test that the tasks view cannot be mutated directly."""
+        task_list = TaskList()
+        task_list.add_task(Task("Task 1", datetime(2025, 4, 22, 9, 0)))
+
+        self.assertFalse(hasattr(task_list.tasks, "append"))
+        with self.assertRaises(TypeError):
+            task_list.tasks[0] = Task("Task 2", datetime(2025, 4, 22, 10, 0))
+
+    def test_duplicate_ids_are_made_unique(self):
+        """Test that tasks created for the same minute get distinct IDs."""
+        task_list = TaskList()
+        task1 = Task("Task 1", datetime(2025, 4, 22, 9, 0))
+        task2 = Task("Task 2", datetime(2025, 4, 22, 9, 0))
+        task_list.add_task(task1)
+        task_list.add_task(task2)
+
+        self.assertNotEqual(task1.id, task2.id)
+        self.assertIs(task_list.get_task(task2.id), task2)
+
+        # Removing one leaves the other in place
+        self.assertIs(task_list.remove_task(task1.id), task1)
+        self.assertEqual(list(task_list.tasks), [task2])
+        self.assertIsNone(task_list.remove_task(task1.id))
+
+    def test_add_tasks(self):
+        """Test bulk insertion of unordered tasks."""
+        task2 = Task("Task 2", datetime(2025, 4, 22, 10, 0))
+        task1 = Task("Task 1", datetime(2025, 4, 22, 9, 0))
+        task3 = Task("Task 3", datetime(2025, 4, 23, 9, 0))
+        task_list = TaskList([task3, task2])
+        task_list.add_tasks([task1])
+
+        self.assertEqual([t.title for t in task_list.tasks], ["Task 1", "Task 2", "Task 3"])
+        self.assertEqual(task_list.index_of(task3), 2)
+        self.assertIs(task_list.get_task(task1.id), task1)
+
+    def test_update_task(self):
+        """Test that updates re-index the task and bump versions."""
+        task1 = Task("Task 1", datetime(2025, 4, 22, 9, 0))
+        task2 = Task("Task 2", datetime(2025, 4, 22, 10, 0))
+        task_list = TaskList([task1, task2])
+        version = task_list.version
+
+        task_list.update_task(task1, start_time=datetime(2025, 4, 23, 9, 0), completed=True)
+        self.assertEqual(list(task_list.tasks), [task2, task1])
+        self.assertEqual(task_list.count_tasks_by_day(2025, 4, completed=True), {23: 1})
+        self.assertEqual(task1.version, 1)
+        self.assertGreater(task_list.version, version)
+
+        # Unchanged values are not a change
+        version = task_list.version
+        task_list.update_task(task1, completed=True)
+        self.assertEqual(task_list.version, version)
+        with self.assertRaises(TypeError):
+            task_list.update_task(task1, id="other")
+
+    def test_update_keeps_position(self):
+        """Test that completing or renaming a task doesn't move it among its ties."""
+        tasks = [Task(f"Task {i}", datetime(2025, 4, 22, 9, 0), id=f"task{i}") for i in range(3)]
+        task_list = TaskList(tasks)
+        # Built before the rename, so the rename must update it
+        self.assertEqual(len(task_list.search("task")), 3)
+        task_list.set_completed(tasks[0], True)
+        task_list.update_task(tasks[1], title="Renamed")
+        self.assertEqual(list(task_list.tasks), tasks)
+        self.assertEqual(task_list.count_tasks_by_day(2025, 4, completed=True), {22: 1})
+        self.assertEqual([task.id for task in task_list.search("renamed")], ["task1"])
+        self.assertEqual(len(task_list.search("task")), 2)
+
+        task_list.set_completed(tasks[0], False)
+        self.assertEqual(task_list.count_tasks_by_day(2025, 4, completed=True), {})
+        self.assertEqual(task_list.count_tasks_by_day(2025, 4, completed=False), {22: 3})
+
+    def test_changes(self):
+        """Test that changes are folded into one entry per task."""
+        task1 = Task("Task 1", datetime(2025, 4, 22, 9, 0), id="task1")
+        task2 = Task("Task 2", datetime(2025, 4, 22, 10, 0), id="task2")
+        task_list = TaskList([task1, task2])
+        self.assertFalse(task_list.changes())
+
+        task3 = Task("Task 3", datetime(2025, 4, 22, 11, 0), id="task3")
+        task4 = Task("Task 4", datetime(2025, 4, 22, 12, 0), id="task4")
+        task_list.add_tasks([task3, task4])
+        task_list.set_completed(task3, True)  # Still just added
+        task_list.remove_task("task4")  # Added then removed: nothing to save
+        task_list.set_completed(task1, True)
+        task_list.remove_task("task2")
+
+        changes = task_list.take_changes()
+        self.assertEqual(changes.added, [task3])
+        self.assertEqual(changes.updated, [task1])
+        self.assertEqual(changes.removed, ["task2"])
+        self.assertEqual(task_list.change_count, 0)
+
+        # Restored changes are merged with newer ones
+        task_list.add_task(Task("Task 2", datetime(2025, 4, 22, 10, 0), id="task2"))
+        task_list.restore_changes(changes)
+        restored = task_list.changes()
+        self.assertEqual([t.id for t in restored.added], ["task3"])
+        self.assertEqual(sorted(t.id for t in restored.updated), ["task1", "task2"])
+        self.assertEqual(restored.removed, [])
+
+
+    def test_merge(self):
+        """Test merging tasks re-read from storage."""
+        task1 = Task("Task 1", datetime(2025, 4, 22, 9, 0), id="task1")
+        task2 = Task("Task 2", datetime(2025, 4, 22, 10, 0), id="task2")
+        task3 = Task("Task 3", datetime(2025, 5, 1, 9, 0), id="task3")
+        task_list = TaskList([task1, task2, task3])
+        task_list.set_completed(task2, True)
+
+        stored = [
+            Task("Task 1", datetime(2025, 4, 23, 9, 0), id="task1"),  # Moved
+            Task("Task 4", datetime(2025, 4, 22, 8, 0), id="task4"),  # New
+        ]
+        # task2 is missing but has unsaved changes; task3 is out of range
+        applied = task_list.merge(stored, [(datetime(2025, 4, 1), datetime(2025, 5, 1))])
+        self.assertEqual(applied, 2)
+        self.assertEqual([t.id for t in task_list.tasks], ["task4", "task2", "task1", "task3"])
+        self.assertEqual(task_list.count_tasks_by_day(2025, 4), {22: 2, 23: 1})
+        self.assertEqual(task_list.change_count, 1)
+
+
+    def test_index_at(self):
+        """Test finding the first task at or after a time."""
+        task_list = TaskList(
+            Task(f"Task {hour}", datetime(2025, 4, 22, hour, 0)) for hour in (9, 11, 13)
+        )
+        self.assertEqual(task_list.index_at(datetime(2025, 4, 22)), 0)
+        self.assertEqual(task_list.index_at(datetime(2025, 4, 22, 11, 0)), 1)
+        self.assertEqual(task_list.index_at(datetime(2025, 4, 22, 12, 0)), 2)
+        self.assertEqual(task_list.index_at(datetime(2025, 4, 23)), 3)
+
+    def test_recurring_tasks(self):
+        """Test that occurrences are listed and counted but not stored."""
+        review = Task("Review", datetime(2025, 4, 1, 10, 0), datetime(2025, 4, 1, 11, 0),
+                      id="review", recurrence=Recurrence(WEEKLY, by_weekday=(1, 3)))
+        task_list = TaskList([review, Task("Lunch", datetime(2025, 4, 22, 12, 0))])
+        self.assertEqual(len(task_list.tasks), 2)
+
+        tasks = task_list.get_tasks_for_date(datetime(2025, 4, 22))
+        self.assertEqual([t.title for t in tasks], ["Review", "Lunch"])
+        self.assertIsInstance(tasks[0], Occurrence)
+        self.assertEqual(tasks[0].end_time, datetime(2025, 4, 22, 11, 0))
+        self.assertEqual(task_list.count_tasks_by_day(2025, 4)[22], 2)
+        self.assertEqual(sum(task_list.count_tasks_by_day(2025, 4).values()), 10)
+
+        # Completing an occurrence only records its start time in the rule
+        task_list.set_completed(tasks[0], True)
+        self.assertEqual(review.recurrence.completed, {datetime(2025, 4, 22, 10, 0)})
+        self.assertFalse(review.completed)
+        self.assertEqual(task_list.count_tasks_by_day(2025, 4, completed=True), {22: 1})
+        self.assertTrue(task_list.get_tasks_for_date(datetime(2025, 4, 22))[0].completed)
+        self.assertEqual(task_list.next_occurrence(review, datetime(2025, 4, 23)),
+                         datetime(2025, 4, 24, 10, 0))
+
+        # Rules repeating less than once in eight years
+        census = Task("Census", datetime(2020, 4, 1, 9, 0), recurrence=Recurrence(YEARLY, interval=10))
+        self.assertEqual(task_list.next_occurrence(census, datetime(2020, 4, 2)),
+                         datetime(2030, 4, 1, 9, 0))
+        leap = Task("Leap", datetime(2096, 2, 29), recurrence=Recurrence(YEARLY, interval=3))
+        self.assertEqual(task_list.next_occurrence(leap, datetime(2096, 3, 1)), datetime(2108, 2, 29))
+        millennial = Task("Millennial", datetime(2025, 1, 1), recurrence=Recurrence(YEARLY, interval=5000))
+        self.assertEqual(task_list.next_occurrence(millennial, datetime(2025, 1, 2)), datetime(7025, 1, 1))
+
+        # Expanded windows are cached until a recurring task changes
+        misses = task_list._occurrences.misses
+        task_list.get_tasks_for_date(datetime(2025, 4, 22))
+        self.assertEqual(task_list._occurrences.misses, misses)
+
+    def test_conflicts(self):
+        """Test overlap queries and conflicts, including occurrences."""
+        review = Task("Review", datetime(2025, 4, 1, 10, 0), datetime(2025, 4, 1, 11, 0),
+                      id="review", recurrence=Recurrence(WEEKLY, by_weekday=(1,)))
+        lunch = Task("Lunch", datetime(2025, 4, 22, 12, 0), datetime(2025, 4, 22, 13, 0), id="lunch")
+        task_list = TaskList([review, lunch, Task("Call", datetime(2025, 4, 22, 12, 30))])
+
+        overlapping = task_list.overlapping(datetime(2025, 4, 22, 10, 30), datetime(2025, 4, 22, 12, 30))
+        self.assertEqual([task.title for task in overlapping], ["Review", "Lunch"])
+
+        new = Task("Dentist", datetime(2025, 4, 22, 10, 45), datetime(2025, 4, 22, 12, 15))
+        self.assertEqual([task.title for task in task_list.conflicts(new)], ["Review", "Lunch"])
+        self.assertEqual(task_list.conflicts(Task("Call", datetime(2025, 4, 22, 10, 30))), [])
+        # A series doesn't conflict with its own occurrences
+        occurrence = task_list.get_tasks_for_date(datetime(2025, 4, 22))[0]
+        self.assertEqual(task_list.conflicts(occurrence), [])
+
+        # The index follows edits and removals
+        task_list.add_task(new)
+        self.assertEqual(task_list.conflict_days(date(2025, 4, 1), 30), {date(2025, 4, 22)})
+        task_list.update_task(new, start_time=datetime(2025, 4, 23, 9, 0),
+                              end_time=datetime(2025, 4, 24, 9, 0))
+        self.assertEqual(task_list.conflict_days(date(2025, 4, 1), 30), set())
+        task_list.add_task(Task("Trip", datetime(2025, 4, 22, 18, 0), datetime(2025, 4, 26, 18, 0)))
+        self.assertEqual(task_list.conflict_days(date(2025, 4, 1), 30),
+                         {date(2025, 4, 23), date(2025, 4, 24)})
+        task_list.remove_task(new.id)
+        self.assertEqual(task_list.conflict_days(date(2025, 4, 1), 30), set())
+
+    def test_free_slots(self):
+        """Test finding free time within working hours."""
+        task_list = TaskList([
+            Task("Standup", datetime(2025, 4, 22, 9, 0), datetime(2025, 4, 22, 10, 0)),
+            Task("Review", datetime(2025, 4, 22, 9, 30), datetime(2025, 4, 22, 11, 0)),
+            Task("Planning", datetime(2025, 4, 22, 11, 30), datetime(2025, 4, 22, 16, 45)),
+            Task("Call", datetime(2025, 4, 23, 9, 0)),
+            Task("Trip", datetime(2025, 4, 23, 12, 0), datetime(2025, 4, 25, 12, 0)),
+        ])
+        hours = {"day_start": time(9, 0), "day_end": time(17, 0), "weekdays": range(5)}
+        slots = task_list.free_slots(datetime(2025, 4, 22, 8, 0), timedelta(minutes=45),
+                                     limit=3, **hours)
+        self.assertEqual(slots, [
+            (datetime(2025, 4, 23, 9, 0), datetime(2025, 4, 23, 12, 0)),
+            (datetime(2025, 4, 25, 12, 0), datetime(2025, 4, 25, 17, 0)),
+            (datetime(2025, 4, 28, 9, 0), datetime(2025, 4, 28, 17, 0)),
+        ])
+        # Shorter gaps, excluded dates and a later start
+        slots = task_list.free_slots(datetime(2025, 4, 22, 10, 50), timedelta(minutes=30),
+                                     limit=2, excluded_dates=[date(2025, 4, 23)], **hours)
+        self.assertEqual(slots, [
+            (datetime(2025, 4, 22, 11, 0), datetime(2025, 4, 22, 11, 30)),
+            (datetime(2025, 4, 25, 12, 0), datetime(2025, 4, 25, 17, 0)),
+        ])
+        self.assertEqual(task_list.free_slots(datetime(2025, 4, 22), timedelta(hours=9),
+                                              days=30, **hours), [])
+        with self.assertRaises(ValueError):
+            task_list.free_slots(datetime(2025, 4, 22), timedelta(0))
+
 
 if __name__ == "__main__":
     unittest.main()
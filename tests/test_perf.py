@@ -0,0 +1,84 @@
+"""
+Tests for the timing instrumentation.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from termtasks.app import TaskSchedulerApp
+from termtasks.ui.backend import PAUSE, HeadlessBackend
+from termtasks.utils.perf import Histogram, Profiler
+
+
+class TestHistogram(unittest.TestCase):
+    """Test the Histogram class."""
+
+    def test_add(self):
+        """Test totals, buckets and percentiles."""
+        histogram = Histogram(recent=100)
+        for ms in range(1, 201):
+            histogram.add(ms / 1000)
+        self.assertEqual(histogram.count, 200)
+        self.assertAlmostEqual(histogram.mean, 0.1005)
+        self.assertEqual((histogram.last, histogram.max), (0.2, 0.2))
+        self.assertEqual(sum(histogram.buckets), 200)
+        # Percentiles cover the latest samples only
+        self.assertAlmostEqual(histogram.percentile(0), 0.101)
+        self.assertAlmostEqual(histogram.percentile(95), 0.196)
+        self.assertEqual(Histogram().percentile(95), 0.0)
+
+
+class TestProfiler(unittest.TestCase):
+    """Test the Profiler class."""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.log_path = os.path.join(tmpdir.name, "perf.jsonl")
+
+    def test_frames_logged(self):
+        """Test that each frame logs the stage times since the previous one."""
+        profiler = Profiler(self.log_path)
+        with profiler.timer("calendar"):
+            pass
+        profiler.record("save", 0.004)
+        profiler.record("save", 0.002)
+        profiler.end_frame(0.01, tasks=3)
+        profiler.end_frame(0.02, tasks=4)
+        profiler.close()
+
+        self.assertEqual(profiler.stage("save").count, 2)
+        self.assertEqual(profiler.stage("frame").last, 0.02)
+        self.assertEqual(profiler.stage("missing").count, 0)
+        with open(self.log_path) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([record["frame"] for record in records], [1, 2])
+        self.assertEqual(records[0]["stages_ms"]["save"], 6.0)
+        self.assertIn("calendar", records[0]["stages_ms"])
+        self.assertEqual(records[1]["stages_ms"], {"frame": 20.0})
+        self.assertEqual(records[1]["tasks"], 4)
+
+    def test_app(self):
+        """Test the overlay and the timings log of the application."""
+        env = {"TERMTASKS_FILE": os.path.join(os.path.dirname(self.log_path), "tasks.json"),
+               "TERMTASKS_BACKEND": "json", "TERMTASKS_PERF_LOG": self.log_path}
+        with mock.patch.dict(os.environ, env):
+            backend = HeadlessBackend(40, 120, keys=["P", PAUSE, "jk", PAUSE, "q"])
+            app = TaskSchedulerApp(backend=backend)
+            app.run()
+
+        self.assertIsNotNone(backend.find(" PERF "))
+        self.assertIsNotNone(backend.find("tasks         0"))
+        self.assertEqual(app.perf.counters["keys"], 4)
+        with open(self.log_path) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), app.perf.frames)
+        self.assertIn("task_list", records[0]["stages_ms"])
+        self.assertIn("keys", records[-1]["stages_ms"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Tests for background month prefetching.
+"""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+
+from termtasks.models import Task, TaskList
+from termtasks.utils.lazy_storage import LazyTaskStorage
+from termtasks.utils.prefetch import MonthPrefetcher
+from termtasks.utils.storage import TaskStorage
+
+
+class TestMonthPrefetcher(unittest.TestCase):
+    """Test the MonthPrefetcher class."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tmpdir.name, "tasks.json")
+        TaskStorage(self.filepath).save_tasks(TaskList(
+            Task(f"Task {month}", datetime(2025, month, 1, 9, 0), id=f"task{month}")
+            for month in range(1, 13)
+        ))
+        self.storage = LazyTaskStorage(self.filepath)
+        self.task_list = self.storage.load_tasks_around(datetime(2025, 6, 1), margin_months=0)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _wait(self, prefetcher):
+        deadline = time.monotonic() + 5
+        while prefetcher._wanted is not None or prefetcher._reading:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_prefetch_and_apply(self):
+        """Test that requested months are read in the background and applied later."""
+        prefetcher = MonthPrefetcher(self.storage, threading.RLock())
+        prefetcher.request(datetime(2025, 5, 1), datetime(2025, 8, 1))
+        self._wait(prefetcher)
+        self.assertTrue(prefetcher.pending)
+        # Nothing is added until the main thread applies the result
+        self.assertEqual(len(self.task_list.tasks), 1)
+
+        self.assertEqual(prefetcher.apply(self.task_list), 2)
+        self.assertEqual([t.id for t in self.task_list.tasks], ["task5", "task6", "task7"])
+        self.assertFalse(prefetcher.pending)
+        self.assertEqual(self.task_list.change_count, 0)
+        prefetcher.close()
+
+    def test_overlapping_results(self):
+        """Test that a window loaded in the meantime is not added twice."""
+        prefetcher = MonthPrefetcher(self.storage, threading.RLock())
+        prefetcher.request(datetime(2025, 7, 1), datetime(2025, 8, 1))
+        self._wait(prefetcher)
+        self.storage.load_month(self.task_list, datetime(2025, 7, 1), 0)
+
+        self.assertEqual(prefetcher.apply(self.task_list), 0)
+        self.assertEqual(len(self.task_list.tasks), 2)
+        prefetcher.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Tests for recurrence rules.
+"""
+
+import unittest
+from datetime import datetime
+
+from termtasks.recurrence import DAILY, MONTHLY, WEEKLY, YEARLY, OccurrenceCache, Recurrence
+
+
+class TestRecurrence(unittest.TestCase):
+    """Test the Recurrence class."""
+
+    def setUp(self):
+        # A Wednesday
+        self.dtstart = datetime(2025, 1, 1, 9, 0)
+
+    def test_daily(self):
+        """Test daily rules, with an interval and with weekdays."""
+        rule = Recurrence(DAILY, interval=2)
+        self.assertEqual(rule.occurrences(self.dtstart, datetime(2025, 1, 2), datetime(2025, 1, 8)),
+                         [datetime(2025, 1, d, 9, 0) for d in (3, 5, 7)])
+        workdays = Recurrence(DAILY, by_weekday=(0, 1, 2, 3, 4))
+        times = workdays.occurrences(self.dtstart, datetime(2025, 1, 1), datetime(2025, 1, 8))
+        self.assertEqual([when.day for when in times], [1, 2, 3, 6, 7])
+
+    def test_weekly(self):
+        """Test that weekly rules skip weekdays before the start time."""
+        rule = Recurrence(WEEKLY, interval=2, by_weekday=(3, 0))
+        self.assertEqual(rule.by_weekday, (0, 3))
+        times = rule.occurrences(self.dtstart, datetime(2025, 1, 1), datetime(2025, 2, 1))
+        self.assertEqual([when.day for when in times], [2, 13, 16, 27, 30])
+        self.assertEqual(rule.summary, "every 2 weeks on Mon, Thu")
+
+    def test_monthly_and_yearly(self):
+        """Test that months and years without the start day are skipped."""
+        rule = Recurrence(MONTHLY)
+        times = rule.occurrences(datetime(2025, 1, 31), datetime(2025, 1, 1), datetime(2025, 6, 1))
+        self.assertEqual([when.month for when in times], [1, 3, 5])
+        rule = Recurrence(YEARLY)
+        times = rule.occurrences(datetime(2024, 2, 29), datetime(2024, 1, 1), datetime(2033, 1, 1))
+        self.assertEqual([when.year for when in times], [2024, 2028, 2032])
+
+    def test_end(self):
+        """Test until, count and exceptions."""
+        rule = Recurrence(DAILY, until=datetime(2025, 1, 3, 9, 0))
+        self.assertEqual(len(rule.occurrences(self.dtstart, self.dtstart, datetime(2026, 1, 1))), 3)
+        rule = Recurrence(DAILY, count=5, exceptions={datetime(2025, 1, 2, 9, 0)})
+        times = rule.occurrences(self.dtstart, datetime(2025, 1, 2), datetime(2026, 1, 1))
+        # The exception still counts towards the five occurrences
+        self.assertEqual([when.day for when in times], [3, 4, 5])
+        with self.assertRaises(ValueError):
+            Recurrence(DAILY, until=self.dtstart, count=1)
+        with self.assertRaises(ValueError):
+            Recurrence(MONTHLY, by_weekday=(0,))
+
+    def test_far_window(self):
+        """Test that windows far from the start time begin at the window."""
+        rule = Recurrence(WEEKLY)
+        times = rule.occurrences(self.dtstart, datetime(2125, 1, 1), datetime(2125, 1, 15))
+        self.assertEqual(times, [datetime(2125, 1, 3, 9, 0), datetime(2125, 1, 10, 9, 0)])
+
+    def test_completed(self):
+        """Test marking occurrences completed and removing them."""
+        when = datetime(2025, 1, 2, 9, 0)
+        rule = Recurrence(DAILY).with_completed(when)
+        self.assertEqual(rule.completed, {when})
+        self.assertEqual(rule.with_completed(when, False).completed, frozenset())
+        rule = rule.with_exception(when)
+        self.assertEqual((rule.exceptions, rule.completed), ({when}, frozenset()))
+
+    def test_parse(self):
+        """Test parsing typed rules."""
+        self.assertEqual(Recurrence.parse("Weekly 2 mon,thursday"),
+                         Recurrence(WEEKLY, 2, (0, 3)))
+        self.assertEqual(Recurrence.parse("monthly"), Recurrence(MONTHLY))
+        for text in ("", "hourly", "weekly sometimes"):
+            with self.assertRaises(ValueError):
+                Recurrence.parse(text)
+
+    def test_dict_round_trip(self):
+        """Test that only the fields that are set are stored."""
+        self.assertEqual(Recurrence(DAILY).to_dict(), {"freq": DAILY})
+        rule = Recurrence(WEEKLY, 3, (1,), until=datetime(2025, 6, 1),
+                          exceptions={datetime(2025, 1, 7, 9, 0)},
+                          completed={datetime(2025, 1, 28, 9, 0)})
+        self.assertEqual(Recurrence.from_dict(rule.to_dict()), rule)
+
+
+class TestOccurrenceCache(unittest.TestCase):
+    """Test the OccurrenceCache class."""
+
+    def test_lru(self):
+        """Test hits, version changes and eviction."""
+        cache = OccurrenceCache(maxsize=2)
+        expand = lambda start, end: [start, end]
+        jan, feb, mar = datetime(2025, 1, 1), datetime(2025, 2, 1), datetime(2025, 3, 1)
+        self.assertEqual(cache.get(jan, feb, 0, expand), [jan, feb])
+        cache.get(jan, feb, 0, expand)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.get(jan, feb, 1, expand)
+        cache.get(feb, mar, 1, expand)
+        cache.get(jan, feb, 0, expand)
+        self.assertEqual((cache.hits, cache.misses), (1, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
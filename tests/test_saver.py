@@ -0,0 +1,195 @@
+"""
+Tests for the background saver.
+"""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+
+from termtasks.models import Task, TaskList
+from termtasks.utils.saver import BackgroundSaver
+from termtasks.utils.storage import TaskStorage
+
+
+class RecordingStorage(TaskStorage):
+    """Storage backend that records calls instead of writing files."""
+
+    def __init__(self, incremental=False, fail=False):
+        super().__init__("unused.json")
+        self.incremental = incremental
+        self.fail = fail
+        self.calls = []
+        self.writing = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def save_tasks(self, task_list):
+        self.writing.set()
+        self.release.wait()
+        if self.fail:
+            raise OSError("disk full")
+        self.calls.append(("save_tasks", len(task_list.tasks)))
+
+    def save_task(self, task_list, task):
+        self.calls.append(("save_task", task.id))
+
+    def delete_task(self, task_list, task_id):
+        self.calls.append(("delete_task", task_id))
+
+
+class TestBackgroundSaver(unittest.TestCase):
+    """Test the BackgroundSaver class."""
+
+    def setUp(self):
+        self.task_list = TaskList(
+            Task(f"Task {hour}", datetime(2025, 4, 22, hour, 0), id=f"task{hour}")
+            for hour in range(9, 19)
+        )
+
+    def test_coalesces_burst(self):
+        """Test that a burst of edits is written once after the debounce."""
+        storage = RecordingStorage()
+        saver = BackgroundSaver(storage, self.task_list, delay=0.05)
+        for task in self.task_list.tasks:
+            with saver.lock:
+                self.task_list.set_completed(task, True)
+                saver.mark_dirty()
+        self.assertEqual(saver.pending, 10)
+        self.assertTrue(saver.status)
+
+        deadline = time.monotonic() + 5
+        while saver.pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        saver.close()
+
+        self.assertEqual(storage.calls, [("save_tasks", 10)])
+        self.assertEqual(saver.status, "")
+
+    def test_edits_during_write(self):
+        """Test that the TaskList can be edited while a write is in progress."""
+        storage = RecordingStorage()
+        storage.release.clear()
+        saver = BackgroundSaver(storage, self.task_list, delay=0)
+        with saver.lock:
+            self.task_list.set_completed(self.task_list.get_task("task9"), True)
+            saver.mark_dirty()
+        self.assertTrue(storage.writing.wait(5))
+
+        self.assertTrue(saver.lock.acquire(timeout=5))
+        try:
+            self.task_list.remove_task("task18")
+            saver.mark_dirty()
+        finally:
+            saver.lock.release()
+        storage.release.set()
+        saver.close()
+
+        # The write in progress had 10 tasks; the edit is written after it
+        self.assertEqual(storage.calls, [("save_tasks", 10), ("save_tasks", 9)])
+
+    def test_incremental_flush(self):
+        """Test that incremental backends get one write per changed task."""
+        storage = RecordingStorage(incremental=True)
+        saver = BackgroundSaver(storage, self.task_list, delay=60)
+        task = self.task_list.get_task("task9")
+        self.task_list.update_task(task, title="Renamed")
+        self.task_list.set_completed(task, True)
+        self.task_list.remove_task("task10")
+        saver.mark_dirty()
+        saver.flush()
+
+        self.assertEqual(storage.calls, [("save_task", "task9"), ("delete_task", "task10")])
+        saver.close()
+        self.assertEqual(len(storage.calls), 2)
+
+    def test_failed_write_is_retried(self):
+        """Test that failed writes keep their changes and report the error."""
+        storage = RecordingStorage(fail=True)
+        saver = BackgroundSaver(storage, self.task_list, delay=60)
+        self.task_list.set_completed(self.task_list.get_task("task9"), True)
+        saver.mark_dirty()
+        with self.assertRaises(OSError):
+            saver.flush()
+        self.assertEqual(saver.pending, 1)
+        self.assertIn("disk full", saver.status)
+
+        storage.fail = False
+        saver.close()
+        self.assertEqual(storage.calls, [("save_tasks", 10)])
+
+    def test_failed_delta_is_restored(self):
+        """Test that changes taken for a failed write are kept for the next one."""
+        storage = RecordingStorage(fail=True)
+        saver = BackgroundSaver(storage, self.task_list, delay=60)
+        self.task_list.set_completed(self.task_list.get_task("task9"), True)
+        with self.assertRaises(OSError):
+            saver.flush()
+        self.assertEqual(saver.pending, 1)
+        self.assertEqual(self.task_list.changes().updated[0].id, "task9")
+
+        storage.fail = False
+        saver.close()
+        self.assertEqual(saver.pending, 0)
+
+    def test_conflict_waits_for_main_loop(self):
+        """Test that a conflicting background write leaves the merge to the main loop."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "tasks.json")
+            TaskStorage(filepath).save_tasks(self.task_list)
+            storage = TaskStorage(filepath)
+            task_list = storage.load_tasks()
+            theirs = TaskStorage(filepath)
+            their_list = theirs.load_tasks()
+            their_list.remove_task("task18")
+            theirs.save_tasks(their_list)
+
+            saver = BackgroundSaver(storage, task_list, delay=0)
+            with saver.lock:
+                task_list.set_completed(task_list.get_task("task9"), True)
+                saver.mark_dirty()
+            deadline = time.monotonic() + 5
+            while not saver.conflict and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertTrue(saver.conflict)
+            self.assertEqual(len(task_list.tasks), 10)
+            self.assertEqual(saver.pending, 1)
+
+            # What the main loop does
+            with saver.storage_lock, saver.lock:
+                storage.reload(task_list)
+                saver.mark_dirty()
+            while saver.pending and time.monotonic() < deadline:
+                time.sleep(0.01)
+            saver.close()
+
+            loaded = TaskStorage(filepath).load_tasks()
+            self.assertEqual(len(loaded.tasks), 9)
+            self.assertTrue(loaded.get_task("task9").completed)
+
+    def test_conflict_is_merged(self):
+        """Test that flushing a save conflicting with another process merges and retries."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "tasks.json")
+            TaskStorage(filepath).save_tasks(self.task_list)
+            storage = TaskStorage(filepath)
+            task_list = storage.load_tasks()
+            theirs = TaskStorage(filepath)
+            their_list = theirs.load_tasks()
+            their_list.remove_task("task18")
+            theirs.save_tasks(their_list)
+
+            saver = BackgroundSaver(storage, task_list, delay=60)
+            task_list.set_completed(task_list.get_task("task9"), True)
+            saver.mark_dirty()
+            saver.close()
+
+            loaded = TaskStorage(filepath).load_tasks()
+            self.assertEqual(len(loaded.tasks), 9)
+            self.assertTrue(loaded.get_task("task9").completed)
+
+
+if __name__ == "__main__":
+    unittest.main()
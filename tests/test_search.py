@@ -0,0 +1,110 @@
+"""
+Tests for the title search index.
+"""
+
+import unittest
+from datetime import datetime
+
+from termtasks.models import Task, TaskList
+from termtasks.search import SearchIndex
+from termtasks.utils.date_utils import to_epoch_us
+
+
+class TestSearchIndex(unittest.TestCase):
+    """Test the SearchIndex class."""
+
+    def setUp(self):
+        self.tasks = [
+            Task("Code review", datetime(2025, 4, 22, 11, 0), id="review1"),
+            Task("Standup", datetime(2025, 4, 22, 9, 0), id="standup"),
+            Task("Review  budget", datetime(2025, 4, 23, 10, 0), id="budget"),
+            Task("code REVIEW", datetime(2025, 4, 21, 15, 0), id="review2"),
+        ]
+        self.index = SearchIndex(self.tasks)
+
+    def ids(self, entries):
+        return [task_id for _, task_id in entries]
+
+    def test_substring(self):
+        """Test case-insensitive substring queries in start-time order."""
+        self.assertEqual(self.ids(self.index.search("REVIEW")), ["review2", "review1", "budget"])
+        self.assertEqual(self.ids(self.index.search("view bud")), ["budget"])
+        self.assertEqual(self.ids(self.index.search("e r")), ["review2", "review1"])
+        self.assertEqual(self.ids(self.index.search("xyz")), [])
+        self.assertEqual(self.index.search(" "), [])
+        self.assertEqual(self.index.count("review"), 3)
+        self.assertEqual(self.ids(self.index.search("review", limit=1)), ["review2"])
+
+    def test_prefix(self):
+        """Test that prefix queries match the start of words."""
+        self.assertEqual(self.ids(self.index.search("rev", prefix=True)),
+                         ["review2", "review1", "budget"])
+        self.assertEqual(self.ids(self.index.search("view", prefix=True)), [])
+        self.assertEqual(self.ids(self.index.search("s", prefix=True)), ["standup"])
+
+    def test_typing(self):
+        """Test that extending a query narrows the previous matches."""
+        for query in ("c", "co", "cod", "code", "code r"):
+            self.assertEqual(self.index.count(query), 2)
+        self.index.add(Task("Codec update", datetime(2025, 4, 20), id="codec"))
+        self.assertEqual(self.index.count("code"), 3)
+
+    def test_updates(self):
+        """Test adding, re-adding and removing entries."""
+        self.tasks[1].title = "Standup review"
+        self.index.add(self.tasks[1])
+        self.index.add(self.tasks[1])
+        self.index.remove("review2")
+        self.index.remove("missing")
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.ids(self.index.search("review")), ["standup", "review1", "budget"])
+        self.assertEqual(self.index.search("standup"), [(to_epoch_us(self.tasks[1].start_time),
+                                                        "standup")])
+
+    def test_next_match(self):
+        """Test stepping through matches in both directions."""
+        first = self.index.next_match("review")
+        self.assertEqual(first[1], "review2")
+        self.assertEqual(self.index.next_match("review", first)[1], "review1")
+        self.assertEqual(self.index.next_match("review", first, reverse=True), None)
+        self.assertEqual(self.index.next_match("review", reverse=True)[1], "budget")
+
+    def test_dict_round_trip(self):
+        """Test that an index read back answers the same queries."""
+        index = SearchIndex.from_dict(self.index.to_dict())
+        self.assertEqual(len(index), 4)
+        self.assertEqual(index.search("review"), self.index.search("review"))
+        index.remove("budget")
+        self.assertEqual(index.count("budget"), 0)
+
+
+class TestTaskListSearch(unittest.TestCase):
+    """Test searching a TaskList."""
+
+    def test_kept_current(self):
+        """Test that the index follows the list's changes."""
+        task_list = TaskList([
+            Task("Lunch", datetime(2025, 4, 22, 12, 0), id="lunch"),
+            Task("Code review", datetime(2025, 4, 22, 11, 0), id="review"),
+        ])
+        self.assertEqual([t.id for t in task_list.search("review")], ["review"])
+
+        task_list.update_task(task_list.get_task("lunch"), title="Lunch review")
+        task_list.add_task(Task("Review notes", datetime(2025, 4, 21, 9, 0), id="notes"))
+        task_list.add_tasks([Task("Design review", datetime(2025, 4, 23, 9, 0), id="design")])
+        task_list.remove_task("review")
+        self.assertEqual([t.id for t in task_list.search("review")], ["notes", "lunch", "design"])
+        self.assertEqual([t.id for t in task_list.search("rev", prefix=True, limit=2)],
+                         ["notes", "lunch"])
+
+    def test_attached_index(self):
+        """Test that an attached index may hold tasks that are not loaded."""
+        task_list = TaskList([Task("Code review", datetime(2025, 4, 22, 11, 0), id="review")])
+        index = SearchIndex([Task("Old review", datetime(2020, 1, 1), id="old")])
+        task_list.attach_search_index(index)
+        self.assertEqual(index.count("review"), 2)
+        self.assertEqual([t.id for t in task_list.search("review")], ["review"])
+
+
+if __name__ == "__main__":
+    unittest.main()
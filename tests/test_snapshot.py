@@ -0,0 +1,130 @@
+"""
+Tests for the binary snapshot format.
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from termtasks.models import Task, TaskList
+from termtasks.recurrence import WEEKLY, Recurrence
+from termtasks.utils.snapshot import (
+    HEADER,
+    MAGIC,
+    RECORDS,
+    BinaryTaskStorage,
+    decode_records,
+    decode_store,
+    encode_snapshot,
+    json_to_snapshot,
+    read_snapshot,
+    read_snapshot_store,
+    snapshot_to_json,
+)
+from termtasks.utils.storage import TaskStorage, open_storage
+
+
+class TestSnapshot(unittest.TestCase):
+    """Test encoding and decoding binary snapshots."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.task_list = TaskList([
+            Task("Task 2", datetime(2025, 4, 22, 15, 0), datetime(2025, 4, 22, 16, 0)),
+            Task("Tâche 1", datetime(2025, 4, 22, 9, 0), completed=True, id="custom"),
+            Task("Task 2", datetime(2025, 4, 23, 10, 0, 30, 125)),
+        ])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmpdir.name, name)
+
+    def test_round_trip(self):
+        """Test that encoding and decoding preserves every field."""
+        data = encode_snapshot(self.task_list.tasks)
+        self.assertEqual(decode_records(data), list(self.task_list.tasks))
+        self.assertEqual(decode_records(data, 1, 2), [self.task_list.tasks[1]])
+
+    def test_recurrence(self):
+        """Test that recurrence rules are stored in the heap."""
+        rule = Recurrence(WEEKLY, 2, (1, 4), completed={datetime(2025, 4, 25, 8, 0)})
+        self.task_list.add_task(Task("Gym", datetime(2025, 4, 22, 8, 0), recurrence=rule))
+        tasks = decode_records(encode_snapshot(self.task_list.tasks))
+        self.assertEqual(tasks, list(self.task_list.tasks))
+        self.assertEqual(tasks[0].recurrence, rule)
+
+    def test_version_1(self):
+        """Test decoding snapshots written before recurrence rules."""
+        heap = "Task 1id1".encode("utf-8")
+        data = (HEADER.pack(MAGIC, 1, 0, 1, len(heap))
+                + RECORDS[1].pack(1745312400000000, 0, 0, 6, 6, 3, 1) + heap)
+        self.assertEqual(decode_records(data),
+                         [Task("Task 1", datetime(2025, 4, 22, 9, 0), completed=True, id="id1")])
+        self.assertEqual(len(decode_store(data)), 1)
+
+    def test_rejects_other_files(self):
+        """Test that foreign or truncated data is rejected."""
+        data = encode_snapshot(self.task_list.tasks)
+        with self.assertRaises(ValueError):
+            decode_records(b"{}")
+        with self.assertRaises(ValueError):
+            decode_records(data[:-1])
+
+    def test_heap_size_limit(self):
+        """Test that a string heap too large for its offsets is rejected."""
+        size = len(encode_snapshot(self.task_list.tasks)) - HEADER.size - 3 * RECORDS[2].size
+        with mock.patch("termtasks.utils.snapshot.MAX_HEAP_SIZE", size):
+            encode_snapshot(self.task_list.tasks)
+        with mock.patch("termtasks.utils.snapshot.MAX_HEAP_SIZE", size - 1):
+            with self.assertRaises(ValueError):
+                encode_snapshot(self.task_list.tasks)
+
+    def test_read_store(self):
+        """Test bulk decoding into a columnar TaskStore."""
+        BinaryTaskStorage(self.path("tasks.ttb")).save_tasks(self.task_list)
+        store = read_snapshot_store(self.path("tasks.ttb"))
+        self.assertEqual([view.to_dict() for view in store],
+                         [task.to_dict() for task in self.task_list.tasks])
+
+    def test_parallel_decode(self):
+        """Test decoding record ranges in worker processes."""
+        BinaryTaskStorage(self.path("tasks.ttb")).save_tasks(self.task_list)
+        task_list = read_snapshot(self.path("tasks.ttb"), workers=2)
+        self.assertEqual(list(task_list.tasks), list(self.task_list.tasks))
+
+    def test_json_conversion(self):
+        """Test converting to and from the JSON format."""
+        TaskStorage(self.path("tasks.json")).save_tasks(self.task_list)
+        json_to_snapshot(self.path("tasks.json"), self.path("tasks.ttb"))
+        snapshot_to_json(self.path("tasks.ttb"), self.path("copy.json"))
+
+        with open(self.path("tasks.json")) as original, open(self.path("copy.json")) as copy:
+            self.assertEqual(original.read(), copy.read())
+
+    def test_range_reads(self):
+        """Test reading a range and the recurring tasks without the rest."""
+        rule = Recurrence(WEEKLY, by_weekday=(0,))
+        self.task_list.add_task(Task("Gym", datetime(2025, 1, 6, 7, 0), id="gym", recurrence=rule))
+        storage = BinaryTaskStorage(self.path("tasks.ttb"))
+        self.assertEqual(storage.load_recurring(), [])
+        storage.save_tasks(self.task_list)
+
+        tasks = storage.load_tasks_between(datetime(2025, 4, 22, 9, 0), datetime(2025, 4, 23))
+        self.assertEqual([task.id for task in tasks], ["custom", self.task_list.tasks[2].id])
+        self.assertEqual(storage.load_tasks_between(datetime(2026, 1, 1), datetime.max), [])
+        self.assertEqual(len(storage.load_tasks_between(datetime.min, datetime.max)), 4)
+        self.assertEqual(storage.load_recurring(), [self.task_list.get_task("gym")])
+
+    def test_open_storage(self):
+        """Test selecting the backend by file extension."""
+        storage = open_storage(self.path("tasks.ttb"))
+        self.assertIsInstance(storage, BinaryTaskStorage)
+        self.assertEqual(len(storage.load_tasks().tasks), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
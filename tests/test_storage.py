@@ -0,0 +1,537 @@
+"""
+Tests for task storage backends.
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+
+from termtasks.models import Task, TaskList
+from termtasks.recurrence import DAILY, WEEKLY, Recurrence
+from termtasks.utils.lazy_storage import LazyTaskStorage, OffsetIndex
+from termtasks.utils.sqlite_storage import SQLiteTaskStorage
+from termtasks.utils.storage import (
+    JournalTaskStorage, StorageConflictError, TaskStorage, open_storage,
+)
+
+
+class TestTaskStorage(unittest.TestCase):
+    """Test the JSON storage backend."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tmpdir.name, "tasks.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_round_trip(self):
+        """Test saving and loading tasks."""
+        storage = TaskStorage(self.filepath)
+        task_list = TaskList()
+        task_list.add_task(Task("Task 2", datetime(2025, 4, 22, 10, 0), id="task2"))
+        task_list.add_task(Task("Task 1", datetime(2025, 4, 22, 9, 0), datetime(2025, 4, 22, 9, 30), True, "task1"))
+        storage.save_tasks(task_list)
+
+        loaded = TaskStorage(self.filepath).load_tasks()
+
+        self.assertEqual([t.id for t in loaded.tasks], ["task1", "task2"])
+        self.assertEqual(loaded.get_task("task1"), task_list.get_task("task1"))
+        self.assertEqual(os.listdir(self.tmpdir.name), ["tasks.json"])
+
+    def test_load_missing_file(self):
+        """Test loading when no file exists yet."""
+        self.assertEqual(len(TaskStorage(self.filepath).load_tasks().tasks), 0)
+
+    def test_external_changes(self):
+        """Test detecting, merging and not clobbering another process's save."""
+        TaskStorage(self.filepath).save_tasks(TaskList([
+            Task("Task 1", datetime(2025, 4, 22, 9, 0), id="task1"),
+            Task("Task 2", datetime(2025, 4, 22, 10, 0), id="task2"),
+        ]))
+        ours, theirs = TaskStorage(self.filepath), TaskStorage(self.filepath)
+        our_list, their_list = ours.load_tasks(), theirs.load_tasks()
+        self.assertFalse(ours.has_changed())
+
+        their_list.add_task(Task("Task 3", datetime(2025, 4, 22, 11, 0), id="task3"))
+        their_list.set_completed(their_list.get_task("task1"), True)
+        theirs.save_tasks(their_list)
+        our_list.update_task(our_list.get_task("task1"), title="Renamed")
+
+        self.assertTrue(ours.has_changed())
+        with self.assertRaises(StorageConflictError):
+            ours.save_tasks(our_list)
+
+        # Their new task is merged in; our unsaved edit wins over theirs
+        self.assertEqual(ours.reload(our_list), 1)
+        self.assertEqual([t.id for t in our_list.tasks], ["task1", "task2", "task3"])
+        self.assertEqual(our_list.get_task("task1").title, "Renamed")
+        self.assertFalse(our_list.get_task("task1").completed)
+        self.assertFalse(ours.has_changed())
+        ours.save_tasks(our_list)
+
+    def test_reload_duplicate_ids(self):
+        """Test that tasks stored under one ID keep their local copies on reload."""
+        with open(self.filepath, "w") as f:
+            json.dump({"tasks": [
+                Task("A", datetime(2025, 4, 22, 9, 0)).to_dict(),
+                Task("B", datetime(2025, 4, 22, 9, 0)).to_dict(),
+                Task("C", datetime(2025, 4, 22, 10, 0), id="x").to_dict(),
+            ]}, f)
+        ours = TaskStorage(self.filepath)
+        our_list = ours.load_tasks()
+        # A script edits the file, leaving the duplicate IDs in place
+        with open(self.filepath) as f:
+            data = json.load(f)
+        data["tasks"][2]["title"] = "D"
+        with open(self.filepath, "w") as f:
+            json.dump(data, f)
+
+        self.assertEqual(ours.reload(our_list), 1)
+        self.assertEqual([(t.id, t.title) for t in our_list.tasks],
+                         [("20250422090000", "A"), ("20250422090000-2", "B"), ("x", "D")])
+        ours.save_tasks(our_list)
+        self.assertEqual([t.title for t in TaskStorage(self.filepath).load_tasks().tasks],
+                         ["A", "B", "D"])
+
+    def test_search_index_cache(self):
+        """Test that the search index is read back while the file is unchanged."""
+        storage = TaskStorage(self.filepath)
+        storage.save_tasks(TaskList([Task("Code review", datetime(2025, 4, 22, 9, 0), id="task1")]))
+        task_list = storage.load_tasks()
+        storage.save_search_index(storage.load_search_index(task_list))
+
+        # An unchanged file answers from the cache, not from the list
+        storage = TaskStorage(self.filepath)
+        storage.load_tasks()
+        self.assertEqual(storage.load_search_index(TaskList()).count("review"), 1)
+
+        # Unsaved removals are applied, and a changed file is re-indexed
+        task_list = storage.load_tasks()
+        task_list.remove_task("task1")
+        self.assertEqual(storage.load_search_index(task_list).count("review"), 0)
+        storage.save_tasks(task_list)
+        self.assertEqual(storage.load_search_index(TaskList()).count("review"), 0)
+
+
+class TestJournalTaskStorage(unittest.TestCase):
+    """Test the journal storage backend."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tmpdir.name, "tasks.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_replay_journal(self):
+        """Test that edits are appended and replayed on load."""
+        storage = JournalTaskStorage(self.filepath)
+        task_list = storage.load_tasks()
+        task1 = Task("Task 1", datetime(2025, 4, 22, 9, 0), id="task1")
+        task2 = Task("Task 2", datetime(2025, 4, 22, 10, 0), id="task2")
+        for task in (task1, task2):
+            task_list.add_task(task)
+            storage.save_task(task_list, task)
+        task_list.set_completed(task1, True)
+        storage.save_task(task_list, task1)
+        task_list.remove_task("task2")
+        storage.delete_task(task_list, "task2")
+        storage.close()
+
+        # Only the journal has been written
+        self.assertFalse(os.path.exists(self.filepath))
+        with open(storage.journal_path) as f:
+            self.assertEqual(len(f.readlines()), 4)
+
+        loaded = JournalTaskStorage(self.filepath).load_tasks()
+        self.assertEqual([t.id for t in loaded.tasks], ["task1"])
+        self.assertTrue(loaded.get_task("task1").completed)
+
+    def test_duplicate_ids_in_snapshot(self):
+        """Test that snapshot tasks sharing an ID are renamed rather than lost."""
+        with open(self.filepath, "w") as f:
+            json.dump({"tasks": [
+                Task("A", datetime(2025, 4, 22, 9, 0)).to_dict(),
+                Task("B", datetime(2025, 4, 22, 9, 0)).to_dict(),
+            ]}, f)
+        storage = JournalTaskStorage(self.filepath)
+        task_list = storage.load_tasks()
+        self.assertEqual([(t.id, t.title) for t in task_list.tasks],
+                         [("20250422090000", "A"), ("20250422090000-2", "B")])
+
+        # Journal records refer to the renamed ID
+        task_list.set_completed(task_list.get_task("20250422090000-2"), True)
+        storage.save_changes(task_list, task_list.take_changes())
+        storage.compact(task_list, background=False)
+        storage.close()
+        loaded = JournalTaskStorage(self.filepath).load_tasks()
+        self.assertEqual([(t.title, t.completed) for t in loaded.tasks], [("A", False), ("B", True)])
+
+    def test_ignores_torn_record(self):
+        """Test that a partially written last record is skipped."""
+        storage = JournalTaskStorage(self.filepath)
+        task_list = TaskList()
+        task = Task("Task 1", datetime(2025, 4, 22, 9, 0), id="task1")
+        task_list.add_task(task)
+        storage.save_task(task_list, task)
+        storage.close()
+        with open(storage.journal_path, "a") as f:
+            f.write('{"op":"put","task":{"id":')
+
+        loaded = JournalTaskStorage(self.filepath).load_tasks()
+        self.assertEqual([t.id for t in loaded.tasks], ["task1"])
+
+    def test_compaction(self):
+        """Test that a long journal is folded into the snapshot."""
+        storage = JournalTaskStorage(self.filepath, compact_every=3)
+        task_list = TaskList()
+        for hour in range(9, 14):
+            task = Task(f"Task {hour}", datetime(2025, 4, 22, hour, 0))
+            task_list.add_task(task)
+            storage.save_task(task_list, task)
+        storage.close()
+
+        with open(self.filepath) as f:
+            self.assertEqual(len(json.load(f)["tasks"]), 3)
+        self.assertFalse(os.path.exists(storage.rotated_path))
+
+        loaded = JournalTaskStorage(self.filepath).load_tasks()
+        self.assertEqual(len(loaded.tasks), 5)
+
+    def test_reload_reads_tail(self):
+        """Test that records appended by another process are picked up."""
+        ours, theirs = JournalTaskStorage(self.filepath), JournalTaskStorage(self.filepath)
+        our_list, their_list = ours.load_tasks(), theirs.load_tasks()
+        task = Task("Task 1", datetime(2025, 4, 22, 9, 0), id="task1")
+        our_list.add_task(task)
+        ours.save_changes(our_list, our_list.take_changes())
+        # Our own record does not count as an external change
+        self.assertFalse(ours.has_changed())
+
+        self.assertTrue(theirs.has_changed())
+        self.assertEqual(theirs.reload(their_list), 1)
+        their_list.set_completed(their_list.get_task("task1"), True)
+        theirs.save_changes(their_list, their_list.take_changes())
+        offset = ours._journal_offset
+
+        self.assertTrue(ours.has_changed())
+        self.assertEqual(ours.reload(our_list), 1)
+        self.assertTrue(task.completed)
+        self.assertGreater(ours._journal_offset, offset)
+        self.assertEqual(our_list.change_count, 0)
+        ours.close()
+        theirs.close()
+
+    def test_compaction_waits_for_reload(self):
+        """Test that compaction leaves merging other processes' records to reload."""
+        ours, theirs = JournalTaskStorage(self.filepath, compact_every=2), JournalTaskStorage(self.filepath)
+        our_list, their_list = ours.load_tasks(), theirs.load_tasks()
+        their_task = Task("Theirs", datetime(2025, 4, 22, 8, 0), id="theirs")
+        their_list.add_task(their_task)
+        theirs.save_task(their_list, their_task)
+
+        for hour in (9, 10):
+            task = Task(f"Task {hour}", datetime(2025, 4, 22, hour, 0), id=f"task{hour}")
+            our_list.add_task(task)
+            ours.save_task(our_list, task)
+        # Not compacted, and the TaskList was not touched
+        self.assertFalse(os.path.exists(self.filepath))
+        self.assertIsNone(our_list.get_task("theirs"))
+        with self.assertRaises(StorageConflictError):
+            ours.save_tasks(our_list)
+
+        ours.reload(our_list)
+        ours.save_tasks(our_list)
+        ours.close()
+        theirs.close()
+        with open(self.filepath) as f:
+            self.assertEqual(len(json.load(f)["tasks"]), 3)
+
+    def test_incremental_conflict(self):
+        """Test that appending a change to a task another process changed is refused."""
+        TaskStorage(self.filepath).save_tasks(TaskList([
+            Task("Task 1", datetime(2025, 4, 22, 9, 0), id="task1"),
+            Task("Task 2", datetime(2025, 4, 22, 10, 0), id="task2"),
+        ]))
+        ours, theirs = JournalTaskStorage(self.filepath), JournalTaskStorage(self.filepath)
+        our_list, their_list = ours.load_tasks(), theirs.load_tasks()
+        their_list.update_task(their_list.get_task("task1"), title="Theirs")
+        theirs.save_changes(their_list, their_list.take_changes())
+
+        our_list.update_task(our_list.get_task("task1"), title="Ours")
+        changes = our_list.take_changes()
+        with self.assertRaises(StorageConflictError):
+            ours.save_changes(our_list, changes)
+        # Other tasks can still be written
+        our_list.set_completed(our_list.get_task("task2"), True)
+        ours.save_changes(our_list, our_list.take_changes())
+
+        # Once merged, our unsaved edit wins
+        our_list.restore_changes(changes)
+        ours.reload(our_list)
+        ours.save_changes(our_list, our_list.take_changes())
+        ours.close()
+        theirs.close()
+        loaded = JournalTaskStorage(self.filepath).load_tasks()
+        self.assertEqual([(t.title, t.completed) for t in loaded.tasks],
+                         [("Ours", False), ("Task 2", True)])
+
+    def test_append_after_other_compaction(self):
+        """Test that appends follow a journal rotated by another process."""
+        ours, theirs = JournalTaskStorage(self.filepath), JournalTaskStorage(self.filepath)
+        our_list, their_list = ours.load_tasks(), theirs.load_tasks()
+        first = Task("Task 1", datetime(2025, 4, 22, 9, 0), id="task1")
+        our_list.add_task(first)
+        ours.save_task(our_list, first)
+
+        theirs.reload(their_list)
+        theirs.save_tasks(their_list)
+        self.assertFalse(os.path.exists(theirs.journal_path))
+
+        second = Task("Task 2", datetime(2025, 4, 22, 10, 0), id="task2")
+        our_list.add_task(second)
+        ours.save_task(our_list, second)
+        self.assertTrue(theirs.has_changed())
+        ours.close()
+        theirs.close()
+
+        loaded = JournalTaskStorage(self.filepath).load_tasks()
+        self.assertEqual([t.id for t in loaded.tasks], ["task1", "task2"])
+
+    def test_open_storage(self):
+        """Test backend selection."""
+        self.assertIsInstance(open_storage(self.filepath, "journal"), JournalTaskStorage)
+        self.assertIs(type(open_storage(self.filepath, "json")), TaskStorage)
+        storage = open_storage(os.path.join(self.tmpdir.name, "tasks.db"))
+        self.assertIsInstance(storage, SQLiteTaskStorage)
+        storage.close()
+        with self.assertRaises(ValueError):
+            open_storage(self.filepath, "csv")
+
+
+class TestSQLiteTaskStorage(unittest.TestCase):
+    """Test the SQLite storage backend."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.storage = SQLiteTaskStorage(os.path.join(self.tmpdir.name, "tasks.db"))
+        self.task_list = TaskList([
+            Task("Task 1", datetime(2025, 4, 22, 9, 0), id="task1"),
+            Task("Task 2", datetime(2025, 4, 22, 15, 0), datetime(2025, 4, 22, 16, 0), id="task2"),
+            Task("Task 3", datetime(2025, 4, 30, 10, 0), id="task3"),
+            Task("Task 4", datetime(2025, 5, 1, 10, 0), id="task4"),
+        ])
+        self.storage.save_tasks(self.task_list)
+
+    def tearDown(self):
+        self.storage.close()
+        self.tmpdir.cleanup()
+
+    def test_round_trip(self):
+        """Test saving and loading all tasks."""
+        loaded = self.storage.load_tasks()
+        self.assertEqual(list(loaded.tasks), list(self.task_list.tasks))
+
+    def test_range_queries(self):
+        """Test range and per-day queries."""
+        tasks = self.storage.load_tasks_between(datetime(2025, 4, 22), datetime(2025, 4, 23))
+        self.assertEqual([t.id for t in tasks], ["task1", "task2"])
+        self.assertEqual(self.storage.count_tasks_by_day(2025, 4), {22: 2, 30: 1})
+
+    def test_single_task_updates(self):
+        """Test updating, inserting and deleting single rows."""
+        task1 = self.task_list.get_task("task1")
+        self.task_list.set_completed(task1, True)
+        self.storage.save_task(self.task_list, task1)
+        task5 = Task("Task 5", datetime(2025, 4, 30, 11, 0), id="task5")
+        self.task_list.add_task(task5)
+        self.storage.save_task(self.task_list, task5)
+        self.task_list.remove_task("task4")
+        self.storage.delete_task(self.task_list, "task4")
+
+        self.assertEqual(self.storage.count_tasks_by_day(2025, 4, completed=True), {22: 1})
+        loaded = self.storage.load_tasks()
+        self.assertEqual(list(loaded.tasks), list(self.task_list.tasks))
+
+    def test_save_changes(self):
+        """Test writing a changeset in one transaction, updating only changed columns."""
+        self.task_list.take_changes()
+        self.task_list.set_completed(self.task_list.get_task("task2"), True)
+        self.task_list.add_task(Task("Task 5", datetime(2025, 5, 2, 9, 0), id="task5"))
+        self.task_list.remove_task("task3")
+        statements = []
+        self.storage.conn.set_trace_callback(statements.append)
+        self.storage.save_changes(self.task_list, self.task_list.take_changes())
+        self.storage.conn.set_trace_callback(None)
+        self.assertIn("UPDATE tasks SET completed = 1 WHERE id = 'task2'", statements)
+        self.assertFalse(any("REPLACE" in statement for statement in statements))
+
+        loaded = self.storage.load_tasks()
+        self.assertEqual(list(loaded.tasks), list(self.task_list.tasks))
+
+    def test_incremental_conflict(self):
+        """Test that writing a row another process changed is refused."""
+        theirs = SQLiteTaskStorage(self.storage.filepath)
+        self.addCleanup(theirs.close)
+        our_list, their_list = self.storage.load_tasks(), theirs.load_tasks()
+        their_list.update_task(their_list.get_task("task1"), title="Theirs")
+        theirs.save_changes(their_list, their_list.take_changes())
+
+        our_list.update_task(our_list.get_task("task1"), title="Ours")
+        changes = our_list.take_changes()
+        with self.assertRaises(StorageConflictError):
+            self.storage.save_changes(our_list, changes)
+        with self.assertRaises(StorageConflictError):
+            self.storage.delete_task(our_list, "task1")
+        # Rows the other process left alone can still be written
+        our_list.set_completed(our_list.get_task("task2"), True)
+        self.storage.save_changes(our_list, our_list.take_changes())
+
+        # Once merged, our unsaved edit wins
+        our_list.restore_changes(changes)
+        self.storage.reload(our_list)
+        self.storage.save_changes(our_list, our_list.take_changes())
+        loaded = theirs.load_tasks()
+        self.assertEqual([(t.title, t.completed) for t in loaded.tasks[:2]],
+                         [("Ours", False), ("Task 2", True)])
+
+    def test_recurring_tasks(self):
+        """Test that recurring tasks are loaded with every window."""
+        standup = Task("Standup", datetime(2025, 1, 6, 9, 0), id="standup",
+                       recurrence=Recurrence(DAILY, by_weekday=(0, 1, 2, 3, 4)))
+        self.task_list.add_task(standup)
+        self.storage.save_task(self.task_list, standup)
+
+        task_list = self.storage.load_tasks_around(datetime(2025, 4, 10), margin_months=0)
+        self.assertEqual([t.id for t in task_list.tasks], ["standup", "task1", "task2", "task3"])
+        self.assertEqual(task_list.get_task("standup").recurrence, standup.recurrence)
+        self.assertEqual(self.storage.count_tasks_by_day(2025, 4)[22], 3)
+        self.assertNotIn(6, self.storage.count_tasks_by_day(2025, 4))
+
+    def test_migration(self):
+        """Test opening a database from before recurring tasks."""
+        path = os.path.join(self.tmpdir.name, "old.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE tasks (id TEXT PRIMARY KEY, title TEXT NOT NULL, "
+                     "start_time TEXT NOT NULL, end_time TEXT, "
+                     "completed INTEGER NOT NULL DEFAULT 0)")
+        conn.execute("INSERT INTO tasks VALUES ('old', 'Old', '2025-04-22T09:00:00', NULL, 1)")
+        conn.commit()
+        conn.close()
+
+        storage = SQLiteTaskStorage(path)
+        self.addCleanup(storage.close)
+        self.assertEqual([t.id for t in storage.load_tasks().tasks], ["old"])
+        self.assertEqual(storage.load_recurring(), [])
+
+    def test_search_index_cache(self):
+        """Test that the search index cache survives closing the database."""
+        task_list = self.storage.load_tasks_around(datetime(2025, 4, 10), margin_months=0)
+        index = self.storage.load_search_index(task_list)
+        self.assertEqual(index.count("task"), 4)
+        self.storage.save_search_index(index)
+        self.storage.close()
+
+        self.storage = SQLiteTaskStorage(self.storage.filepath)
+        self.assertEqual(self.storage.load_search_index(TaskList()).count("task"), 4)
+        self.storage.save_task(task_list, Task("Task 5", datetime(2025, 6, 1), id="task5"))
+        index = self.storage.load_search_index(self.storage.load_tasks())
+        self.assertEqual(index.count("task"), 5)
+
+
+class TestLazyTaskStorage(unittest.TestCase):
+    """Test the lazily loaded JSON storage backend."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tmpdir.name, "tasks.json")
+        self.task_list = TaskList(
+            Task(f"Task {month}-{day}", datetime(2025, month, day, 9, 0), id=f"task{month}-{day}")
+            for month in range(1, 13)
+            for day in (1, 15)
+        )
+        TaskStorage(self.filepath).save_tasks(self.task_list)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_load_window(self):
+        """Test that only the displayed month and its margin are decoded."""
+        storage = LazyTaskStorage(self.filepath)
+        task_list = storage.load_tasks_around(datetime(2025, 6, 10), margin_months=1)
+        self.assertEqual(len(task_list.tasks), 6)
+        self.assertTrue(os.path.exists(storage.index_path))
+
+        # Paging in the next month only loads months not loaded yet
+        self.assertEqual(storage.load_month(task_list, datetime(2025, 7, 1), margin_months=1), 2)
+        self.assertEqual(len(task_list.tasks), 8)
+        self.assertEqual(storage.count_tasks_by_day(2025, 12), {1: 1, 15: 1})
+
+    def test_missing_file(self):
+        """Test loading windows before the file exists."""
+        storage = LazyTaskStorage(os.path.join(self.tmpdir.name, "new.json"))
+        task_list = storage.load_tasks_around(datetime(2025, 6, 10))
+        self.assertEqual(len(task_list.tasks), 0)
+
+    def test_index_matches_rebuild(self):
+        """Test that the persisted index matches a fresh scan."""
+        storage = LazyTaskStorage(self.filepath)
+        storage.load_tasks_around(datetime(2025, 6, 10))
+        with open(self.filepath, "rb") as f:
+            data = f.read()
+        index = OffsetIndex.build(self.filepath)
+        for i in range(len(index)):
+            record = json.loads(data[index.offsets[i]:index.offsets[i] + index.lengths[i]])
+            self.assertEqual(record["id"], self.task_list.tasks[i].id)
+
+    def test_save_partial_list(self):
+        """Test that saving a window keeps the tasks that were not loaded."""
+        with open(self.filepath, "rb") as f:
+            original = f.read()
+
+        storage = LazyTaskStorage(self.filepath)
+        task_list = storage.load_tasks_around(datetime(2025, 6, 10), margin_months=0)
+        storage.save_tasks(task_list)
+        with open(self.filepath, "rb") as f:
+            self.assertEqual(f.read(), original)
+
+        task_list.set_completed(task_list.get_task("task6-1"), True)
+        task_list.remove_task("task6-15")
+        storage.save_tasks(task_list)
+
+        loaded = TaskStorage(self.filepath).load_tasks()
+        self.assertEqual(len(loaded.tasks), 23)
+        self.assertTrue(loaded.get_task("task6-1").completed)
+        self.assertEqual(storage.load_tasks_between(datetime(2025, 6, 1), datetime(2025, 7, 1)),
+                         [loaded.get_task("task6-1")])
+
+    def test_recurring_tasks(self):
+        """Test that recurring tasks are loaded with every window and kept on save."""
+        review = Task("Review", datetime(2025, 1, 3, 10, 0), id="review",
+                      recurrence=Recurrence(WEEKLY))
+        self.task_list.add_task(review)
+        TaskStorage(self.filepath).save_tasks(self.task_list)
+
+        storage = LazyTaskStorage(self.filepath)
+        task_list = storage.load_tasks_around(datetime(2025, 6, 10), margin_months=0)
+        self.assertEqual(len(task_list.tasks), 3)
+        self.assertEqual(storage.count_tasks_by_day(2025, 6), {1: 1, 6: 1, 13: 1, 15: 1,
+                                                               20: 1, 27: 1})
+        self.assertEqual(storage.count_tasks_by_day(2025, 1), {1: 1, 3: 1, 10: 1, 15: 1,
+                                                               17: 1, 24: 1, 31: 1})
+
+        task_list.set_occurrence_completed(task_list.get_task("review"),
+                                           datetime(2025, 6, 6, 10, 0), True)
+        storage.save_tasks(task_list)
+        loaded = TaskStorage(self.filepath).load_tasks()
+        self.assertEqual(len(loaded.tasks), 25)
+        self.assertEqual(loaded.get_task("review").recurrence.completed,
+                         {datetime(2025, 6, 6, 10, 0)})
+
+
+if __name__ == "__main__":
+    unittest.main()
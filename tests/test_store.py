@@ -0,0 +1,88 @@
+"""
+Tests for the compact task representations.
+"""
+
+import unittest
+from datetime import date, datetime
+
+from termtasks.models import Task, TaskList
+from termtasks.store import CompactTask, TaskStore
+
+
+class TestCompactTask(unittest.TestCase):
+    """Test the CompactTask class."""
+
+    def test_matches_task(self):
+        """Test that CompactTask behaves like Task."""
+        start_time = datetime(2025, 4, 22, 0, 0)
+        task = Task("Test Task", start_time)
+        compact = CompactTask("Test Task", start_time)
+
+        self.assertFalse(hasattr(compact, "__dict__"))
+        self.assertEqual(compact.id, task.id)
+        self.assertEqual(compact.start_str, task.start_str)
+        self.assertEqual(compact.is_all_day, task.is_all_day)
+        self.assertEqual(compact.to_dict(), task.to_dict())
+        self.assertEqual(CompactTask.from_dict(task.to_dict()), compact)
+
+
+class TestTaskStore(unittest.TestCase):
+    """Test the TaskStore class."""
+
+    def setUp(self):
+        self.tasks = [
+            Task("Task 3", datetime(2025, 4, 23, 9, 0), datetime(2025, 4, 23, 10, 0), id="custom"),
+            Task("Task 1", datetime(2025, 4, 22, 0, 0)),
+            Task("Task 2", datetime(2025, 4, 22, 15, 0), completed=True),
+            Task("Task 1", datetime(2025, 4, 24, 9, 30)),
+        ]
+        self.store = TaskStore(self.tasks)
+
+    def test_views_match_tasks(self):
+        """Test that views reproduce the stored tasks in start-time order."""
+        expected = TaskList(self.tasks)
+        self.assertEqual(len(self.store), 4)
+        for view, task in zip(self.store, expected.tasks):
+            self.assertEqual(view.to_dict(), task.to_dict())
+            self.assertEqual(view.start_str, task.start_str)
+            self.assertEqual(view.end_str, task.end_str)
+            self.assertEqual(view.is_all_day, task.is_all_day)
+
+    def test_interned_titles(self):
+        """Test that repeated titles share one string-table entry."""
+        self.assertEqual(len(self.store._strings), 3)
+
+    def test_completion_bitmap(self):
+        """Test toggling completion through a view."""
+        view = self.store[0]
+        self.assertFalse(view.completed)
+        view.completed = True
+        self.assertTrue(self.store[0].completed)
+        self.assertTrue(self.store[1].completed)
+        view.completed = False
+        self.assertFalse(self.store.is_completed(0))
+
+    def test_get_tasks_between(self):
+        """Test range queries over the start column."""
+        views = self.store.get_tasks_between(datetime(2025, 4, 22), datetime(2025, 4, 23))
+        self.assertEqual([view.title for view in views], ["Task 1", "Task 2"])
+
+    def test_to_task_list(self):
+        """Test materializing the store into a TaskList."""
+        task_list = self.store.to_task_list()
+        self.assertEqual(list(task_list.tasks), list(TaskList(self.tasks).tasks))
+
+
+    def test_count_tasks_per_day(self):
+        """Test that bucketed counts match the TaskList's day index."""
+        task_list = TaskList(self.tasks)
+        start = date(2025, 4, 21)
+        for completed in (None, True, False):
+            self.assertEqual(self.store.count_tasks_per_day(start, 5, completed),
+                             task_list.count_tasks_per_day(start, 5, completed))
+        self.assertEqual(self.store.count_tasks_per_day(start, 5), [0, 2, 1, 1, 0])
+        self.assertEqual(self.store.count_tasks_per_day(start, 5, completed=True), [0, 1, 0, 0, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+"""
+Tests for the UI windows.
+"""
+
+import unittest
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+from termtasks.models import Task, TaskList
+from termtasks.ui.calendar import YEAR_VIEW, CalendarWindow, build_year_model
+from termtasks.ui.task_list import TaskListWindow
+
+
+class TestDamageTracking(unittest.TestCase):
+    """Test that windows only redraw what changed."""
+
+    def setUp(self):
+        patches = [
+            mock.patch("curses.newwin", side_effect=lambda *args: mock.MagicMock()),
+            mock.patch("curses.color_pair", return_value=0, create=True),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.task_list = TaskList(
+            Task(f"Task {hour}", datetime(2025, 4, 22, hour, 0)) for hour in range(9, 14)
+        )
+
+    def test_selection_repaints_two_lines(self):
+        """Test that moving the selection redraws just the old and new lines."""
+        window = TaskListWindow(20, 40, 0, 0)
+        window.update(self.task_list, 0, True)
+        self.assertEqual(window.win.erase.call_count, 1)
+
+        window.win.reset_mock()
+        window.update(self.task_list, 1, True)
+        window.win.erase.assert_not_called()
+        rows = sorted({call.args[0] for call in window.win.addstr.call_args_list})
+        self.assertEqual(rows, [1, 2])
+
+        # Nothing changed: nothing is drawn
+        window.win.reset_mock()
+        window.update(self.task_list, 1, True)
+        window.win.addstr.assert_not_called()
+
+        # A change to the list redraws everything
+        self.task_list.set_completed(self.task_list.tasks[0], True)
+        window.update(self.task_list, 1, True)
+        window.win.erase.assert_called_once()
+
+    def test_viewport_follows_selection(self):
+        """Test that only the visible slice of a long list is drawn."""
+        task_list = TaskList(
+            Task(f"Task {i}", datetime(2025, 1, 1, 0, 0) + i * timedelta(minutes=1))
+            for i in range(10000)
+        )
+        window = TaskListWindow(12, 40, 0, 0)
+        window.update(task_list, 0, True)
+        self.assertEqual(window.top, 0)
+
+        window.win.reset_mock()
+        window.update(task_list, 5000, True)
+        self.assertEqual(window.top, 5000 - window.page_size + 1)
+        # One line per visible task, plus the border title and position label
+        self.assertLessEqual(window.win.addstr.call_count, 2 * window.page_size + 2)
+
+        # Moving within the viewport does not scroll
+        window.update(task_list, 4995, True)
+        self.assertEqual(window.top, 5000 - window.page_size + 1)
+        window.update(task_list, 0, True)
+        self.assertEqual(window.top, 0)
+
+    def test_line_cache(self):
+        """Test that task lines are formatted once per task version and width."""
+        window = TaskListWindow(20, 40, 0, 0)
+        window.update(self.task_list, 0, True)
+        self.assertEqual((window.lines.hits, window.lines.misses), (0, 5))
+
+        # Moving the selection reuses the lines
+        window.update(self.task_list, 1, True)
+        self.assertEqual((window.lines.hits, window.lines.misses), (2, 5))
+
+        # An edited task is formatted again, the others are reused
+        task = self.task_list.tasks[0]
+        self.task_list.update_task(task, title="Renamed")
+        window.update(self.task_list, 1, True)
+        self.assertEqual((window.lines.hits, window.lines.misses), (6, 6))
+        self.assertIn("Renamed", window.lines.get(task, window.width))
+
+        # A resize drops the lines formatted for the old width
+        window.resize(20, 20, 0, 0)
+        window.update(self.task_list, 1, True)
+        self.assertEqual(window.lines.misses, 11)
+        self.assertTrue(window.lines.get(task, 20).endswith("..."))
+
+    def test_calendar_skips_unchanged_frames(self):
+        """Test that the calendar is not redrawn when its inputs are unchanged."""
+        window = CalendarWindow(30, 50, 0, 0)
+        date = datetime(2025, 4, 1)
+        window.update(date, self.task_list)
+        window.win.reset_mock()
+        window.update(date, self.task_list)
+        window.win.erase.assert_not_called()
+        window.win.addstr.assert_not_called()
+
+        window.update(datetime(2025, 5, 1), self.task_list)
+        window.win.erase.assert_called_once()
+
+    def test_calendar_cache(self):
+        """Test that month models are reused until the tasks change."""
+        window = CalendarWindow(30, 50, 0, 0)
+        window.update(datetime(2025, 4, 1), self.task_list)
+        window.update(datetime(2025, 5, 1), self.task_list)
+        window.update(datetime(2025, 4, 1), self.task_list, active=True)
+        self.assertEqual((window.cache.hits, window.cache.misses), (1, 2))
+
+        today = date(2000, 1, 1)
+        model = window.cache.get(2025, 4, self.task_list, today)
+        self.assertEqual(model.counts, {22: 5})
+        self.assertEqual(model.done_counts, {})
+        self.assertIn(" 22.  ", "".join(model.rows))
+
+        self.task_list.set_completed(self.task_list.tasks[0], True)
+        model = window.cache.get(2025, 4, self.task_list, today)
+        self.assertEqual(model.done_counts, {22: 1})
+
+    def test_calendar_warm(self):
+        """Test that the neighbouring months are built ahead of paging to them."""
+        window = CalendarWindow(30, 50, 0, 0)
+        self.assertEqual(window.warm(datetime(2025, 1, 1), self.task_list), 2)
+        self.assertEqual(window.warm(datetime(2025, 1, 1), self.task_list), 0)
+        window.update(datetime(2024, 12, 1), self.task_list)
+        window.update(datetime(2025, 2, 1), self.task_list)
+        self.assertEqual((window.cache.hits, window.cache.misses), (2, 0))
+
+        window.toggle_view()
+        self.assertEqual(window.warm(datetime(2025, 1, 1), self.task_list), 0)
+
+    def test_calendar_conflicts(self):
+        """Test that days with overlapping tasks are marked."""
+        self.task_list.add_task(Task("Meeting", datetime(2025, 4, 22, 9, 30),
+                                     datetime(2025, 4, 22, 10, 30)))
+        self.task_list.add_task(Task("Focus", datetime(2025, 4, 22, 10, 0),
+                                     datetime(2025, 4, 22, 12, 0)))
+        model = CalendarWindow(30, 50, 0, 0).cache.get(2025, 4, self.task_list, date(2000, 1, 1))
+        self.assertEqual(model.conflicts, {22})
+        self.assertIn(" 22.! ", "".join(model.rows))
+        self.assertIn(" 23   ", "".join(model.rows))
+
+    def test_year_model(self):
+        """Test the year heatmap's counts, shading and layout."""
+        self.task_list.add_task(Task("Busy", datetime(2025, 4, 23, 9, 0), completed=True))
+        model = build_year_model(2025, self.task_list, date(2025, 4, 23), columns=3)
+        self.assertEqual(len(model.counts), 365)
+        self.assertEqual(model.counts[date(2025, 4, 22).timetuple().tm_yday - 1], 5)
+        self.assertEqual(model.done_counts[date(2025, 4, 23).timetuple().tm_yday - 1], 1)
+
+        text = ["".join(segment for segment, _ in line) for line in model.lines]
+        # Four rows of three months: title, weekdays, six weeks and a spacer each
+        self.assertEqual(len(text), 4 * 9)
+        self.assertIn("APR", text[9])
+        # The busiest day gets the darkest shade; an overdue day is yellow
+        self.assertIn("█", text[9 + 2 + 3])
+        self.assertIn(("█", 4), model.lines[9 + 2 + 3])
+
+    def test_year_view(self):
+        """Test switching to the year view and caching its model."""
+        window = CalendarWindow(40, 60, 0, 0)
+        window.toggle_view()
+        self.assertEqual(window.view, YEAR_VIEW)
+        window.update(datetime(2025, 4, 1), self.task_list)
+        window.update(datetime(2025, 4, 1), self.task_list, active=True)
+        self.assertEqual((window.cache.hits, window.cache.misses), (1, 1))
+        self.assertEqual(window.title, "YEAR - 2025")
+
+        # A change to the tasks invalidates the model
+        self.task_list.set_completed(self.task_list.tasks[0], True)
+        window.update(datetime(2025, 4, 1), self.task_list, active=True)
+        self.assertEqual(window.cache.misses, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()